@@ -0,0 +1,230 @@
+"""Offline stand-ins for DuckDuckGo, web pages and Bedrock used by the benchmarks.
+
+Each fake replays recorded fixtures from ``benchmarks/fixtures/pipeline`` with
+configurable injected latency, and is installed by patching the one seam the
+agent already uses for that backend: the search module's DDGS client, the
+scraper's pooled ``requests`` session, and a ``fake`` model provider
+registered with :func:`react_agent.models.register_provider`. Runs select the
+fake model with ``Context(model=MODEL)``. Nothing touches the network.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, cast
+
+import requests
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage, UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pipeline")
+MODEL = "fake/benchmark"
+
+
+@dataclass
+class Latencies:
+    """Injected latencies, in seconds."""
+
+    search: float = 0.3
+    fetch: float = 0.15
+    llm_first_token: float = 0.5
+    llm_per_token: float = 0.005
+
+
+@dataclass
+class Fixtures:
+    """Recorded search results, pages and model responses."""
+
+    search: Dict[str, List[Dict[str, str]]]
+    pages: Dict[str, bytes]
+    llm: Dict[str, Any]
+
+    @classmethod
+    def load(cls, directory: str = FIXTURES_DIR) -> Fixtures:
+        """Load the fixtures stored in ``directory``."""
+
+        def read_json(name: str) -> Any:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                return json.load(f)
+
+        pages = {}
+        for url, path in read_json("pages.json").items():
+            with open(os.path.join(directory, path), "rb") as f:
+                pages[url] = f.read()
+        return cls(read_json("search.json"), pages, read_json("llm.json"))
+
+
+class FakeDDGS:
+    """Replays recorded ``DDGS.text`` results; unknown queries find nothing."""
+
+    def __init__(self, fixtures: Fixtures, latencies: Latencies) -> None:
+        """Serve results from ``fixtures`` after ``latencies.search``."""
+        self.fixtures = fixtures
+        self.latencies = latencies
+
+    def text(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:  # noqa: D102
+        time.sleep(self.latencies.search)
+        return self.fixtures.search.get(query, [])[:max_results]
+
+
+class FixtureAdapter(HTTPAdapter):
+    """A transport adapter answering requests from recorded pages."""
+
+    def __init__(self, fixtures: Fixtures, latencies: Latencies) -> None:
+        """Serve pages from ``fixtures`` after ``latencies.fetch``."""
+        super().__init__()
+        self.fixtures = fixtures
+        self.latencies = latencies
+
+    def send(  # noqa: D102
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Union[None, float, Tuple[Optional[float], Optional[float]]] = None,
+        verify: Union[bool, str] = True,
+        cert: Union[None, str, Tuple[str, str]] = None,
+        proxies: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        time.sleep(self.latencies.fetch)
+        body = self.fixtures.pages.get(request.url or "")
+        response = requests.Response()
+        response.request = request
+        response.url = request.url or ""
+        response.status_code = 200 if body is not None else 404
+        response.reason = "OK" if body is not None else "Not Found"
+        response.headers = CaseInsensitiveDict(
+            {
+                "Content-Type": "text/html; charset=utf-8",
+                "Content-Length": str(len(body or b"")),
+            }
+        )
+        response.encoding = "utf-8"
+        response.raw = io.BytesIO(body or b"")
+        return response
+
+
+class FakeBedrockModel(BaseChatModel):
+    """A chat model streaming recorded responses token by token.
+
+    The response is chosen by recognizing which of the agent's prompts it was
+    given, so one instance serves the analysis, rewrite and fused stages. With
+    ``error`` set, every call fails with that message after the first-token
+    latency, like a throttled model.
+    """
+
+    model_id: str = "fake.bedrock-benchmark"
+    responses: Dict[str, Any]
+    first_token_latency: float = 0.5
+    per_token_latency: float = 0.005
+    error: Optional[str] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bedrock"
+
+    def _response_for(self, messages: List[BaseMessage]) -> str:
+        from react_agent.prompts import ANALYSIS_PROMPT
+
+        prompt = str(messages[-1].content)
+        if prompt.startswith(ANALYSIS_PROMPT.split("{", 1)[0]):
+            return str(self.responses["analysis"])
+        return str(self.responses["rewrite"])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        chunks = list(self._stream(messages, stop, run_manager, **kwargs))
+        message = chunks[0].message
+        for chunk in chunks[1:]:
+            message = message + chunk.message
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        text = self._response_for(messages)
+        time.sleep(self.first_token_latency)
+        if self.error:
+            raise RuntimeError(self.error)
+        # Roughly one token per CJK character or short word.
+        tokens = [text[i : i + 2] for i in range(0, len(text), 2)]
+        for i, token in enumerate(tokens):
+            time.sleep(self.per_token_latency)
+            usage: Optional[UsageMetadata] = None
+            if i == len(tokens) - 1:
+                prompt_tokens = sum(len(str(m.content)) for m in messages)
+                usage = {
+                    "input_tokens": prompt_tokens,
+                    "output_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens),
+                }
+            chunk = ChatGenerationChunk(
+                message=AIMessageChunk(content=token, usage_metadata=usage)
+            )
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Any:  # noqa: D102
+        def invoke(prompt: Any) -> Dict[str, str]:
+            result = self.responses["generate"]
+            time.sleep(self.first_token_latency)
+            if self.error:
+                raise RuntimeError(self.error)
+            time.sleep(
+                self.per_token_latency * len(result["article"] + result["analysis"]) / 2
+            )
+            return dict(result)
+
+        return RunnableLambda(invoke)
+
+
+def install(
+    fixtures: Fixtures,
+    latencies: Latencies,
+    models: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> None:
+    """Route the agent's search, fetch and model calls to the fakes.
+
+    Every ``fake/<name>`` model replays ``fixtures`` with ``latencies``;
+    ``models`` maps a name to :class:`FakeBedrockModel` fields overriding
+    that, for example ``{"throttled": {"error": "ThrottlingException"}}``.
+    """
+    from react_agent import models as model_registry
+    from react_agent import scraper, search
+
+    ddgs = FakeDDGS(fixtures, latencies)
+    search._client = lambda: cast(Any, ddgs)
+    adapter = FixtureAdapter(fixtures, latencies)
+    session = scraper.get_session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def fake_model(name: str, **kwargs: Any) -> FakeBedrockModel:
+        settings = {
+            "first_token_latency": latencies.llm_first_token,
+            "per_token_latency": latencies.llm_per_token,
+            **(models or {}).get(name, {}),
+        }
+        return FakeBedrockModel(
+            model_id=f"fake.{name}", responses=fixtures.llm, **settings
+        )
+
+    model_registry.register_provider("fake", fake_model)
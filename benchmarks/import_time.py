@@ -0,0 +1,165 @@
+"""Cold-start import cost of the agent, measured with ``python -X importtime``.
+
+Each run imports the target modules in a fresh interpreter and parses the
+``-X importtime`` report. The script prints the median cumulative import time
+of each target, the packages that cost the most, and any heavy dependency
+that should load on first use but was imported eagerly (which fails the
+run). Like ``benchmarks/pipeline.py``, results can be saved as a baseline and
+later runs compared against it. The script exits with status 1 on a
+regression beyond ``--tolerance``.
+
+Usage:
+    python benchmarks/import_time.py --runs 5
+    python benchmarks/import_time.py --save-baseline benchmarks/import_baseline.json
+    python benchmarks/import_time.py --baseline benchmarks/import_baseline.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Set, Tuple
+
+TARGETS = ("react_agent", "react_agent.graph")
+# Dependencies only the nodes that use them should load.
+DEFERRED = (
+    "boto3",
+    "langchain_aws",
+    "langchain.chat_models",
+    "langchain_tavily",
+    "ddgs",
+    "markdown",
+    "pypdf",
+)
+SRC_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"
+)
+
+
+def import_report(module: str) -> List[Tuple[str, int, int]]:
+    """Import ``module`` in a fresh interpreter; return ``(name, self_us, cumulative_us)`` rows."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [SRC_DIR, os.getenv("PYTHONPATH")])),
+    }
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str, runs: int, top: int) -> Dict[str, Any]:
+    """Summarize ``runs`` cold imports of ``module``."""
+    totals = []
+    by_package: Dict[str, List[int]] = defaultdict(list)
+    loaded: Set[str] = set()
+    for _ in range(runs):
+        rows = import_report(module)
+        totals.append(next(cum for name, _, cum in rows if name == module))
+        package_self: Dict[str, int] = defaultdict(int)
+        for name, self_us, _ in rows:
+            package_self[name.split(".")[0]] += self_us
+            loaded.add(name)
+        for package, self_us in package_self.items():
+            by_package[package].append(self_us)
+    packages = sorted(
+        (
+            (package, statistics.median(samples))
+            for package, samples in by_package.items()
+        ),
+        key=lambda item: -item[1],
+    )
+    return {
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "min_ms": round(min(totals) / 1000, 1),
+        "top_packages_ms": {
+            package: round(us / 1000, 1) for package, us in packages[:top]
+        },
+        "eager_deferred": [name for name in DEFERRED if name in loaded],
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Return a description of every target whose import time regressed beyond ``tolerance``."""
+    regressions = []
+    for module, stats in results.items():
+        previous = baseline.get(module, {}).get("median_ms")
+        if previous and (stats["median_ms"] - previous) / previous > tolerance:
+            change = (stats["median_ms"] - previous) / previous
+            regressions.append(
+                f"{module} median_ms: {previous} -> {stats['median_ms']} ({change:+.0%})"
+            )
+    return regressions
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Print import times and the costliest packages per target."""
+    for module, stats in results.items():
+        print(f"{module}: median {stats['median_ms']} ms, min {stats['min_ms']} ms")
+        for package, ms in stats["top_packages_ms"].items():
+            print(f"    {package:<28}{ms:>10} ms")
+        for name in stats["eager_deferred"]:
+            print(f"    EAGER {name} (should be imported on first use)")
+
+
+def main() -> None:
+    """Parse arguments, measure import times and report them."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--top", type=int, default=10, help="packages to list per target"
+    )
+    parser.add_argument(
+        "--target", action="append", help="module to import (repeatable)"
+    )
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {
+        module: measure(module, args.runs, args.top)
+        for module in args.target or TARGETS
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    failures = [
+        f"EAGER {name} imported by {module}"
+        for module, stats in results.items()
+        for name in stats["eager_deferred"]
+    ]
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures += [
+                f"REGRESSION {r}"
+                for r in compare(results, json.load(f), args.tolerance)
+            ]
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Offline load test of concurrent graph runs in one process.
+
+Compares the two ways a server can drive the graph, using the same fakes
+and fixtures as ``benchmarks/pipeline.py``:
+
+- ``threads``: each run calls ``app.invoke`` on a worker thread and holds it
+  for the whole run, as every run did while all nodes were synchronous;
+- ``async``: each run awaits ``app.ainvoke`` on the event loop. Nodes with an
+  async version wait on the shared scrape and LLM pools without holding a
+  worker thread, and the remaining synchronous nodes borrow one briefly.
+
+Both modes share one pool of ``--threads`` worker threads (the event loop's
+default executor), standing in for a server process's workers. For each
+concurrency level a burst of that many runs is started at once, and
+throughput and latency are reported. The capacity of a mode is the highest
+level whose p95 latency stays within ``--slo`` times the single-run p50.
+
+Usage:
+    python benchmarks/load.py --threads 8 --concurrency 1,8,32,64
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from pipeline import DEFAULT_KEYWORD, peak_rss_mb, summarize
+
+MODES = ("threads", "async")
+
+
+async def burst(
+    mode: str, app: Any, inputs: Dict[str, Any], context: Any, runs: int
+) -> Dict[str, float]:
+    """Start ``runs`` graph runs at once in ``mode`` and summarize their latency."""
+    loop = asyncio.get_running_loop()
+
+    async def one() -> float:
+        started = time.perf_counter()
+        if mode == "threads":
+            state = await loop.run_in_executor(
+                None, lambda: app.invoke(inputs, context=context)
+            )
+        else:
+            state = await app.ainvoke(inputs, context=context)
+        if state.get("grade") != "good":
+            raise RuntimeError(f"unexpected grade {state.get('grade')!r}")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(one() for _ in range(runs)), return_exceptions=True
+    )
+    wall = time.perf_counter() - started
+    samples = [o for o in outcomes if isinstance(o, float)]
+    for failure in (o for o in outcomes if isinstance(o, BaseException)):
+        logging.getLogger(__name__).warning("run failed: %s", failure)
+    return summarize(samples, wall, len(outcomes) - len(samples))
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    """Install the fakes and run every mode at every concurrency level."""
+    import fakes
+
+    from react_agent.artifacts import get_artifact_writer
+    from react_agent.context import Context
+
+    graph_module = importlib.import_module("react_agent.graph")
+    latencies = fakes.Latencies(
+        search=args.search_latency,
+        fetch=args.fetch_latency,
+        llm_first_token=args.llm_first_token_latency,
+        llm_per_token=args.llm_token_latency,
+    )
+    fakes.install(fakes.Fixtures.load(), latencies)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=args.threads, thread_name_prefix="worker")
+    )
+    context = Context(
+        model=fakes.MODEL,
+        search_mode=args.search_mode,
+        generation_mode=args.generation_mode,
+    )
+    inputs = {
+        "messages": [
+            {"role": "user", "content": [{"type": "text", "text": args.keyword}]}
+        ]
+    }
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    results: Dict[str, Any] = {
+        "config": {
+            "threads": args.threads,
+            "concurrency": levels,
+            "search_mode": args.search_mode,
+            "generation_mode": args.generation_mode,
+            "per_host_limit": args.per_host_limit,
+            "latencies": vars(latencies),
+        },
+        "modes": {},
+    }
+    await burst("async", graph_module.app, inputs, context, 1)  # warm-up
+    for mode in MODES:
+        by_level = {}
+        for level in levels:
+            by_level[level] = await burst(
+                mode, graph_module.app, inputs, context, level
+            )
+        baseline = by_level[levels[0]]["p50_ms"]
+        within_slo = [
+            level
+            for level, stats in by_level.items()
+            if not stats["errors"] and stats["p95_ms"] <= args.slo * baseline
+        ]
+        results["modes"][mode] = {
+            "levels": by_level,
+            "capacity": max(within_slo, default=0),
+        }
+    get_artifact_writer().flush()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def print_report(results: Dict[str, Any], slo: float) -> None:
+    """Print throughput and latency for every mode and concurrency level."""
+    print(
+        f"{'mode':<10}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}{'runs/s':>10}{'errors':>8}"
+    )
+    for mode, data in results["modes"].items():
+        for level, stats in data["levels"].items():
+            print(
+                f"{mode:<10}{level:>6}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                f"{stats['runs_per_second']:>10}{stats['errors']:>8}"
+            )
+    threads = results["config"]["threads"]
+    for mode, data in results["modes"].items():
+        print(
+            f"{mode} capacity: {data['capacity']} concurrent runs within "
+            f"{slo}x single-run p50 on {threads} worker threads"
+        )
+    print(f"peak RSS: {results['peak_rss_mb']} MiB")
+
+
+def main() -> None:
+    """Parse arguments, run the load test and report it."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keyword", default=DEFAULT_KEYWORD)
+    parser.add_argument(
+        "--threads", type=int, default=8, help="worker threads per process"
+    )
+    parser.add_argument(
+        "--concurrency",
+        default="1,8,32,64",
+        help="comma-separated burst sizes, smallest first",
+    )
+    parser.add_argument(
+        "--slo",
+        type=float,
+        default=2.0,
+        help="p95 limit as a multiple of p50 at the first level",
+    )
+    parser.add_argument(
+        "--search-mode", choices=["sequential", "fanout"], default="sequential"
+    )
+    parser.add_argument(
+        "--generation-mode", choices=["two_pass", "fused"], default="two_pass"
+    )
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--fetch-latency", type=float, default=0.15)
+    parser.add_argument("--llm-first-token-latency", type=float, default=0.5)
+    parser.add_argument("--llm-token-latency", type=float, default=0.005)
+    parser.add_argument(
+        "--per-host-limit",
+        default="16",
+        help="concurrent fetches per host (SCRAPE_PER_HOST_LIMIT)",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # Module-level settings are read at import time, so set them first.
+    os.environ["ARTIFACT_SINK"] = "memory"
+    # Every run fetches the same few fixture hosts, so the per-host politeness
+    # limits would cap both modes alike and hide the difference being measured.
+    os.environ["SCRAPE_HOST_RATE"] = "0"
+    os.environ["SCRAPE_PER_HOST_LIMIT"] = args.per_host_limit
+    os.environ["SCRAPE_MAX_WORKERS"] = str(max(16, 4 * int(args.per_host_limit)))
+    os.environ["PAGE_CACHE_ENABLED"] = "0"
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+    os.environ["SEARCH_CACHE_TTL"] = "0"
+    logging.basicConfig(level=logging.WARNING)
+
+    results = asyncio.run(run_load(args))
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_report(results, args.slo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Micro-benchmark: Markdown rendering strategies for generated articles.
+
+Compares building a new ``markdown.Markdown`` per article (the previous
+behavior) with the pooled renderer used by render_html_node and the
+incremental block renderer used for live previews while the rewrite streams.
+
+Usage:
+    python benchmarks/markdown_render.py [--iterations N]
+"""
+
+import argparse
+import timeit
+
+import markdown  # type: ignore[import-untyped, unused-ignore]
+
+from react_agent.rendering import (
+    MARKDOWN_EXTENSIONS,
+    IncrementalMarkdownRenderer,
+    render_markdown,
+)
+
+SECTION = """## 市場概況
+
+生成式 AI 晶片需求持續成長,**主要供應商**正擴大產能。
+分析師預期明年出貨量將再創新高。
+
+- 資料中心 GPU 供不應求
+- 邊緣運算晶片開始普及
+- 新創公司投入 ASIC 設計
+
+> 「算力就是新的石油。」
+
+"""
+ARTICLE = (
+    "# 科技趨勢觀察\n\n引言段落,直接點明主題。\n\n"
+    + SECTION * 8
+    + "## 總結\n\n未來值得關注。\n"
+)
+
+
+def per_call() -> str:
+    """Build a new ``markdown.Markdown`` per document, as before pooling."""
+    converted: str = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS).convert(ARTICLE)
+    return converted
+
+
+def pooled() -> str:
+    """Render with the pooled renderer."""
+    return render_markdown(ARTICLE)
+
+
+def incremental(chunk_size: int = 24) -> str:
+    """Render block by block as ``chunk_size`` pieces stream in."""
+    renderer = IncrementalMarkdownRenderer()
+    parts = [
+        renderer.feed(ARTICLE[i : i + chunk_size])
+        for i in range(0, len(ARTICLE), chunk_size)
+    ]
+    parts.append(renderer.close())
+    return "".join(parts)
+
+
+def main() -> None:
+    """Parse arguments and time each rendering strategy."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Article: {len(ARTICLE)} chars, {args.iterations} iterations")
+    baseline = None
+    for name, fn in (
+        ("per-call", per_call),
+        ("pooled", pooled),
+        ("incremental", incremental),
+    ):
+        fn()  # warm up imports and the renderer pool
+        seconds = timeit.timeit(fn, number=args.iterations)
+        per_doc_ms = seconds / args.iterations * 1000
+        baseline = baseline or per_doc_ms
+        print(f"{name:>12}: {per_doc_ms:8.3f} ms/doc  ({baseline / per_doc_ms:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Offline end-to-end and per-node benchmark of the agent graph.
+
+Search results, web pages and Bedrock responses are replayed from the recorded
+fixtures in ``benchmarks/fixtures/pipeline`` with injected latencies (see
+``benchmarks/fakes.py``), so the benchmark runs without network access or AWS
+credentials while still exercising the real fetch, extract, pack, render and
+artifact code paths. Caches are disabled unless ``--warm-caches`` is given,
+so every run does the full amount of work.
+
+Reports p50/p95/p99 latency and runs per second for the whole graph and, with
+``--nodes``, for each node run in isolation, plus the peak RSS of the process.
+Results can be saved as a baseline and later runs compared against it; the
+script exits with status 1 when a metric regresses by more than
+``--tolerance``.
+
+Usage:
+    python benchmarks/pipeline.py --runs 20 --concurrency 4 --nodes
+    python benchmarks/pipeline.py --save-baseline benchmarks/baseline.json
+    python benchmarks/pipeline.py --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+DEFAULT_KEYWORD = "生成式 AI 晶片"
+# search_variant takes a Send payload rather than the graph state.
+SKIPPED_NODES = {"search_variant"}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Return the ``q``-th percentile of ``samples`` by linear interpolation."""
+    ordered = sorted(samples)
+    if not ordered:
+        return float("nan")
+    pos = (len(ordered) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def summarize(
+    samples: List[float], wall_seconds: float, errors: int
+) -> Dict[str, float]:
+    """Summarize latency ``samples`` (seconds) from one benchmark phase."""
+    return {
+        "runs": len(samples),
+        "errors": errors,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "runs_per_second": round(len(samples) / wall_seconds, 2)
+        if wall_seconds
+        else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(fn: Callable[[], Any], runs: int, concurrency: int) -> Dict[str, float]:
+    """Call ``fn`` ``runs`` times on ``concurrency`` threads and summarize latency."""
+    samples: List[float] = []
+    errors = 0
+
+    def timed_call(_: int) -> Tuple[float, bool]:
+        started = time.perf_counter()
+        try:
+            fn()
+            ok = True
+        except Exception as e:
+            logging.getLogger(__name__).warning("run failed: %s", e)
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for seconds, ok in executor.map(timed_call, range(runs)):
+            samples.append(seconds)
+            errors += not ok
+    return summarize(samples, time.perf_counter() - started, errors)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Install the fakes, run the requested phases and return the results."""
+    import fakes
+    from langgraph.graph import END, StateGraph
+
+    from react_agent.artifacts import get_artifact_writer
+    from react_agent.context import Context
+
+    graph_module = importlib.import_module("react_agent.graph")
+    latencies = fakes.Latencies(
+        search=args.search_latency,
+        fetch=args.fetch_latency,
+        llm_first_token=args.llm_first_token_latency,
+        llm_per_token=args.llm_token_latency,
+    )
+    fakes.install(fakes.Fixtures.load(), latencies)
+    context = Context(
+        model=fakes.MODEL,
+        search_mode=args.search_mode,
+        generation_mode=args.generation_mode,
+    )
+    inputs = {
+        "messages": [
+            {"role": "user", "content": [{"type": "text", "text": args.keyword}]}
+        ]
+    }
+
+    def run_graph() -> Dict[str, Any]:
+        state: Dict[str, Any] = graph_module.app.invoke(inputs, context=context)
+        if state.get("grade") != "good":
+            raise RuntimeError(f"unexpected grade {state.get('grade')!r}")
+        return state
+
+    for _ in range(args.warmup):
+        final_state = run_graph()
+    results: Dict[str, Any] = {
+        "config": {
+            "keyword": args.keyword,
+            "runs": args.runs,
+            "concurrency": args.concurrency,
+            "search_mode": args.search_mode,
+            "generation_mode": args.generation_mode,
+            "warm_caches": args.warm_caches,
+            "latencies": vars(latencies),
+        },
+        "e2e": measure(run_graph, args.runs, args.concurrency),
+    }
+
+    if args.nodes:
+        if not args.warmup:
+            final_state = run_graph()
+        # Each node sees the state of a finished run, with the original input
+        # messages so start_node can parse the keyword again.
+        node_input = {**final_state, "messages": inputs["messages"]}
+        results["nodes"] = {}
+        for name, spec in graph_module.builder.nodes.items():
+            if name in SKIPPED_NODES:
+                continue
+            single: StateGraph[Any, Context, Any, Any] = StateGraph(
+                graph_module.GraphState, context_schema=Context
+            )
+            single.add_node(name, spec.runnable)
+            single.set_entry_point(name)
+            single.add_edge(name, END)
+            compiled = single.compile()
+            results["nodes"][name] = measure(
+                lambda: compiled.invoke(node_input, context=context),
+                args.runs,
+                args.concurrency,
+            )
+
+    get_artifact_writer().flush()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Return a description of every metric that regressed beyond ``tolerance``."""
+    regressions = []
+
+    def check(
+        label: str, current: float, previous: float, higher_is_better: bool
+    ) -> None:
+        if not previous:
+            return
+        change = (current - previous) / previous
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{label}: {previous} -> {current} ({change:+.0%})")
+
+    phases = [("e2e", results["e2e"], baseline.get("e2e", {}))]
+    for name, stats in results.get("nodes", {}).items():
+        phases.append((name, stats, baseline.get("nodes", {}).get(name, {})))
+    for label, current, previous in phases:
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            check(f"{label} {key}", current[key], previous.get(key, 0), False)
+        check(
+            f"{label} runs_per_second",
+            current["runs_per_second"],
+            previous.get("runs_per_second", 0),
+            True,
+        )
+    check("peak_rss_mb", results["peak_rss_mb"], baseline.get("peak_rss_mb", 0), False)
+    return regressions
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Print a latency table for the end-to-end and per-node phases."""
+    rows = [("e2e", results["e2e"])] + list(results.get("nodes", {}).items())
+    print(
+        f"{'phase':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'runs/s':>10}{'errors':>8}"
+    )
+    for name, stats in rows:
+        print(
+            f"{name:<22}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+            f"{stats['runs_per_second']:>10}{stats['errors']:>8}"
+        )
+    print(f"peak RSS: {results['peak_rss_mb']} MiB")
+
+
+def main() -> None:
+    """Parse arguments, run the benchmark and report it."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keyword", default=DEFAULT_KEYWORD)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--nodes", action="store_true", help="also benchmark each node")
+    parser.add_argument(
+        "--search-mode", choices=["sequential", "fanout"], default="sequential"
+    )
+    parser.add_argument(
+        "--generation-mode", choices=["two_pass", "fused"], default="two_pass"
+    )
+    parser.add_argument(
+        "--warm-caches", action="store_true", help="leave caches enabled"
+    )
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--fetch-latency", type=float, default=0.15)
+    parser.add_argument("--llm-first-token-latency", type=float, default=0.5)
+    parser.add_argument("--llm-token-latency", type=float, default=0.005)
+    parser.add_argument(
+        "--host-rate", default="0", help="per-host request rate limit (0 = unlimited)"
+    )
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # Module-level settings are read at import time, so set them first.
+    os.environ["ARTIFACT_SINK"] = "memory"
+    # Every run fetches the same few fixture hosts, so the politeness rate
+    # limit would dominate the measurement unless explicitly requested.
+    os.environ["SCRAPE_HOST_RATE"] = args.host_rate
+    if not args.warm_caches:
+        os.environ["PAGE_CACHE_ENABLED"] = "0"
+        os.environ["LLM_CACHE_ENABLED"] = "0"
+        os.environ["SEARCH_CACHE_TTL"] = "0"
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run_benchmark(args)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_report(results)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
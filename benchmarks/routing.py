@@ -0,0 +1,140 @@
+"""Offline benchmark of model routing: fallback and hedging on a degraded model.
+
+Runs the graph on the fakes of ``benchmarks/pipeline.py`` with a primary fake
+model that is healthy, slow (``--slow-factor`` times the first-token latency)
+or throttled (every call fails). Each scenario is run twice: with the primary
+model alone, and routed with a healthy ``fake/backup`` as ``fallback_model``
+and ``--slo-ms`` as ``llm_first_token_slo_ms``. Runs use ``fail_fast``, so a
+failed model call counts as an error instead of producing an error article.
+
+Usage:
+    python benchmarks/routing.py --runs 20 --slo-ms 1000
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+from typing import Any, Dict
+
+from pipeline import DEFAULT_KEYWORD, measure
+
+SCENARIOS = ("healthy", "slow", "throttled")
+
+
+def run_routing(args: argparse.Namespace) -> Dict[str, Any]:
+    """Install the fakes and run every scenario with and without a fallback model."""
+    import fakes
+
+    from react_agent.artifacts import get_artifact_writer
+    from react_agent.context import Context
+    from react_agent.instrumentation import LLM_CALLS
+
+    graph_module = importlib.import_module("react_agent.graph")
+    latencies = fakes.Latencies(
+        search=args.search_latency,
+        fetch=args.fetch_latency,
+        llm_first_token=args.llm_first_token_latency,
+        llm_per_token=args.llm_token_latency,
+    )
+    fakes.install(
+        fakes.Fixtures.load(),
+        latencies,
+        {
+            "slow": {
+                "first_token_latency": args.slow_factor * args.llm_first_token_latency
+            },
+            "throttled": {"error": "ThrottlingException: Rate exceeded"},
+        },
+    )
+    inputs = {
+        "messages": [
+            {"role": "user", "content": [{"type": "text", "text": args.keyword}]}
+        ]
+    }
+
+    results: Dict[str, Any] = {
+        "config": {
+            "runs": args.runs,
+            "generation_mode": args.generation_mode,
+            "slo_ms": args.slo_ms,
+            "slow_factor": args.slow_factor,
+            "latencies": vars(latencies),
+        },
+        "scenarios": {},
+    }
+    for scenario in SCENARIOS:
+        for routed in (False, True):
+            context = Context(
+                model=f"fake/{scenario}",
+                fallback_model="fake/backup" if routed else "",
+                llm_first_token_slo_ms=args.slo_ms if routed else 0,
+                generation_mode=args.generation_mode,
+                fail_fast=True,
+            )
+            before = {
+                name: LLM_CALLS.value(name, "ok") for name in (scenario, "backup")
+            }
+            stats: Dict[str, Any] = measure(
+                lambda: graph_module.app.invoke(inputs, context=context), args.runs, 1
+            )
+            stats["ok_calls"] = {
+                name: LLM_CALLS.value(name, "ok") - count
+                for name, count in before.items()
+            }
+            label = f"{scenario}/{'routed' if routed else 'single'}"
+            results["scenarios"][label] = stats
+    get_artifact_writer().flush()
+    return results
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Print latency, errors and the model that answered for every scenario."""
+    print(f"{'scenario':<22}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}  answered by")
+    for label, stats in results["scenarios"].items():
+        answered = ", ".join(
+            f"{name}={int(n)}" for name, n in stats["ok_calls"].items() if n
+        )
+        print(
+            f"{label:<22}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['errors']:>8}"
+            f"  {answered or '-'}"
+        )
+
+
+def main() -> None:
+    """Parse arguments, run every routing scenario and report it."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keyword", default=DEFAULT_KEYWORD)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--generation-mode", choices=["two_pass", "fused"], default="two_pass"
+    )
+    parser.add_argument(
+        "--slo-ms", type=int, default=1000, help="first-token SLO when routed"
+    )
+    parser.add_argument("--slow-factor", type=float, default=5.0)
+    parser.add_argument("--search-latency", type=float, default=0.01)
+    parser.add_argument("--fetch-latency", type=float, default=0.01)
+    parser.add_argument("--llm-first-token-latency", type=float, default=0.5)
+    parser.add_argument("--llm-token-latency", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # Module-level settings are read at import time, so set them first.
+    os.environ["ARTIFACT_SINK"] = "memory"
+    os.environ["SCRAPE_HOST_RATE"] = "0"
+    os.environ["PAGE_CACHE_ENABLED"] = "0"
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+    os.environ["SEARCH_CACHE_TTL"] = "0"
+    logging.basicConfig(level=logging.ERROR)
+
+    results = run_routing(args)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
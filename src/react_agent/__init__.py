@@ -2,8 +2,24 @@
 
 This module defines a custom reasoning and action agent graph.
 It invokes tools in a simple loop.
+
+``graph``, the compiled graph, is resolved on first access, so importing the
+package or a submodule such as ``react_agent.context`` does not build it.
+Code that has imported the ``react_agent.graph`` module itself should use
+``react_agent.graph.graph`` (or ``app``) instead.
 """
 
-from react_agent.graph import graph
+from typing import Any
 
 __all__ = ["graph"]
+
+
+def __getattr__(name: str) -> Any:
+    if name == "graph":
+        from react_agent.graph import compile_graph
+
+        # Importing the submodule bound its name here; rebind the compiled
+        # graph, as the eager ``from react_agent.graph import graph`` did.
+        graph = globals()["graph"] = compile_graph()
+        return graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,176 @@
+"""Artifact sinks for the generated Markdown and HTML files.
+
+Graph nodes hand finished artifacts to a background writer and continue
+without waiting for disk I/O. The writer drains a bounded queue into a
+pluggable sink: the local ``output/`` directory by default, or an in-memory
+object-store stand-in selected with ``ARTIFACT_SINK=memory``. A node can only
+report its artifact as queued; failed writes are logged as they happen and
+returned by :meth:`BackgroundWriter.flush`, which also runs at exit.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional, Protocol, Tuple
+
+from react_agent.instrumentation import timed
+
+ARTIFACT_SINK = os.getenv("ARTIFACT_SINK", "local")
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "output")
+ARTIFACT_QUEUE_SIZE = int(os.getenv("ARTIFACT_QUEUE_SIZE", "64"))
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactSink(Protocol):
+    """Destination for artifacts, addressed by file name."""
+
+    def location(self, name: str) -> str:
+        """Return where an artifact called ``name`` is (or will be) stored."""
+        ...
+
+    def write(self, name: str, data: bytes) -> str:
+        """Store ``data`` under ``name`` and return its location."""
+        ...
+
+
+class LocalDirectorySink:
+    """Write artifacts into a local directory atomically (temp file + rename)."""
+
+    def __init__(self, root: str) -> None:
+        """Create the sink, creating ``root`` if needed."""
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def location(self, name: str) -> str:  # noqa: D102
+        return os.path.join(self.root, name)
+
+    def write(self, name: str, data: bytes) -> str:  # noqa: D102
+        path = self.location(name)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.root, prefix=f".{name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return path
+
+
+class MemoryObjectStoreSink:
+    """Keep artifacts in memory, standing in for an object store bucket."""
+
+    def __init__(self, bucket: str = "artifacts") -> None:
+        """Create an empty bucket."""
+        self.bucket = bucket
+        self.objects: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def location(self, name: str) -> str:  # noqa: D102
+        return f"memory://{self.bucket}/{name}"
+
+    def write(self, name: str, data: bytes) -> str:  # noqa: D102
+        with self._lock:
+            self.objects[name] = data
+        return self.location(name)
+
+
+class BackgroundWriter:
+    """Write artifacts to a sink from a single background thread.
+
+    ``submit`` blocks only when ``max_queue`` writes are already pending,
+    which bounds memory held by queued artifacts. Failed writes are kept until
+    the next :meth:`flush`.
+    """
+
+    def __init__(
+        self, sink: ArtifactSink, max_queue: int = ARTIFACT_QUEUE_SIZE
+    ) -> None:
+        """Start the writer thread for ``sink``."""
+        self.sink = sink
+        self._queue: queue.Queue[Tuple[str, bytes, Future[str]]] = queue.Queue(
+            max_queue
+        )
+        self._failures: Dict[str, Exception] = {}
+        self._failures_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="artifact-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, name: str, data: bytes) -> Future[str]:
+        """Queue ``data`` to be written as ``name``; the future yields its location."""
+        future: Future[str] = Future()
+        self._queue.put((name, data, future))
+        return future
+
+    def flush(self) -> Dict[str, Exception]:
+        """Block until every queued artifact has been written.
+
+        Returns the writes that failed since the last flush, as errors keyed
+        by the artifact's location.
+        """
+        self._queue.join()
+        with self._failures_lock:
+            failures, self._failures = self._failures, {}
+        return failures
+
+    def _run(self) -> None:
+        while True:
+            name, data, future = self._queue.get()
+            try:
+                with timed("write"):
+                    location = self.sink.write(name, data)
+                future.set_result(location)
+            except Exception as e:
+                logger.error("Artifact write failed for %s: %s", name, e)
+                with self._failures_lock:
+                    self._failures[self.sink.location(name)] = e
+                future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+
+_writer: Optional[BackgroundWriter] = None
+_writer_lock = threading.Lock()
+
+
+def create_sink(kind: str = ARTIFACT_SINK) -> ArtifactSink:
+    """Create the sink named by ``kind`` (``"local"`` or ``"memory"``)."""
+    if kind == "memory":
+        return MemoryObjectStoreSink()
+    if kind == "local":
+        return LocalDirectorySink(ARTIFACT_DIR)
+    raise ValueError(f"Unknown artifact sink: {kind!r}")
+
+
+def get_artifact_writer() -> BackgroundWriter:
+    """Return the process-wide background artifact writer."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BackgroundWriter(create_sink())
+            atexit.register(_flush_at_exit, _writer)
+        return _writer
+
+
+def _flush_at_exit(writer: BackgroundWriter) -> None:
+    failures = writer.flush()
+    if failures:
+        logger.error(
+            "%d artifact writes failed: %s",
+            len(failures),
+            ", ".join(f"{path} ({e})" for path, e in failures.items()),
+        )
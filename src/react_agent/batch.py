@@ -0,0 +1,283 @@
+"""Run the graph over a JSONL file of keywords with bounded concurrency.
+
+Each input line is either a JSON string or an object with a ``keyword`` field::
+
+    {"keyword": "生成式 AI 晶片"}
+    "量子運算"
+
+Results are appended to ``results.jsonl`` in the output directory as each
+keyword finishes, and that file doubles as the checkpoint: rerunning the same
+command after a crash skips keywords that already succeeded. All items run in
+one process, so they share the search cache, page cache, LLM response cache
+and model clients. Runs use ``Context.fail_fast``, so a failed model call
+fails the keyword instead of producing an error article, and a keyword only
+counts as done once its article was written. Articles are written in the
+background, so a keyword whose article write fails is recorded again as
+failed when the batch flushes the writer at the end. With ``--checkpointer``,
+each keyword runs on its own checkpointed thread, so a keyword that failed
+part-way (say, on a Bedrock error in the rewrite step) is resumed from the
+failed node on the next run instead of starting over. A ``summary.json`` and a
+``metrics.txt`` snapshot of the latency histograms (OpenMetrics text format)
+are written at the end. With ``--metrics-port`` (default ``METRICS_PORT``),
+the live metrics are also served over HTTP while the batch runs.
+
+Usage:
+    python -m react_agent.batch keywords.jsonl --output-dir batch_output --concurrency 4
+    PAGE_STORE=sqlite python -m react_agent.batch keywords.jsonl --checkpointer sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Set
+
+from react_agent.artifacts import get_artifact_writer
+from react_agent.cache import get_page_cache, get_response_cache
+from react_agent.checkpointing import (
+    create_checkpointer,
+    pending_nodes,
+    run_or_resume,
+    thread_config,
+)
+from react_agent.context import Context
+from react_agent.graph import app, compile_graph
+from react_agent.instrumentation import METRICS_PORT, serve_metrics, write_metrics_file
+from react_agent.search import search_cache
+
+RESULTS_FILE = "results.jsonl"
+SUMMARY_FILE = "summary.json"
+METRICS_FILE = "metrics.txt"
+
+logger = logging.getLogger(__name__)
+
+
+def read_keywords(path: str) -> List[str]:
+    """Read unique, non-empty keywords from a JSONL file, preserving order."""
+    keywords: Dict[str, None] = {}
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            keyword = item if isinstance(item, str) else item.get("keyword")
+            if not isinstance(keyword, str) or not keyword.strip():
+                raise ValueError(f"{path}:{line_no}: missing keyword")
+            keywords[keyword.strip()] = None
+    return list(keywords)
+
+
+def completed_keywords(results_path: str) -> Set[str]:
+    """Return keywords whose latest record in an existing results file is successful."""
+    done: Set[str] = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a torn final line from a crash
+            if record.get("status") == "ok":
+                done.add(record["keyword"])
+            else:
+                done.discard(record["keyword"])
+    return done
+
+
+def failure_reason(state: Dict[str, Any]) -> Optional[str]:
+    """Return why a finished run did not produce an article, or ``None`` if it did."""
+    if state.get("error"):
+        return str(state["error"])
+    if not state.get("output_file"):
+        return "no article was written"
+    return None
+
+
+class BatchRunner:
+    """Run keywords through a compiled graph and checkpoint each result."""
+
+    def __init__(
+        self,
+        graph: Any,
+        output_dir: str,
+        concurrency: int = 4,
+        context: Optional[Context] = None,
+    ) -> None:
+        """Create a runner writing results and the summary into ``output_dir``.
+
+        ``context`` is run with ``fail_fast`` set, whatever its own value.
+        """
+        self.graph = graph
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.context = replace(context or Context(), fail_fast=True)
+        self.results_path = os.path.join(output_dir, RESULTS_FILE)
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _record(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.results_path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def thread_id(self, keyword: str) -> str:
+        """Return the checkpoint thread for ``keyword`` in this output directory."""
+        return f"batch:{os.path.abspath(self.output_dir)}:{keyword}"
+
+    def _discard_failed_thread(self, thread_id: str) -> None:
+        # A thread that ran to the end without an article (say, a failed web
+        # search) has nothing left to resume: start it over instead.
+        if pending_nodes(self.graph, thread_id) != ():
+            return
+        if failure_reason(self.graph.get_state(thread_config(thread_id)).values):
+            self.graph.checkpointer.delete_thread(thread_id)
+
+    def run_one(self, keyword: str) -> Dict[str, Any]:
+        """Run the graph for one keyword and record the outcome."""
+        started = time.monotonic()
+        inputs = {
+            "messages": [
+                {"role": "user", "content": [{"type": "text", "text": keyword}]}
+            ]
+        }
+        try:
+            if getattr(self.graph, "checkpointer", None):
+                thread_id = self.thread_id(keyword)
+                self._discard_failed_thread(thread_id)
+                state = run_or_resume(
+                    self.graph, inputs, thread_id, context=self.context
+                )
+            else:
+                state = self.graph.invoke(inputs, context=self.context)
+            reason = failure_reason(state)
+            record = {
+                "keyword": keyword,
+                "status": "error" if reason else "ok",
+                "grade": state.get("grade"),
+                "dedup_stats": state.get("dedup_stats"),
+                "output_file": state.get("output_file"),
+                "html_file": state.get("html_file"),
+            }
+            if reason:
+                record["error"] = reason
+        except Exception as e:
+            record = {"keyword": keyword, "status": "error", "error": str(e)}
+        record["seconds"] = round(time.monotonic() - started, 3)
+        self._record(record)
+        logger.info("[%s] %s (%ss)", record["status"], keyword, record["seconds"])
+        return record
+
+    def _fail_unsaved(
+        self, records: List[Dict[str, Any]], failures: Dict[str, Exception]
+    ) -> List[Dict[str, Any]]:
+        # Artifacts are written in the background, so a keyword recorded as ok
+        # may still lose its article; record it again as failed so a rerun
+        # retries it.
+        updated = []
+        for record in records:
+            paths = (record.get("output_file"), record.get("html_file"))
+            errors = [failures[path] for path in paths if path in failures]
+            if record["status"] == "ok" and errors:
+                record = {
+                    **record,
+                    "status": "error",
+                    "error": f"artifact write failed: {errors[0]}",
+                }
+                self._record(record)
+                if getattr(self.graph, "checkpointer", None):
+                    # The thread finished; start it over rather than resume it.
+                    self.graph.checkpointer.delete_thread(
+                        self.thread_id(record["keyword"])
+                    )
+                logger.info("[error] %s: %s", record["keyword"], record["error"])
+            updated.append(record)
+        return updated
+
+    def run(self, keywords: List[str]) -> Dict[str, Any]:
+        """Run all ``keywords`` not already completed and write the summary."""
+        done = completed_keywords(self.results_path)
+        pending = [k for k in keywords if k not in done]
+        logger.info(
+            "%d keywords, %d already done, %d to run",
+            len(keywords),
+            len(done),
+            len(pending),
+        )
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            records = list(executor.map(self.run_one, pending))
+        records = self._fail_unsaved(records, get_artifact_writer().flush())
+
+        latencies = [r["seconds"] for r in records]
+        page_cache = get_page_cache()
+        response_cache = get_response_cache()
+        summary = {
+            "total": len(keywords),
+            "skipped": len(keywords) - len(pending),
+            "succeeded": sum(r["status"] == "ok" for r in records),
+            "failed": [r["keyword"] for r in records if r["status"] != "ok"],
+            "wall_seconds": round(time.monotonic() - started, 3),
+            "p50_seconds": statistics.median(latencies) if latencies else None,
+            "max_seconds": max(latencies) if latencies else None,
+            "search_cache": search_cache.stats(),
+            "page_cache": page_cache.stats() if page_cache else None,
+            "llm_cache": response_cache.stats() if response_cache else None,
+        }
+        with open(
+            os.path.join(self.output_dir, SUMMARY_FILE), "w", encoding="utf-8"
+        ) as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        write_metrics_file(os.path.join(self.output_dir, METRICS_FILE))
+        return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Run the agent over a JSONL file of keywords."
+    )
+    parser.add_argument("keywords", help="JSONL file with one keyword per line")
+    parser.add_argument("--output-dir", default="batch_output")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--checkpointer",
+        choices=["sqlite", "memory"],
+        help="checkpoint every step so failed keywords resume from the failed node",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=METRICS_PORT,
+        help="serve Prometheus metrics on this port while running (0 to disable)",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    graph = (
+        compile_graph(create_checkpointer(args.checkpointer))
+        if args.checkpointer
+        else app
+    )
+    runner = BatchRunner(graph, args.output_dir, concurrency=args.concurrency)
+    summary = runner.run(read_keywords(args.keywords))
+    sys.stdout.write(json.dumps(summary, ensure_ascii=False, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""Caches shared by all graph runs in the process."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    cast,
+)
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from react_agent.fingerprints import MinHasher, estimate_similarity, normalize_text
+
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1") not in ("0", "false", "")
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join(".cache", "react_agent"))
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", str(6 * 60 * 60)))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") not in ("0", "false", "")
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 60 * 60)))
+LLM_CACHE_NEAR_DUPLICATE = os.getenv("LLM_CACHE_NEAR_DUPLICATE", "0") not in (
+    "0",
+    "false",
+    "",
+)
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0.9"))
+
+T = TypeVar("T")
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Return a canonical form of ``url`` for use as a cache key.
+
+    Lowercases scheme and host, drops default ports, fragments and common
+    tracking parameters, and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    """A cached page and the validators needed to revalidate it."""
+
+    url: str
+    content: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        """Whether the entry is still within the cache TTL."""
+        return time.time() - self.fetched_at < PAGE_CACHE_TTL
+
+    def validators(self) -> Dict[str, str]:
+        """Return conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """On-disk cache of extracted page text, keyed by normalized URL.
+
+    Entries are stored in a single SQLite file under ``directory``. Entries
+    older than the TTL are kept as long as they fit in the byte budget so
+    they can be revalidated with ``ETag``/``Last-Modified``; the least
+    recently used entries are evicted once the budget is exceeded.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        """Open (or create) the cache database in ``directory``."""
+        os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, "pages.sqlite3"), check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY, url TEXT, content TEXT, etag TEXT,"
+            " last_modified TEXT, fetched_at REAL, last_access REAL, size INTEGER)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)"
+        )
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(url: str) -> str:
+        """Return the content-address of ``url``."""
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Return the cached entry for ``url``, fresh or stale, if any."""
+        key = self.key(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, content, etag, last_modified, fetched_at"
+                " FROM pages WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE pages SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._db.commit()
+            page = CachedPage(*row)
+            if page.is_fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return page
+
+    def put(
+        self,
+        url: str,
+        content: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Store the extracted ``content`` of ``url`` and evict to the budget."""
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(url), url, content, etag, last_modified, now, now, size),
+            )
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, url: str) -> None:
+        """Mark a stale entry as fresh after a ``304 Not Modified`` response."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET fetched_at = ?, last_access = ? WHERE key = ?",
+                (now, now, self.key(url)),
+            )
+            self._db.commit()
+            self.revalidations += 1
+
+    def _evict(self) -> None:
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM pages"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute(
+            "SELECT key, size FROM pages ORDER BY last_access"
+        ).fetchall():
+            self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current cache size."""
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": size,
+            }
+
+
+_page_cache: Optional[PageCache] = None
+_singletons_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the process-wide page cache, or ``None`` if it is disabled."""
+    global _page_cache
+    if not PAGE_CACHE_ENABLED:
+        return None
+    with _singletons_lock:
+        if _page_cache is None:
+            _page_cache = PageCache(PAGE_CACHE_DIR, PAGE_CACHE_MAX_BYTES)
+        return _page_cache
+
+
+class TTLCache(Generic[T]):
+    """A thread-safe in-memory LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """Create a cache holding at most ``maxsize`` entries."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, Tuple[float, T]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """Return the live value for ``key``, or ``None``."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: T) -> None:
+        """Store ``value`` under ``key``, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._data),
+            }
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block on the same result (or exception) instead of repeating it.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty in-flight table."""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future[Any]] = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run ``fn`` for ``key`` unless an identical call is already running."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return cast(T, future.result())
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+@dataclass
+class _Response:
+    scope: Tuple[str, str, str]
+    text: str
+    expires_at: float
+    signature: Optional[Tuple[int, ...]]
+
+
+class ResponseCache:
+    """In-memory cache of LLM responses keyed by model, prompt version and input.
+
+    Exact lookups hash the normalized input text. With ``near_duplicate``
+    enabled, inputs are also MinHashed and indexed with locality-sensitive
+    hashing, so an input whose estimated Jaccard similarity to a cached one
+    is at least ``threshold`` reuses that response. Matches never cross model,
+    prompt version or ``scope`` boundaries.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        near_duplicate: bool = False,
+        threshold: float = 0.9,
+        bands: int = 16,
+    ) -> None:
+        """Create a cache holding at most ``maxsize`` responses for ``ttl`` seconds."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.near_duplicate = near_duplicate
+        self.threshold = threshold
+        self._hasher = MinHasher() if near_duplicate else None
+        self._bands = bands
+        self._entries: OrderedDict[str, _Response] = OrderedDict()
+        self._index: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(scope: Tuple[str, str, str], text: str) -> str:
+        raw = "\x1f".join((*scope, normalize_text(text)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _band_keys(
+        self, signature: Tuple[int, ...]
+    ) -> List[Tuple[int, Tuple[int, ...]]]:
+        rows = max(1, len(signature) // self._bands)
+        return [
+            (band, signature[band * rows : (band + 1) * rows])
+            for band in range(len(signature) // rows)
+        ]
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        if entry.signature is not None:
+            for band_key in self._band_keys(entry.signature):
+                bucket = self._index.get(band_key)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._index[band_key]
+
+    def get(
+        self, model_id: str, prompt_version: str, text: str, scope: str = ""
+    ) -> Optional[str]:
+        """Return the cached response for ``text``, or ``None``."""
+        full_scope = (model_id, prompt_version, scope)
+        key = self._key(full_scope, text)
+        signature = self._hasher.signature(text) if self._hasher else None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < now:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.text
+            if signature is not None:
+                candidates: Set[str] = set()
+                for band_key in self._band_keys(signature):
+                    candidates |= self._index.get(band_key, set())
+                best: Optional[Tuple[float, str]] = None
+                for candidate in candidates:
+                    entry = self._entries[candidate]
+                    if entry.scope != full_scope or entry.expires_at < now:
+                        continue
+                    assert entry.signature is not None
+                    similarity = estimate_similarity(signature, entry.signature)
+                    if similarity >= self.threshold and (
+                        best is None or similarity > best[0]
+                    ):
+                        best = (similarity, candidate)
+                if best is not None:
+                    self._entries.move_to_end(best[1])
+                    self.near_hits += 1
+                    return self._entries[best[1]].text
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        model_id: str,
+        prompt_version: str,
+        text: str,
+        response: str,
+        scope: str = "",
+    ) -> None:
+        """Cache ``response`` for ``text``, evicting least recently used entries."""
+        full_scope = (model_id, prompt_version, scope)
+        key = self._key(full_scope, text)
+        signature = self._hasher.signature(text) if self._hasher else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Response(
+                full_scope, response, time.monotonic() + self.ttl, signature
+            )
+            if signature is not None:
+                for band_key in self._band_keys(signature):
+                    self._index.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide LLM response cache, or ``None`` if it is disabled."""
+    global _response_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _singletons_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                LLM_CACHE_SIZE,
+                LLM_CACHE_TTL,
+                near_duplicate=LLM_CACHE_NEAR_DUPLICATE,
+                threshold=LLM_CACHE_SIMILARITY,
+            )
+        return _response_cache
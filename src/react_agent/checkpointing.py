@@ -0,0 +1,147 @@
+"""Durable checkpoints and resume-from-node for graph runs.
+
+A graph compiled with a checkpointer saves its state after every step under a
+``thread_id``. When a node raises, the state from before the failing step is
+kept, along with the outputs of any parallel nodes in that step that did
+succeed. :func:`resume` continues the thread from there. Only the failed node
+runs again, so the search, scrape and analysis already paid for are reused.
+
+``CHECKPOINTER=memory`` (the default) keeps checkpoints for the lifetime of
+the process. ``CHECKPOINTER=sqlite`` keeps them in ``CHECKPOINT_DB``, so a run
+can be resumed from another process. This needs the optional ``checkpoint``
+extra (``langgraph-checkpoint-sqlite``). Page bodies live outside the
+checkpoint, in :mod:`react_agent.pagestore`, so such runs should also set
+``PAGE_STORE=sqlite``.
+
+Nodes that call the LLM normally turn a failure into an error article and
+finish the run. Set ``Context.fail_fast`` so they raise instead and leave the
+thread resumable.
+
+The exported ``react_agent.graph.app`` has no checkpointer. The LangGraph
+server, including the offline in-memory dev server (``langgraph dev``),
+attaches its own. To resume a failed thread there, start a new run on the
+same thread with no input.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, Optional, Tuple, cast
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+from react_agent.cache import PAGE_CACHE_DIR
+from react_agent.context import Context
+from react_agent.pagestore import PAGE_STORE
+
+CHECKPOINTER = os.getenv("CHECKPOINTER", "memory")
+CHECKPOINT_DB = os.getenv(
+    "CHECKPOINT_DB", os.path.join(PAGE_CACHE_DIR, "checkpoints.sqlite3")
+)
+
+logger = logging.getLogger(__name__)
+
+
+def create_checkpointer(
+    kind: str = CHECKPOINTER, path: str = CHECKPOINT_DB
+) -> BaseCheckpointSaver[Any]:
+    """Create the checkpointer named by ``kind`` (``"sqlite"`` or ``"memory"``).
+
+    Raises:
+        ImportError: ``kind`` is ``"sqlite"`` and the ``checkpoint`` extra is
+            not installed.
+    """
+    if kind == "memory":
+        return InMemorySaver()
+    if kind != "sqlite":
+        raise ValueError(f"Unknown checkpointer: {kind!r}")
+    try:
+        from langgraph.checkpoint.sqlite import (  # type: ignore[import-not-found, unused-ignore]
+            SqliteSaver,
+        )
+    except ImportError as e:
+        raise ImportError(
+            "CHECKPOINTER=sqlite needs langgraph-checkpoint-sqlite; "
+            "install it with `pip install 'react-agent[checkpoint]'`"
+        ) from e
+    if PAGE_STORE == "memory":
+        logger.warning(
+            "Durable checkpoints with PAGE_STORE=memory: runs resumed in another "
+            "process will not find their scraped pages. Set PAGE_STORE=sqlite."
+        )
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    saver = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    saver.setup()
+    return cast("BaseCheckpointSaver[Any]", saver)
+
+
+def thread_config(
+    thread_id: str, checkpoint_id: Optional[str] = None
+) -> RunnableConfig:
+    """Return the run config addressing ``thread_id`` (at ``checkpoint_id``, if given)."""
+    configurable = {"thread_id": thread_id}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def pending_nodes(graph: Any, thread_id: str) -> Optional[Tuple[str, ...]]:
+    """Return the nodes ``thread_id`` would run next.
+
+    Returns ``None`` for a thread with no checkpoint and an empty tuple for a
+    thread that ran to the end.
+    """
+    snapshot = graph.get_state(thread_config(thread_id))
+    if not snapshot.created_at:
+        return None
+    return cast(Tuple[str, ...], snapshot.next)
+
+
+def resume(
+    graph: Any,
+    thread_id: str,
+    context: Optional[Context] = None,
+    checkpoint_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Continue ``thread_id`` from its last successful step and return the final state.
+
+    With ``checkpoint_id``, the run restarts from that earlier checkpoint
+    instead, forking the thread's history. Pass the same ``context`` as the
+    original run: it is not stored in the checkpoint.
+
+    Raises:
+        ValueError: The thread has no checkpoint.
+    """
+    if pending_nodes(graph, thread_id) is None:
+        raise ValueError(f"No checkpoint for thread {thread_id!r}")
+    config = thread_config(thread_id, checkpoint_id)
+    snapshot = graph.get_state(config)
+    if not snapshot.next:
+        return cast(Dict[str, Any], snapshot.values)
+    logger.info("Resuming thread %s at %s", thread_id, ", ".join(snapshot.next))
+    return cast(Dict[str, Any], graph.invoke(None, config=config, context=context))
+
+
+def run_or_resume(
+    graph: Any,
+    inputs: Dict[str, Any],
+    thread_id: str,
+    context: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Start ``thread_id`` with ``inputs``, or resume it if it already has a checkpoint.
+
+    A thread that already ran to the end returns its final state without
+    running again.
+    """
+    if pending_nodes(graph, thread_id) is None:
+        return cast(
+            Dict[str, Any],
+            graph.invoke(inputs, config=thread_config(thread_id), context=context),
+        )
+    return resume(graph, thread_id, context=context)
@@ -6,6 +6,8 @@ import os
 from dataclasses import dataclass, field, fields
 from typing import Annotated
 
+from langgraph.runtime import get_runtime
+
 from . import prompts
 
 
@@ -22,13 +24,38 @@ class Context:
     )
 
     model: Annotated[str, {"__template_metadata__": {"kind": "llm"}}] = field(
-        default="bedrock/anthropic.claude-3-5-sonnet-20241022-v2:0",
+        default=f"bedrock/{os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-5-sonnet-20241022-v2:0')}",
         metadata={
             "description": "The name of the language model to use for the agent's main interactions. "
             "Should be in the form: provider/model-name. For AWS Bedrock use bedrock/model-id."
         },
     )
 
+    fast_model: Annotated[str, {"__template_metadata__": {"kind": "llm"}}] = field(
+        default="",
+        metadata={
+            "description": "Model for the lighter steps (the analysis summary), in the form "
+            "provider/model-name. Empty uses `model`, which stays their fallback."
+        },
+    )
+
+    fallback_model: Annotated[str, {"__template_metadata__": {"kind": "llm"}}] = field(
+        default="",
+        metadata={
+            "description": "Model to fall back to when the preferred model fails or is too slow, "
+            "in the form provider/model-name. Empty disables fallback for the main steps."
+        },
+    )
+
+    llm_first_token_slo_ms: int = field(
+        default=0,
+        metadata={
+            "description": "Time-to-first-token objective in milliseconds. A call that has not "
+            "started answering by then is hedged to the next model of its tier, and models whose "
+            "recent p95 exceeds it are tried last. 0 disables hedging."
+        },
+    )
+
     max_search_results: int = field(
         default=10,
         metadata={
@@ -36,6 +63,56 @@ class Context:
         },
     )
 
+    search_mode: str = field(
+        default="sequential",
+        metadata={
+            "description": "'sequential' searches the keyword and refines it in a second "
+            "round if the content grades poorly; 'fanout' searches the keyword and its "
+            "refined variants in parallel and fuses the results before scraping."
+        },
+    )
+
+    scrape_early_exit: bool = field(
+        default=False,
+        metadata={
+            "description": "Grade pages as they arrive and stop scraping as soon as "
+            "the content is good enough to analyze, cancelling outstanding fetches."
+        },
+    )
+
+    generation_mode: str = field(
+        default="two_pass",
+        metadata={
+            "description": "How the article is generated. 'two_pass' analyzes the content "
+            "and then rewrites it in a second LLM call; 'fused' produces the analysis "
+            "and the article together in a single structured-output call."
+        },
+    )
+
+    analysis_token_budget: int = field(
+        default=0,
+        metadata={
+            "description": "Token budget for scraped text in the analysis prompt. "
+            "0 uses the default budget for the analysis model."
+        },
+    )
+
+    rewrite_token_budget: int = field(
+        default=0,
+        metadata={
+            "description": "Token budget for reference text in the rewrite prompt. "
+            "0 uses the default budget for the rewrite model."
+        },
+    )
+
+    fail_fast: bool = field(
+        default=False,
+        metadata={
+            "description": "Raise LLM failures instead of writing an error article. "
+            "With a checkpointer, the failed run can then be resumed from the failed node."
+        },
+    )
+
     def __post_init__(self) -> None:
         """Fetch env vars for attributes that were not passed as args."""
         for f in fields(self):
@@ -43,4 +120,23 @@ class Context:
                 continue
 
             if getattr(self, f.name) == f.default:
-                setattr(self, f.name, os.environ.get(f.name.upper(), f.default))
+                value = os.environ.get(f.name.upper(), f.default)
+                if isinstance(f.default, bool) and isinstance(value, str):
+                    value = value.lower() in ("1", "true", "yes")
+                elif isinstance(f.default, int) and isinstance(value, str):
+                    value = int(value)
+                setattr(self, f.name, value)
+
+
+def get_context() -> Context:
+    """Return the context of the current graph run.
+
+    Falls back to a default ``Context`` (which still honors environment
+    variables) when the run was started without one, or outside a run.
+    """
+    try:
+        runtime = get_runtime(Context)
+    except RuntimeError:
+        runtime = None
+    context = runtime.context if runtime is not None else None
+    return context if context is not None else Context()
@@ -0,0 +1,103 @@
+"""Cross-page de-duplication of scraped content.
+
+Search results often include syndicated copies of one article, and sites
+repeat the same boilerplate sentences (subscription prompts, copyright lines,
+bylines) on every page. Before grading, near-duplicate pages are dropped
+using bottom-k MinHash sketches of their text, and sentences already seen on
+an earlier page, or earlier on the same page, are removed. Pages keep their
+search-rank order, so the first copy of anything is the one kept.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Set, Tuple
+
+from react_agent.fingerprints import bottom_k_sketch, normalize_text, sketch_similarity
+from react_agent.grading import is_error
+from react_agent.instrumentation import DEDUP_SAVED_BYTES, DEDUP_SAVED_TOKENS
+from react_agent.packing import estimate_tokens
+
+PAGE_SKETCH_SIZE = 128
+PAGE_DUPLICATE_SIMILARITY = 0.8
+# Shorter sentences ("是的。", "更多新聞") are too common to treat as repeats.
+MIN_REPEATED_SENTENCE_CHARS = 12
+
+_SENTENCE = re.compile(r".+?(?:[。！？；]+|[!?.;]+(?:\s+|$)|$)", re.S)
+
+
+@dataclass
+class DedupStats:
+    """What one de-duplication pass removed."""
+
+    pages_in: int = 0
+    duplicate_pages: int = 0
+    repeated_sentences: int = 0
+    bytes_saved: int = 0
+    tokens_saved: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """Return the stats as a plain dict, for graph state and logs."""
+        return asdict(self)
+
+
+def _remove_seen_sentences(text: str, seen: Set[str]) -> Tuple[str, List[str]]:
+    """Drop sentences of ``text`` already in ``seen``, adding the rest to it.
+
+    Returns the remaining text and the removed sentences.
+    """
+    kept: List[str] = []
+    removed: List[str] = []
+    for match in _SENTENCE.finditer(text):
+        sentence = match.group()
+        key = normalize_text(sentence)
+        if len(key) >= MIN_REPEATED_SENTENCE_CHARS:
+            if key in seen:
+                removed.append(sentence)
+                continue
+            seen.add(key)
+        kept.append(sentence)
+    return "".join(kept).strip(), removed
+
+
+def dedupe_pages(
+    pages: List[Dict[str, str]], record_metrics: bool = True
+) -> Tuple[List[Dict[str, str]], DedupStats]:
+    """Remove near-duplicate pages and repeated sentences from scraped ``pages``.
+
+    Failed fetches are passed through untouched. Returns the remaining pages
+    in their original order and the :class:`DedupStats` of the pass. Pass
+    ``record_metrics=False`` for trial passes, such as the early-exit check
+    while scraping, so only the final pass of a run is counted in the
+    savings histograms.
+    """
+    stats = DedupStats(pages_in=len(pages))
+    kept_sketches: List[Tuple[int, ...]] = []
+    seen_sentences: Set[str] = set()
+    result: List[Dict[str, str]] = []
+    dropped: List[str] = []
+    for page in pages:
+        if is_error(page):
+            result.append(page)
+            continue
+        content = page["content"]
+        sketch = bottom_k_sketch(content, k=PAGE_SKETCH_SIZE)
+        if any(
+            sketch_similarity(sketch, other) >= PAGE_DUPLICATE_SIMILARITY
+            for other in kept_sketches
+        ):
+            stats.duplicate_pages += 1
+            dropped.append(content)
+            continue
+        kept_sketches.append(sketch)
+        deduped, removed = _remove_seen_sentences(content, seen_sentences)
+        stats.repeated_sentences += len(removed)
+        dropped.extend(removed)
+        result.append({**page, "content": deduped})
+    stats.bytes_saved = sum(len(text.encode("utf-8")) for text in dropped)
+    stats.tokens_saved = sum(estimate_tokens(text) for text in dropped)
+    if record_metrics:
+        DEDUP_SAVED_BYTES.observe(stats.bytes_saved)
+        DEDUP_SAVED_TOKENS.observe(stats.tokens_saved)
+    return result, stats
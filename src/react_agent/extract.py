@@ -0,0 +1,317 @@
+"""Incremental text extraction for scraped pages.
+
+The HTML extractor is fed decoded chunks as they arrive from the network and
+keeps only visible body text, so a page never has to be held in memory as a
+full document tree. Script, style and navigation boilerplate are dropped, and
+extraction stops as soon as enough text has been collected.
+
+:func:`extract_document` picks the extractor from the response's
+Content-Type (or, when that is missing or generic, from the first bytes of
+the body): HTML, plain text, or PDF when the optional ``pypdf`` package is
+installed. Anything else is rejected with :class:`UnsupportedContent` before
+more than the first kilobyte or so has been read.
+"""
+
+from __future__ import annotations
+
+import codecs
+import io
+import itertools
+import re
+import time
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from react_agent.instrumentation import STEP_SECONDS
+
+HTML_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+TEXT_TYPES = frozenset({"text/plain", "text/markdown"})
+PDF_TYPES = frozenset({"application/pdf", "application/x-pdf"})
+# Content types that say nothing about the body, so it is sniffed instead.
+GENERIC_TYPES = frozenset({"", "application/octet-stream", "binary/octet-stream"})
+SNIFF_BYTES = 1024
+
+_CHARSET = re.compile(rb"""charset\s*=\s*["']?([A-Za-z0-9._:-]+)""", re.I)
+_META = re.compile(rb"<meta[^>]+charset[^>]*>", re.I)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+SKIP_TAGS = frozenset(
+    {
+        "script",
+        "style",
+        "noscript",
+        "template",
+        "svg",
+        "canvas",
+        "iframe",
+        "nav",
+        "footer",
+        "aside",
+        "button",
+        "select",
+    }
+)
+# A <header> is site boilerplate, except inside the content, where it holds
+# the headline (``<article><header><h1>``).
+CONTENT_TAGS = frozenset({"article", "main"})
+
+
+class TextExtractor(HTMLParser):
+    """Collect visible text from HTML fed incrementally via :meth:`feed`."""
+
+    def __init__(self, max_chars: int) -> None:
+        """Create an extractor that stops after ``max_chars`` characters."""
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._skip_depth = 0
+        self._content_depth = 0
+        self._pending: List[str] = []
+        self._parts: List[str] = []
+        self._chars = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:  # noqa: D102
+        self._flush()
+        if self._skips(tag):
+            self._skip_depth += 1
+        if tag in CONTENT_TAGS:
+            self._content_depth += 1
+
+    def handle_startendtag(  # noqa: D102
+        self, tag: str, attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        # Self-closing elements have no content to skip.
+        self._flush()
+
+    def handle_endtag(self, tag: str) -> None:  # noqa: D102
+        self._flush()
+        if tag in CONTENT_TAGS and self._content_depth:
+            self._content_depth -= 1
+        if self._skips(tag) and self._skip_depth:
+            self._skip_depth -= 1
+
+    def _skips(self, tag: str) -> bool:
+        return tag in SKIP_TAGS or (tag == "header" and not self._content_depth)
+
+    def handle_data(self, data: str) -> None:  # noqa: D102
+        # A text node may arrive in several pieces when it spans chunks, so
+        # buffer it until the next tag instead of splitting words apart.
+        if not self._skip_depth and not self.done:
+            self._pending.append(data)
+
+    def close(self) -> None:  # noqa: D102
+        super().close()
+        self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        text = " ".join("".join(self._pending).split())
+        self._pending.clear()
+        if not text:
+            return
+        self._parts.append(text)
+        self._chars += len(text) + 1
+        if self._chars >= self.max_chars:
+            self.done = True
+
+    def text(self) -> str:
+        """Return the text collected so far, joined by single spaces."""
+        return " ".join(self._parts)[: self.max_chars]
+
+
+class UnsupportedContent(ValueError):
+    """Raised for responses that should not be extracted (binary, too large)."""
+
+
+def media_type(content_type: str) -> str:
+    """Return the lower-cased media type of a Content-Type header value."""
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def sniff_encoding(content_type: str, head: bytes) -> str:
+    """Pick the text encoding of a response cheaply.
+
+    Checks, in order: the Content-Type ``charset`` parameter, a byte order
+    mark, and a ``<meta charset>`` / ``http-equiv`` declaration in the first
+    ``SNIFF_BYTES`` of ``head``. Falls back to UTF-8 rather than the
+    ISO-8859-1 that HTTP defaults imply, since that is what most pages use.
+    """
+    declared = _CHARSET.search(content_type.encode("latin-1", "replace"))
+    if declared:
+        return _valid_encoding(declared.group(1).decode("ascii"))
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    meta = _META.search(head[:SNIFF_BYTES])
+    if meta:
+        declared = _CHARSET.search(meta.group())
+        if declared:
+            return _valid_encoding(declared.group(1).decode("ascii"))
+    return "utf-8"
+
+
+def _valid_encoding(name: str) -> str:
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return "utf-8"
+
+
+def sniff_kind(content_type: str, head: bytes) -> Optional[str]:
+    """Classify a response as ``"html"``, ``"text"`` or ``"pdf"``, or ``None`` to skip it."""
+    kind = media_type(content_type)
+    if kind in HTML_TYPES:
+        return "html"
+    if kind in TEXT_TYPES:
+        return "text"
+    if kind in PDF_TYPES:
+        return "pdf"
+    if kind not in GENERIC_TYPES:
+        return None
+    start = head[:SNIFF_BYTES]
+    if start.startswith(codecs.BOM_UTF8):
+        start = start[len(codecs.BOM_UTF8) :]
+    start = start.lstrip().lower()
+    if start.startswith(b"%pdf-"):
+        return "pdf"
+    if b"\x00" in start:
+        return None
+    if start.startswith((b"<!doctype html", b"<html", b"<head", b"<body")):
+        return "html"
+    return "text"
+
+
+def extract_text(
+    chunks: Iterable[bytes], encoding: str, max_bytes: int, max_chars: int
+) -> str:
+    """Extract visible text from a stream of HTML byte ``chunks``.
+
+    Stops reading once ``max_bytes`` have been consumed or ``max_chars`` of
+    text have been collected, whichever comes first. Undecodable bytes are
+    replaced rather than raising. Only time spent decoding and parsing is
+    recorded as the ``extract`` step, not time waiting on ``chunks``.
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parser = TextExtractor(max_chars)
+    consumed = 0
+    busy = 0.0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        started = time.perf_counter()
+        chunk = chunk[: max_bytes - consumed]
+        consumed += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        busy += time.perf_counter() - started
+        if parser.done or consumed >= max_bytes:
+            break
+    else:
+        parser.feed(decoder.decode(b"", final=True))
+    started = time.perf_counter()
+    parser.close()
+    text = parser.text()
+    STEP_SECONDS.observe(busy + time.perf_counter() - started, "extract")
+    return text
+
+
+def extract_plain_text(
+    chunks: Iterable[bytes], encoding: str, max_bytes: int, max_chars: int
+) -> str:
+    """Decode plain text ``chunks``, collapsing whitespace, up to the same limits."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parts: List[str] = []
+    consumed = chars = 0
+    for chunk in chunks:
+        chunk = chunk[: max_bytes - consumed]
+        consumed += len(chunk)
+        parts.append(decoder.decode(chunk))
+        chars += len(parts[-1])
+        # Collapsing whitespace shrinks the text, so read some slack past
+        # max_chars before stopping.
+        if chars >= 2 * max_chars or consumed >= max_bytes:
+            break
+    else:
+        parts.append(decoder.decode(b"", final=True))
+    return " ".join("".join(parts).split())[:max_chars]
+
+
+def extract_pdf_text(chunks: Iterable[bytes], max_bytes: int, max_chars: int) -> str:
+    """Extract the text of a PDF of at most ``max_bytes`` using ``pypdf``.
+
+    Unlike HTML a PDF cannot be parsed from a prefix, so a larger document is
+    rejected instead of truncated. Pages are extracted only until
+    ``max_chars`` of text have been collected.
+    """
+    try:
+        from pypdf import PdfReader  # type: ignore[import-not-found, unused-ignore]
+    except ImportError:
+        raise UnsupportedContent(
+            "PDF extraction needs the optional 'pypdf' package"
+        ) from None
+    buffer = io.BytesIO()
+    for chunk in chunks:
+        if buffer.tell() + len(chunk) > max_bytes:
+            raise UnsupportedContent(f"PDF larger than {max_bytes} bytes")
+        buffer.write(chunk)
+    started = time.perf_counter()
+    parts: List[str] = []
+    chars = 0
+    for page in PdfReader(buffer).pages:
+        text = " ".join((page.extract_text() or "").split())
+        if text:
+            parts.append(text)
+            chars += len(text) + 1
+        if chars >= max_chars:
+            break
+    STEP_SECONDS.observe(time.perf_counter() - started, "extract")
+    return " ".join(parts)[:max_chars]
+
+
+def extract_document(
+    chunks: Iterable[bytes],
+    content_type: str,
+    content_length: Optional[int],
+    max_bytes: int,
+    max_pdf_bytes: int,
+    max_chars: int,
+) -> str:
+    """Extract text from a response body with the extractor its type calls for.
+
+    Only the first ``SNIFF_BYTES`` are read before choosing: binary and unknown
+    types, and PDFs whose ``content_length`` already exceeds
+    ``max_pdf_bytes``, raise :class:`UnsupportedContent` without reading
+    further. HTML and plain text are read up to ``max_bytes``.
+    """
+    if media_type(content_type) in PDF_TYPES and (content_length or 0) > max_pdf_bytes:
+        raise UnsupportedContent(
+            f"PDF of {content_length} bytes exceeds {max_pdf_bytes}"
+        )
+    stream: Iterator[bytes] = iter(chunks)
+    head_chunks: List[bytes] = []
+    head_size = 0
+    for chunk in stream:
+        head_chunks.append(chunk)
+        head_size += len(chunk)
+        if head_size >= SNIFF_BYTES:
+            break
+    head = b"".join(head_chunks)
+    kind = sniff_kind(content_type, head)
+    if kind is None:
+        raise UnsupportedContent(
+            f"unsupported content type {media_type(content_type)!r}"
+        )
+    body = itertools.chain([head], stream)
+    if kind == "pdf":
+        return extract_pdf_text(body, max_pdf_bytes, max_chars)
+    encoding = sniff_encoding(content_type, head)
+    if kind == "text":
+        return extract_plain_text(body, encoding, max_bytes, max_chars)
+    return extract_text(body, encoding, max_bytes, max_chars)
@@ -0,0 +1,88 @@
+"""Text fingerprints for near-duplicate detection.
+
+Shingles are overlapping character n-grams of the normalized text, which works
+for CJK text without a word segmenter as well as for space-delimited languages.
+"""
+
+from __future__ import annotations
+
+import heapq
+import random
+import zlib
+from typing import List, Set, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold ``text`` and collapse all whitespace runs to single spaces."""
+    return " ".join(text.casefold().split())
+
+
+def shingles(text: str, k: int = 5) -> Set[int]:
+    """Return the set of hashed character ``k``-grams of normalized ``text``."""
+    text = normalize_text(text)
+    if len(text) <= k:
+        return {zlib.crc32(text.encode("utf-8"))} if text else set()
+    return {
+        zlib.crc32(text[i : i + k].encode("utf-8")) for i in range(len(text) - k + 1)
+    }
+
+
+class MinHasher:
+    """Compute fixed-length MinHash signatures over text shingles.
+
+    Two signatures agree in each position with probability equal to the
+    Jaccard similarity of the underlying shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 64, k: int = 5, seed: int = 1) -> None:
+        """Create a hasher with ``num_perm`` permutations over ``k``-shingles."""
+        rng = random.Random(seed)
+        self.k = k
+        self._perms: List[Tuple[int, int]] = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    @property
+    def num_perm(self) -> int:
+        """The signature length."""
+        return len(self._perms)
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """Return the MinHash signature of ``text``."""
+        hashes = shingles(text, self.k)
+        if not hashes:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+
+def estimate_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of two MinHash signatures."""
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def bottom_k_sketch(text: str, k: int = 32, shingle_size: int = 5) -> Tuple[int, ...]:
+    """Return the ``k`` smallest shingle hashes of ``text``, sorted.
+
+    A cheaper alternative to :class:`MinHasher` for short texts: it needs one
+    hash per shingle instead of one per shingle and permutation.
+    """
+    return tuple(sorted(heapq.nsmallest(k, shingles(text, shingle_size))))
+
+
+def sketch_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of two bottom-k sketches."""
+    if not a or not b:
+        return 0.0
+    k = max(len(a), len(b))
+    union = heapq.nsmallest(k, set(a) | set(b))
+    shared = set(a) & set(b)
+    return sum(h in shared for h in union) / len(union)
@@ -0,0 +1,37 @@
+"""Quality checks deciding whether scraped content is good enough to analyze."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable
+
+from react_agent.scoring import PAGE_RELEVANCE_THRESHOLD, page_relevance, split_passages
+
+MIN_CONTENT_CHARS = 1500
+
+
+def is_error(page: Dict[str, str]) -> bool:
+    """Return whether ``page`` is a failed fetch rather than real content."""
+    return page["content"].startswith("Error:")
+
+
+def grade_pages(pages: Iterable[Dict[str, str]], keyword: str) -> str:
+    """Grade scraped ``pages`` as ``"good"`` or ``"bad"`` for ``keyword``.
+
+    Each successfully fetched page is scored with BM25 over its passages (see
+    :mod:`react_agent.scoring`). Content is good when the pages whose best
+    passage reaches ``PAGE_RELEVANCE_THRESHOLD`` hold at least
+    ``MIN_CONTENT_CHARS`` characters between them.
+    """
+    contents = [page["content"] for page in pages if not is_error(page)]
+    passages = [
+        (i, text)
+        for i, content in enumerate(contents)
+        for text in split_passages(content)
+    ]
+    _, page_scores = page_relevance(passages, len(contents), keyword)
+    relevant_chars = sum(
+        len(content) + 1
+        for content, score in zip(contents, page_scores)
+        if score >= PAGE_RELEVANCE_THRESHOLD
+    )
+    return "good" if relevant_chars >= MIN_CONTENT_CHARS else "bad"
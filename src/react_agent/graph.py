@@ -1,41 +1,124 @@
+"""The research agent graph: search, scrape, grade, analyze, rewrite and save."""
+
+import asyncio
+import functools
+import json
+import logging
 import os
-from typing import List, Dict, TypedDict
 from datetime import datetime
-import markdown
+from typing import (
+    Annotated,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypedDict,
+    Union,
+    cast,
+)
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AnyMessage, BaseMessageChunk
+from langchain_core.runnables import Runnable, RunnableLambda
 
 # LangGraph and related imports
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.config import get_config, get_stream_writer
+from langgraph.graph import END, StateGraph, add_messages
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Send
+
+from react_agent.artifacts import get_artifact_writer
+from react_agent.cache import get_response_cache
+from react_agent.context import Context, get_context
+from react_agent.dedup import dedupe_pages
+from react_agent.grading import grade_pages, is_error
+from react_agent.instrumentation import (
+    instrument_node,
+    record_cache,
+    record_llm_usage,
+    timed,
+)
+from react_agent.packing import pack_pages
+from react_agent.pagestore import PageRef, load_pages, store_pages
+from react_agent.prompts import (
+    ANALYSIS_PROMPT,
+    ANALYSIS_PROMPT_VERSION,
+    GENERATE_ARTICLE_PROMPT,
+    GENERATE_ARTICLE_PROMPT_VERSION,
+    REWRITE_PROMPT,
+    REWRITE_PROMPT_VERSION,
+)
+from react_agent.rendering import (
+    IncrementalMarkdownRenderer,
+    render_markdown,
+    render_page,
+)
+from react_agent.routing import Route, get_router, model_id
+from react_agent.scraper import ascrape_urls, scrape_urls
+from react_agent.search import (
+    REFINED_QUERY_TEMPLATES,
+    asearch_urls,
+    fuse_rankings,
+    query_variants,
+    search_urls,
+)
+
+SEARCH_MAX_RESULTS = 5
 
-# AWS Bedrock LLM import
-from langchain_aws import ChatBedrock
+logger = logging.getLogger(__name__)
 
-# Public libraries for web search and scraping
-from ddgs.ddgs import DDGS
-import requests
-from bs4 import BeautifulSoup
+SearchBatch = Dict[str, Any]
+
+def merge_search_batches(
+    left: Optional[List[SearchBatch]], right: Optional[List[SearchBatch]]
+) -> List[SearchBatch]:
+    """Reducer for fan-out search results; a ``None`` update clears the list."""
+    if right is None:
+        return []
+    return (left or []) + right
 
 # 1. 定義 Graph State
+# 狀態只保存小型欄位: 訊息以 add_messages 累加, 頁面內文存放於 pagestore 並以 ID 引用
 class GraphState(TypedDict, total=False):
-    messages: List
+    """State passed between the nodes of the graph."""
+
+    messages: Annotated[Sequence[AnyMessage], add_messages]
     keyword: str
     original_keyword: str
     search_attempts: int
     urls: List[str]
-    scraped_content: List[Dict[str, str]]
+    search_batches: Annotated[Optional[List[SearchBatch]], merge_search_batches]
+    page_refs: List[PageRef]
+    dedup_stats: Dict[str, int]
     grade: str
     analysis: str
     rewritten_content: str
     output_file: str
     html_file: str
-    file_saved: bool
+    file_saved: Optional[bool]  # None: 已排入背景寫入佇列, 尚未確認
     error: str
 
+class SearchVariantState(TypedDict):
+    """Input of one fan-out search branch."""
+
+    query: str
+
+class GeneratedArticle(TypedDict):
+    """Structured output of fused generation: the analysis and the article."""
+
+    analysis: Annotated[str, ..., "約200字的分析摘要,包含關鍵主題和整體情緒"]
+    article: Annotated[str, ..., "完整的科技資訊風格文章 (Markdown 格式)"]
+
 # 2. 實作節點 (Nodes)
 
-def start_node(state: dict) -> dict:
+@instrument_node("start_node")
+def start_node(state: GraphState) -> GraphState:
     """Final version: Correctly parses the nested message structure from agent-chat-ui."""
-    print("\n--- (Robust) STARTING GRAPH ---")
     messages = state.get("messages", [])
     if not messages:
         raise ValueError("Input from UI is missing the 'messages' field.")
@@ -51,226 +134,561 @@ def start_node(state: dict) -> dict:
     if not keyword or not keyword.strip():
         raise ValueError(f"Extracted keyword from UI input is empty. Content: {content_payload}")
     keyword = keyword.strip()
-    print(f"Successfully extracted keyword: {keyword}")
+    logger.info("Successfully extracted keyword: %s", keyword)
     return {
-        "messages": messages,
         "keyword": keyword,
         "original_keyword": keyword,
         "search_attempts": 0,
+        "search_batches": None,
     }
 
+@instrument_node("web_search")
 def web_search_node(state: GraphState) -> GraphState:
-    print(f"\n--- PERFORMING WEB SEARCH (Attempt #{state.get('search_attempts', 0) + 1}) ---")
+    """Search the web for the current keyword."""
     keyword = state["keyword"]
-    print(f"Searching for: {keyword}")
+    logger.info("Searching for: %s (attempt #%d)", keyword, state.get("search_attempts", 0) + 1)
     try:
-        with DDGS() as ddgs:
-            search_results = list(ddgs.text(query=keyword, max_results=5))
-        urls = [result['href'] for result in search_results]
-        print(f"Found {len(urls)} URLs.")
+        urls = search_urls(keyword, max_results=SEARCH_MAX_RESULTS)
+        logger.info("Found %d URLs.", len(urls))
         return {"urls": urls}
     except Exception as e:
-        print(f"Web search failed: {e}")
+        logger.warning("Web search failed: %s", e)
         return {"urls": [], "error": f"Web search failed: {e}"}
 
+@instrument_node("web_search")
+async def aweb_search_node(state: GraphState) -> GraphState:
+    """Async variant of :func:`web_search_node`."""
+    keyword = state["keyword"]
+    logger.info("Searching for: %s (attempt #%d)", keyword, state.get("search_attempts", 0) + 1)
+    try:
+        urls = await asearch_urls(keyword, max_results=SEARCH_MAX_RESULTS)
+        logger.info("Found %d URLs.", len(urls))
+        return {"urls": urls}
+    except Exception as e:
+        logger.warning("Web search failed: %s", e)
+        return {"urls": [], "error": f"Web search failed: {e}"}
+
+@instrument_node("search_variant")
+def search_variant_node(state: SearchVariantState) -> GraphState:
+    """Search one query variant of a fan-out search.
+
+    The results of all variants are merged by :func:`fuse_search_results_node`.
+    """
+    query = state["query"]
+    logger.info("Searching variant: %s", query)
+    try:
+        urls = search_urls(query, max_results=SEARCH_MAX_RESULTS)
+    except Exception as e:
+        logger.warning("Web search failed for %r: %s", query, e)
+        urls = []
+    return {"search_batches": [{"query": query, "urls": urls}]}
+
+@instrument_node("search_variant")
+async def asearch_variant_node(state: SearchVariantState) -> GraphState:
+    """Async variant of :func:`search_variant_node`."""
+    query = state["query"]
+    logger.info("Searching variant: %s", query)
+    try:
+        urls = await asearch_urls(query, max_results=SEARCH_MAX_RESULTS)
+    except Exception as e:
+        logger.warning("Web search failed for %r: %s", query, e)
+        urls = []
+    return {"search_batches": [{"query": query, "urls": urls}]}
+
+@instrument_node("fuse_search_results")
+def fuse_search_results_node(state: GraphState) -> GraphState:
+    """Merge fan-out search results with reciprocal rank fusion."""
+    batches = state.get("search_batches") or []
+    urls = fuse_rankings([batch["urls"] for batch in batches], limit=SEARCH_MAX_RESULTS)
+    logger.info(
+        "Fused %d results from %d queries into %d URLs.",
+        sum(len(b["urls"]) for b in batches), len(batches), len(urls),
+    )
+    # 所有改寫查詢都已搜尋過, 因此不再需要 refine 回合
+    return {"urls": urls, "search_attempts": 1, "search_batches": None}
+
+def scrape_stop_condition(
+    state: GraphState,
+) -> Optional[Callable[[List[Dict[str, str]]], bool]]:
+    """Return the "content is good enough" check for ``scrape_early_exit``, if enabled.
+
+    Pages are de-duplicated before grading, as :func:`dedupe_content_node`
+    does before :func:`grade_content_node`, so syndicated copies of one page
+    do not end the scrape early.
+    """
+    if not get_context().scrape_early_exit:
+        return None
+    keyword = state.get("original_keyword", "")
+
+    def enough(pages: List[Dict[str, str]]) -> bool:
+        deduped, _ = dedupe_pages(pages, record_metrics=False)
+        return grade_pages(deduped, keyword) == "good"
+
+    return enough
+
+@instrument_node("scrape_content")
 def scrape_content_node(state: GraphState) -> GraphState:
-    print("\n--- SCRAPING CONTENT ---")
+    """Scrape the search results into the page store."""
     urls = state.get("urls", [])
     if not urls:
-        return {"scraped_content": []}
-    scraped_data = []
-    for url in urls:
-        print(f"Scraping {url}...")
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            text_content = soup.get_text(separator=' ', strip=True)
-            scraped_data.append({"url": url, "content": text_content})
-        except Exception as e:
-            scraped_data.append({"url": url, "content": f"Error: {e}"})
-    print("Finished scraping.")
-    return {"scraped_content": scraped_data}
+        return {"page_refs": []}
+    logger.info("Scraping %d URLs concurrently...", len(urls))
+    scraped_data = scrape_urls(urls, stop_when=scrape_stop_condition(state))
+    logger.info("Finished scraping.")
+    return {"page_refs": store_pages(scraped_data)}
 
+@instrument_node("scrape_content")
+async def ascrape_content_node(state: GraphState) -> GraphState:
+    """Async variant of :func:`scrape_content_node` that awaits the shared fetch pool."""
+    urls = state.get("urls", [])
+    if not urls:
+        return {"page_refs": []}
+    logger.info("Scraping %d URLs concurrently...", len(urls))
+    scraped_data = await ascrape_urls(urls, stop_when=scrape_stop_condition(state))
+    logger.info("Finished scraping.")
+    return {"page_refs": store_pages(scraped_data)}
+
+@instrument_node("dedupe_content")
+def dedupe_content_node(state: GraphState) -> GraphState:
+    """Drop near-duplicate pages and repeated boilerplate sentences."""
+    pages, stats = dedupe_pages(load_pages(state.get("page_refs", [])))
+    logger.info(
+        "Dropped %d duplicate pages and %d repeated sentences, saving %d bytes (~%d tokens).",
+        stats.duplicate_pages, stats.repeated_sentences, stats.bytes_saved, stats.tokens_saved,
+    )
+    return {"page_refs": store_pages(pages), "dedup_stats": stats.as_dict()}
+
+@instrument_node("grade_content")
 def grade_content_node(state: GraphState) -> GraphState:
-    print("\n--- GRADING SCRAPED CONTENT ---")
-    scraped_content = state.get("scraped_content", [])
-    original_keyword = state.get("original_keyword", "").lower()
-    if not scraped_content:
-        return {"grade": "bad"}
-    full_text = " ".join(item["content"] for item in scraped_content).lower()
-    if len(full_text) < 1500:
-        return {"grade": "bad"}
-    if original_keyword not in full_text:
-        return {"grade": "bad"}
-    return {"grade": "good"}
+    """Grade whether the scraped pages are good enough to analyze."""
+    scraped_content = load_pages(state.get("page_refs", []))
+    return {"grade": grade_pages(scraped_content, state.get("original_keyword", ""))}
 
+@instrument_node("refine_search")
 def refine_search_node(state: GraphState) -> GraphState:
-    print("\n--- REFINING SEARCH KEYWORD ---")
+    """Rewrite the keyword for one more search attempt."""
     original_keyword = state["original_keyword"]
-    new_keyword = f'{original_keyword} 應用與比較'
+    new_keyword = REFINED_QUERY_TEMPLATES[0].format(keyword=original_keyword)
     return {
         "keyword": new_keyword,
         "search_attempts": state.get("search_attempts", 0) + 1
     }
 
+class LLMRequest(NamedTuple):
+    """A cacheable LLM call: the model route, the prompt and the cache key fields."""
+
+    route: Route
+    prompt: str
+    prompt_version: str
+    cache_input: str
+    scope: str
+
+def token_emitter(on_token: Optional[Callable[[str], None]] = None) -> Callable[[str], None]:
+    """Return a callback writing each piece of text to the ``custom`` stream (and ``on_token``)."""
+    writer = get_stream_writer()
+    node = get_config().get("metadata", {}).get("langgraph_node", "")
+
+    def emit(text: str) -> None:
+        writer({"node": node, "token": text})
+        if on_token:
+            on_token(text)
+
+    return emit
+
+def html_preview_emitter() -> Callable[[str], None]:
+    """Return a callback writing rendered HTML to the ``custom`` stream as ``{"node", "html"}``.
+
+    The HTML is rendered block by block while the article streams, for live
+    display only; :func:`render_html_node` renders the saved page from the
+    whole article, so reference links and footnotes resolve there.
+    """
+    writer = get_stream_writer()
+    node = get_config().get("metadata", {}).get("langgraph_node", "")
+
+    def emit(html: str) -> None:
+        if html:
+            writer({"node": node, "html": html})
+
+    return emit
+
+def cached_response_text(request: LLMRequest) -> Optional[str]:
+    """Return the cached response to ``request`` from any model of its route."""
+    cache = get_response_cache()
+    if not cache:
+        return None
+    cached = None
+    for name in request.route.models:
+        cached = cache.get(
+            model_id(name), request.prompt_version, request.cache_input, scope=request.scope
+        )
+        if cached is not None:
+            break
+    record_cache("llm", cached is not None)
+    return cached
+
+def replay_cached(cached: Optional[str], emit: Callable[[str], None]) -> Optional[AIMessage]:
+    """Emit a ``cached`` response as a single event and return it, if there is one."""
+    if cached is None:
+        return None
+    logger.info("Using cached LLM response.")
+    emit(cached)
+    return AIMessage(content=cached)
+
+def finish_llm_response(
+    request: LLMRequest, model: str, merged: Optional[BaseMessageChunk]
+) -> AIMessage:
+    """Record usage for a response streamed by ``model``, cache it and return it as one message."""
+    record_llm_usage(model_id(model), getattr(merged, "usage_metadata", None))
+    response_text = merged.text if merged is not None else ""
+    cache = get_response_cache()
+    if cache:
+        cache.put(
+            model_id(model), request.prompt_version, request.cache_input, response_text,
+            scope=request.scope,
+        )
+    return AIMessage(content=response_text, id=merged.id if merged is not None else None)
+
+def stream_llm(
+    request: LLMRequest, on_token: Optional[Callable[[str], None]] = None
+) -> AIMessage:
+    """Stream the answer to ``request``, unless the response cache already has one.
+
+    Tokens are streamed as they are generated, so LangGraph's ``messages``
+    stream mode delivers them to the UI, and each token is also written to the
+    ``custom`` stream mode as ``{"node", "token"}`` events. A cache hit is
+    emitted as a single event. ``on_token``, if given, is called with each
+    piece of text as well, taken from the chunk's text blocks when the
+    provider streams a list of content blocks. The returned message keeps the
+    id of the streamed chunks, so the UI can match it to what it already
+    displayed.
+
+    The request's route picks the model, falling back or hedging to the next
+    one as described in :mod:`react_agent.routing`. The cache is keyed on the
+    id of the model that answered, ``prompt_version`` and ``cache_input`` (the
+    variable part of the prompt), and never shared across ``scope`` values.
+    """
+    emit = token_emitter(on_token)
+    cached = replay_cached(cached_response_text(request), emit)
+    if cached is not None:
+        return cached
+    model, merged = request.route.preferred, None
+    with timed("llm"):
+        for model, chunk in request.route.stream(request.prompt):
+            emit(chunk.text)
+            merged = chunk if merged is None else merged + chunk
+    return finish_llm_response(request, model, merged)
+
+async def astream_llm(
+    request: LLMRequest, on_token: Optional[Callable[[str], None]] = None
+) -> AIMessage:
+    """Async variant of :func:`stream_llm`.
+
+    Cache lookups and writes (SQLite, and MinHash signatures with near-duplicate
+    matching) run in a worker thread; tokens are emitted on the event loop.
+    """
+    emit = token_emitter(on_token)
+    cached = replay_cached(await asyncio.to_thread(cached_response_text, request), emit)
+    if cached is not None:
+        return cached
+    model, merged = request.route.preferred, None
+    with timed("llm"):
+        async for model, chunk in request.route.astream(request.prompt):
+            emit(chunk.text)
+            merged = chunk if merged is None else merged + chunk
+    return await asyncio.to_thread(finish_llm_response, request, model, merged)
+
+NO_CONTENT_MESSAGE = "抱歉,我無法取得任何內容進行分析。"
+
+def has_usable_content(scraped_content: List[Dict[str, str]]) -> bool:
+    """Return whether at least one page was fetched successfully."""
+    return bool(scraped_content) and not all(is_error(item) for item in scraped_content)
+
+def analysis_request(state: GraphState) -> Optional[LLMRequest]:
+    """Build the analysis request, or return ``None`` when there is nothing to analyze.
+
+    Loads and packs the scraped pages, so async nodes run it in a thread.
+    """
+    scraped_content = load_pages(state.get("page_refs", []))
+    if not has_usable_content(scraped_content):
+        return None
+    # 分析屬於 fast 層級: 優先使用 Context.fast_model, 失敗或過慢時改用 Context.model
+    context = get_context()
+    route = get_router().route("analyze_content", context, temperature=0.7, max_tokens=4096)
+    text_for_analysis = pack_pages(
+        scraped_content, state['original_keyword'],
+        route.token_budget("analysis", context.analysis_token_budget),
+    )
+    analysis_prompt = ANALYSIS_PROMPT.format(
+        keyword=state['original_keyword'], text=text_for_analysis
+    )
+    logger.info("Invoking model (%s) for analysis...", route.preferred)
+    return LLMRequest(
+        route, analysis_prompt, ANALYSIS_PROMPT_VERSION, text_for_analysis, state['original_keyword']
+    )
+
+def analysis_error(e: Exception) -> str:
+    """Log a failed analysis and return the text shown in its place."""
+    logger.error("LLM analysis failed: %s", e)
+    return f"抱歉,AI 分析過程中發生錯誤: {e}"
+
+@instrument_node("analyze_content")
 def analyze_content_node(state: GraphState) -> GraphState:
     """FINAL VERSION: Performs analysis by calling AWS Bedrock LLM."""
-    print("\n--- PERFORMING REAL AI ANALYSIS ---")
-    scraped_content = state.get("scraped_content", [])
-    analysis_text = ""
     try:
-        # Initialize the Bedrock model
-        # 支援的模型: anthropic.claude-3-5-sonnet-20241022-v2:0, anthropic.claude-3-sonnet-20240229-v1:0, 
-        # anthropic.claude-3-haiku-20240307-v1:0, meta.llama3-1-405b-instruct-v1:0 等
-        llm = ChatBedrock(
-            model_id=os.getenv("BEDROCK_MODEL_ID", "anthropic.claude-3-5-sonnet-20241022-v2:0"),
-            region_name=os.getenv("AWS_REGION", "us-east-1"),
-            model_kwargs={
-                "temperature": 0.7,
-                "max_tokens": 4096
-            }
-        )
-        
-        if not scraped_content or all("Error:" in item["content"] for item in scraped_content):
-            analysis_text = "抱歉,我無法取得任何內容進行分析。"
-        else:
-            full_text = " ".join(item["content"] for item in scraped_content if "Error:" not in item["content"])
-            text_for_analysis = full_text[:20000] # Use a larger limit for the real LLM
-            
-            analysis_prompt = (
-                "請扮演數據分析師。僅根據以下文本,提供簡潔的摘要(約200字)。"
-                "識別關鍵主題和整體情緒。"
-                f"使用者原始查詢為: '{state['original_keyword']}'。\n\n"
-                "--- 分析文本 ---\n"
-                f"{text_for_analysis}"
-            )
-            
-            print(f"Invoking Bedrock model ({llm.model_id}) for analysis...")
-            response = llm.invoke(analysis_prompt)
-            analysis_text = response.content
+        request = analysis_request(state)
+        analysis_text = stream_llm(request).text if request else NO_CONTENT_MESSAGE
+    except Exception as e:
+        if get_context().fail_fast:
+            raise
+        analysis_text = analysis_error(e)
 
+    logger.info("AI analysis complete.")
+    return {"analysis": analysis_text}
+
+@instrument_node("analyze_content")
+async def aanalyze_content_node(state: GraphState) -> GraphState:
+    """Async variant of :func:`analyze_content_node`."""
+    try:
+        # 讀取與打包頁面屬於阻塞工作, 移出事件迴圈
+        request = await asyncio.to_thread(analysis_request, state)
+        analysis_text = (await astream_llm(request)).text if request else NO_CONTENT_MESSAGE
     except Exception as e:
-        print(f"LLM analysis failed: {e}")
-        analysis_text = f"抱歉,AI 分析過程中發生錯誤: {e}"
+        if get_context().fail_fast:
+            raise
+        analysis_text = analysis_error(e)
 
-    print("AI analysis complete.")
+    logger.info("AI analysis complete.")
     return {"analysis": analysis_text}
 
+def rewrite_request(state: GraphState) -> LLMRequest:
+    """Build the rewrite request from the analysis and the scraped pages."""
+    analysis_text = state.get("analysis", "")
+    scraped_content = load_pages(state.get("page_refs", []))
+    context = get_context()
+    route = get_router().route("rewrite_content", context, temperature=0.8, max_tokens=4096)
+
+    # 準備原始內容摘要
+    original_content = pack_pages(
+        scraped_content, state['original_keyword'],
+        route.token_budget("rewrite", context.rewrite_token_budget),
+    )
+
+    rewrite_prompt = REWRITE_PROMPT.format(
+        keyword=state['original_keyword'], analysis=analysis_text, sources=original_content
+    )
+    logger.info("Invoking model (%s) for content rewriting...", route.preferred)
+    return LLMRequest(
+        route, rewrite_prompt, REWRITE_PROMPT_VERSION,
+        f"{analysis_text}\n{original_content}", state['original_keyword'],
+    )
+
+def rewrite_result(rewritten_message: AIMessage) -> GraphState:
+    """Return the state update for a finished rewrite."""
+    logger.info("Content rewriting complete.")
+    return {
+        "rewritten_content": rewritten_message.text,
+        "messages": [rewritten_message]
+    }
+
+def rewrite_error(state: GraphState, e: Exception) -> GraphState:
+    """Log a failed rewrite and fall back to the analysis as the article."""
+    logger.error("Content rewriting failed: %s", e)
+    analysis_text = state.get("analysis", "")
+    error_msg = f"改寫過程發生錯誤: {e}\n\n原始分析:\n{analysis_text}"
+    return {
+        "rewritten_content": analysis_text,
+        "messages": [AIMessage(content=error_msg)]
+    }
+
+@instrument_node("rewrite_content")
 def rewrite_content_node(state: GraphState) -> GraphState:
     """改寫代理: 將分析內容改寫為科技資訊風格的文章。"""
-    print("\n--- REWRITING CONTENT IN TECH NEWS STYLE ---")
-    analysis_text = state.get("analysis", "")
-    scraped_content = state.get("scraped_content", [])
-    
     try:
-        llm = ChatBedrock(
-            model_id=os.getenv("BEDROCK_MODEL_ID", "anthropic.claude-3-5-sonnet-20241022-v2:0"),
-            region_name=os.getenv("AWS_REGION", "us-east-1"),
-            model_kwargs={
-                "temperature": 0.8,
-                "max_tokens": 4096
-            }
+        request = rewrite_request(state)
+        # 邊串流邊將完成的 Markdown 區塊渲染為 HTML, 僅供即時預覽
+        renderer = IncrementalMarkdownRenderer()
+        emit_html = html_preview_emitter()
+        rewritten_message = stream_llm(
+            request, on_token=lambda token: emit_html(renderer.feed(token))
         )
-        
-        # 準備原始內容摘要
-        original_content = " ".join(
-            item["content"][:500] for item in scraped_content 
-            if "Error:" not in item["content"]
-        )[:3000]
-        
-        rewrite_prompt = f"""你是一個內容改寫專家。將提供給你的分析內容改寫為科技資訊風格的文章。
-
-科技資訊風格特點：
-1. 標題簡潔醒目
-2. 開頭直接點明主題
-3. 內容客觀準確但生動有趣
-4. 使用專業術語但解釋清晰
-5. 段落簡短，重點突出
-6. 使用繁體中文
-
-原始查詢: {state['original_keyword']}
-
-分析內容:
-{analysis_text}
-
-參考資料摘要:
-{original_content}
-
-請將上述分析改寫為一篇完整的科技資訊文章，包含:
-- 吸引人的標題
-- 引言段落
-- 主要內容（2-3個段落）
-- 總結
-"""
-        
-        print(f"Invoking Bedrock model for content rewriting...")
-        response = llm.invoke(rewrite_prompt)
-        rewritten_text = response.content
-        
-        print("Content rewriting complete.")
-        return {
-            "rewritten_content": rewritten_text,
-            "messages": state["messages"] + [AIMessage(content=rewritten_text)]
-        }
-        
+        emit_html(renderer.close())
+        return rewrite_result(rewritten_message)
     except Exception as e:
-        print(f"Content rewriting failed: {e}")
-        error_msg = f"改寫過程發生錯誤: {e}\n\n原始分析:\n{analysis_text}"
-        return {
-            "rewritten_content": analysis_text,
-            "messages": state["messages"] + [AIMessage(content=error_msg)]
-        }
+        if get_context().fail_fast:
+            raise
+        return rewrite_error(state, e)
+
+@instrument_node("rewrite_content")
+async def arewrite_content_node(state: GraphState) -> GraphState:
+    """Async variant of :func:`rewrite_content_node`."""
+    try:
+        request = await asyncio.to_thread(rewrite_request, state)
+        renderer = IncrementalMarkdownRenderer()
+        emit_html = html_preview_emitter()
+        rewritten_message = await astream_llm(
+            request, on_token=lambda token: emit_html(renderer.feed(token))
+        )
+        emit_html(renderer.close())
+        return rewrite_result(rewritten_message)
+    except Exception as e:
+        if get_context().fail_fast:
+            raise
+        return rewrite_error(state, e)
+
+def generation_request(state: GraphState) -> Optional[LLMRequest]:
+    """Build the fused generation request, or return ``None`` when there is no content."""
+    scraped_content = load_pages(state.get("page_refs", []))
+    if not has_usable_content(scraped_content):
+        return None
+    keyword = state['original_keyword']
+    context = get_context()
+    route = get_router().route("generate_article", context, temperature=0.7, max_tokens=4096)
+    source_text = pack_pages(
+        scraped_content, keyword, route.token_budget("analysis", context.analysis_token_budget)
+    )
+    return LLMRequest(
+        route, GENERATE_ARTICLE_PROMPT.format(keyword=keyword, text=source_text),
+        GENERATE_ARTICLE_PROMPT_VERSION, source_text, keyword,
+    )
+
+def cached_generation(request: LLMRequest) -> Optional[Dict[str, str]]:
+    """Return the cached structured output for ``request``, if there is one."""
+    cached = cached_response_text(request)
+    if cached is None:
+        return None
+    logger.info("Using cached LLM response.")
+    return cast(Dict[str, str], json.loads(cached))
 
+def generation_result(
+    request: LLMRequest, result: Dict[str, str], model: Optional[str] = None
+) -> GraphState:
+    """Return the state update for structured output, caching it under ``model``.
+
+    ``model`` is the model that answered, or ``None`` for a cache hit.
+    """
+    cache = get_response_cache()
+    if cache and model:
+        cache.put(
+            model_id(model), request.prompt_version, request.cache_input,
+            json.dumps(result, ensure_ascii=False), scope=request.scope,
+        )
+    logger.info("Fused generation complete.")
+    return {
+        "analysis": result["analysis"],
+        "rewritten_content": result["article"],
+        "messages": [AIMessage(content=result["article"])]
+    }
+
+def structured_article(llm: BaseChatModel) -> Runnable[Any, Any]:
+    """Wrap ``llm`` to answer with a :class:`GeneratedArticle`."""
+    return llm.with_structured_output(GeneratedArticle)
+
+def no_content_result() -> GraphState:
+    """Return the state update for a run with no usable content."""
+    return {
+        "analysis": NO_CONTENT_MESSAGE,
+        "rewritten_content": NO_CONTENT_MESSAGE,
+        "messages": [AIMessage(content=NO_CONTENT_MESSAGE)]
+    }
+
+def generation_error(e: Exception) -> GraphState:
+    """Log a failed fused generation and return the text shown in its place."""
+    logger.error("Fused generation failed: %s", e)
+    error_msg = f"抱歉,AI 生成過程中發生錯誤: {e}"
+    return {
+        "analysis": error_msg,
+        "rewritten_content": error_msg,
+        "messages": [AIMessage(content=error_msg)]
+    }
+
+@instrument_node("generate_article")
+def generate_article_node(state: GraphState) -> GraphState:
+    """Generate the analysis and the article with one structured-output call."""
+    try:
+        request = generation_request(state)
+        if request is None:
+            return no_content_result()
+        result = cached_generation(request)
+        if result is not None:
+            return generation_result(request, result)
+        logger.info("Invoking model (%s) for fused generation...", request.route.preferred)
+        with timed("llm"):
+            model, result = request.route.invoke(structured_article, request.prompt)
+        return generation_result(request, result, model)
+    except Exception as e:
+        if get_context().fail_fast:
+            raise
+        return generation_error(e)
+
+@instrument_node("generate_article")
+async def agenerate_article_node(state: GraphState) -> GraphState:
+    """Async variant of :func:`generate_article_node`."""
+    try:
+        request = await asyncio.to_thread(generation_request, state)
+        if request is None:
+            return no_content_result()
+        # 快取讀寫 (SQLite 與近似重複比對) 同樣移出事件迴圈
+        result = await asyncio.to_thread(cached_generation, request)
+        if result is not None:
+            return await asyncio.to_thread(generation_result, request, result)
+        logger.info("Invoking model (%s) for fused generation...", request.route.preferred)
+        with timed("llm"):
+            model, result = await request.route.ainvoke(structured_article, request.prompt)
+        return await asyncio.to_thread(generation_result, request, result, model)
+    except Exception as e:
+        if get_context().fail_fast:
+            raise
+        return generation_error(e)
+
+def artifact_basename(original_keyword: str) -> str:
+    """Return the timestamped file name stem used for a run's artifacts."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # 清理關鍵字作為文件名的一部分
+    safe_keyword = "".join(c for c in original_keyword if c.isalnum() or c in (' ', '-', '_')).strip()
+    safe_keyword = safe_keyword.replace(' ', '_')[:50]  # 限制長度
+    return f"{timestamp}_{safe_keyword}"
+
+@instrument_node("write_file")
 def write_file_node(state: GraphState) -> GraphState:
-    """文件寫入代理: 將改寫後的內容保存到文件。"""
-    print("\n--- WRITING CONTENT TO FILE ---")
+    """文件寫入代理: 將改寫後的內容交給背景寫入器保存。"""
     rewritten_content = state.get("rewritten_content", "")
     original_keyword = state.get("original_keyword", "unknown")
     
     try:
-        # 建立輸出目錄
-        output_dir = "output"
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            print(f"Created output directory: {output_dir}")
-        
         # 生成文件名稱（包含日期時間）
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        # 清理關鍵字作為文件名的一部分
-        safe_keyword = "".join(c for c in original_keyword if c.isalnum() or c in (' ', '-', '_')).strip()
-        safe_keyword = safe_keyword.replace(' ', '_')[:50]  # 限制長度
-        filename = f"{timestamp}_{safe_keyword}.md"
-        filepath = os.path.join(output_dir, filename)
-        
-        # 寫入文件
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"# {original_keyword}\n\n")
-            f.write(f"生成時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("---\n\n")
-            f.write(rewritten_content)
+        filename = f"{artifact_basename(original_keyword)}.md"
+        document = (
+            f"# {original_keyword}\n\n"
+            f"生成時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            "---\n\n"
+            f"{rewritten_content}"
+        )
         
-        success_msg = f"✅ 文章已成功保存\n\n📁 文件路徑: `{filepath}`\n📊 文件大小: {len(rewritten_content)} 字元\n⏰ 保存時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        print(f"File saved successfully: {filepath}")
+        # 交給背景寫入器 (原子寫入) 後立即返回, 不等待磁碟 I/O;
+        # 寫入失敗由寫入器記錄, 並於 flush (含程式結束時) 回報, 因此 file_saved 為 None (已排入佇列)
+        writer = get_artifact_writer()
+        filepath = writer.sink.location(filename)
+        writer.submit(filename, document.encode("utf-8"))
+        queued_msg = f"⏳ 文章已排入背景寫入佇列\n\n📁 文件路徑: `{filepath}`\n📊 文件大小: {len(rewritten_content)} 字元\n⏰ 排入時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        logger.info("File queued for writing: %s", filepath)
         
         return {
             "output_file": filepath,
-            "file_saved": True,
-            "messages": state["messages"] + [AIMessage(content=success_msg)]
+            "file_saved": None,
+            "messages": [AIMessage(content=queued_msg)]
         }
         
     except Exception as e:
-        print(f"File writing failed: {e}")
+        logger.error("File writing failed: %s", e)
         error_msg = f"❌ 文件保存失敗: {e}\n\n內容已在上方顯示。"
         return {
             "file_saved": False,
-            "messages": state["messages"] + [AIMessage(content=error_msg)]
+            "messages": [AIMessage(content=error_msg)]
         }
 
+@instrument_node("render_html")
 def render_html_node(state: GraphState) -> GraphState:
     """HTML 渲染代理: 將 Markdown 內容轉換為專業的 HTML 檔案。"""
-    print("\n--- RENDERING HTML FROM MARKDOWN ---")
     rewritten_content = state.get("rewritten_content", "")
     original_keyword = state.get("original_keyword", "unknown")
     md_filepath = state.get("output_file", "")
@@ -278,265 +696,134 @@ def render_html_node(state: GraphState) -> GraphState:
     try:
         # 生成 HTML 文件名稱（與 MD 文件同名但副檔名不同）
         if md_filepath:
-            html_filepath = md_filepath.replace('.md', '.html')
+            html_filename = os.path.basename(md_filepath).replace('.md', '.html')
         else:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_keyword = "".join(c for c in original_keyword if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_keyword = safe_keyword.replace(' ', '_')[:50]
-            html_filepath = f"output/{timestamp}_{safe_keyword}.html"
-        
-        # 使用 Markdown 套件轉換內容
-        md = markdown.Markdown(extensions=['extra', 'nl2br', 'sane_lists'])
-        html_content = md.convert(rewritten_content)
+            html_filename = f"{artifact_basename(original_keyword)}.html"
         
-        # 專業 HTML 模板
-        html_template = f"""<!DOCTYPE html>
-<html lang="zh-TW">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta name="generator" content="LangGraph ReAct Agent">
-    <meta name="keywords" content="{original_keyword}">
-    <title>{original_keyword} - 科技資訊文章</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        body {{
-            font-family: 'Segoe UI', 'Microsoft JhengHei', Arial, sans-serif;
-            line-height: 1.8;
-            color: #333;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 20px;
-        }}
-        .container {{
-            max-width: 900px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 12px;
-            box-shadow: 0 10px 40px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }}
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-        .header h1 {{
-            font-size: 2.2em;
-            margin-bottom: 10px;
-            font-weight: 700;
-        }}
-        .metadata {{
-            background: #f8f9fa;
-            padding: 15px 40px;
-            border-bottom: 2px solid #e9ecef;
-            font-size: 0.9em;
-            color: #6c757d;
-        }}
-        .metadata span {{
-            margin-right: 20px;
-        }}
-        .content {{
-            padding: 40px;
-        }}
-        .content h1 {{
-            color: #667eea;
-            font-size: 2em;
-            margin: 30px 0 20px 0;
-            padding-bottom: 10px;
-            border-bottom: 3px solid #667eea;
-        }}
-        .content h2 {{
-            color: #764ba2;
-            font-size: 1.5em;
-            margin: 25px 0 15px 0;
-            padding-left: 15px;
-            border-left: 4px solid #764ba2;
-        }}
-        .content h3 {{
-            color: #495057;
-            font-size: 1.2em;
-            margin: 20px 0 10px 0;
-        }}
-        .content p {{
-            margin-bottom: 16px;
-            text-align: justify;
-        }}
-        .content ul, .content ol {{
-            margin: 15px 0 15px 30px;
-        }}
-        .content li {{
-            margin-bottom: 8px;
-        }}
-        .content strong {{
-            color: #667eea;
-            font-weight: 600;
-        }}
-        .content code {{
-            background: #f8f9fa;
-            padding: 2px 6px;
-            border-radius: 3px;
-            font-family: 'Courier New', monospace;
-            color: #e83e8c;
-        }}
-        .content pre {{
-            background: #f8f9fa;
-            padding: 15px;
-            border-radius: 5px;
-            overflow-x: auto;
-            margin: 15px 0;
-        }}
-        .content blockquote {{
-            border-left: 4px solid #667eea;
-            padding-left: 20px;
-            margin: 20px 0;
-            color: #6c757d;
-            font-style: italic;
-        }}
-        .footer {{
-            background: #f8f9fa;
-            padding: 20px 40px;
-            text-align: center;
-            color: #6c757d;
-            font-size: 0.9em;
-            border-top: 1px solid #e9ecef;
-        }}
-        .badge {{
-            display: inline-block;
-            padding: 5px 12px;
-            background: #667eea;
-            color: white;
-            border-radius: 20px;
-            font-size: 0.85em;
-            margin: 5px;
-        }}
-        @media (max-width: 768px) {{
-            body {{
-                padding: 10px;
-            }}
-            .container {{
-                border-radius: 8px;
-            }}
-            .header, .content {{
-                padding: 20px;
-            }}
-            .header h1 {{
-                font-size: 1.6em;
-            }}
-            .content h1 {{
-                font-size: 1.5em;
-            }}
-            .content h2 {{
-                font-size: 1.2em;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>{original_keyword}</h1>
-            <div style="margin-top: 15px;">
-                <span class="badge">🔍 AI 搜尋</span>
-                <span class="badge">🤖 AI 分析</span>
-                <span class="badge">✍️ AI 改寫</span>
-            </div>
-        </div>
-        <div class="metadata">
-            <span>📅 生成時間: {datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}</span>
-            <span>📦 文件格式: HTML</span>
-            <span>🌐 語言: 繁體中文</span>
-        </div>
-        <div class="content">
-{html_content}
-        </div>
-        <div class="footer">
-            <p>🤖 由 <strong>LangGraph ReAct Agent</strong> 自動生成</p>
-            <p style="margin-top: 10px; font-size: 0.85em;">
-                技術支持: AWS Bedrock Claude 3.5 Sonnet | LangChain | LangGraph
-            </p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-        
-        # 寫入 HTML 文件
-        with open(html_filepath, 'w', encoding='utf-8') as f:
-            f.write(html_template)
+        # 以共用的 Markdown 渲染器轉換完整內容 (串流時的逐區塊 HTML 僅供預覽, 無法解析參考連結與註腳)
+        with timed("render"):
+            html_content = render_markdown(rewritten_content)
+            
+            # 專業 HTML 模板 (預先編譯於 rendering 模組)
+            html_page = render_page(
+                original_keyword, datetime.now().strftime('%Y年%m月%d日 %H:%M:%S'), html_content
+            )
         
-        success_msg = f"\n\n🌐 HTML 檔案已成功生成\n\n📄 HTML 路徑: `{html_filepath}`\n📊 檔案大小: {len(html_template)} 字元\n✨ 可用於 EMAIL 分享或網頁展示"
-        print(f"HTML file rendered successfully: {html_filepath}")
+        # 交給背景寫入器寫入 HTML 文件後立即返回
+        writer = get_artifact_writer()
+        html_filepath = writer.sink.location(html_filename)
+        writer.submit(html_filename, html_page.encode("utf-8"))
+        queued_msg = f"\n\n🌐 HTML 檔案已生成並排入背景寫入佇列\n\n📄 HTML 路徑: `{html_filepath}`\n📊 檔案大小: {len(html_page)} 字元\n✨ 可用於 EMAIL 分享或網頁展示"
+        logger.info("HTML file queued for writing: %s", html_filepath)
         
         return {
             "html_file": html_filepath,
-            "messages": state["messages"] + [AIMessage(content=success_msg)]
+            "messages": [AIMessage(content=queued_msg)]
         }
         
     except Exception as e:
-        print(f"HTML rendering failed: {e}")
-        error_msg = f"\n\n⚠️ HTML 渲染失敗: {e}\n\nMarkdown 檔案已成功保存。"
+        logger.error("HTML rendering failed: %s", e)
+        saved_note = "Markdown 檔案已排入寫入佇列。" if state.get("output_file") else "Markdown 檔案未保存。"
+        error_msg = f"\n\n⚠️ HTML 渲染失敗: {e}\n\n{saved_note}"
         return {
-            "messages": state["messages"] + [AIMessage(content=error_msg)]
+            "messages": [AIMessage(content=error_msg)]
         }
 
+@instrument_node("present_results")
 def present_results_node(state: GraphState) -> GraphState:
-    print("\n--- FINAL STATE REACHED --- For UI display, check the chat history.")
+    """End the run; results are already in the chat history."""
+    logger.info("Final state reached. For UI display, check the chat history.")
     return {}
 
 # ... (Conditional Logic and Graph building remains the same) ...
 
+def route_search(state: GraphState) -> Union[str, List[Send]]:
+    """Fan out one search per query variant, or run a single web search."""
+    if get_context().search_mode == "fanout":
+        return [Send("search_variant", {"query": q}) for q in query_variants(state["keyword"])]
+    return "web_search"
+
 def decide_to_proceed(state: GraphState) -> str:
+    """Scrape the results, or end the run when the search found nothing."""
     if state.get("error") or not state.get("urls"):
         return "__end__"
     return "scrape"
 
 def decide_to_analyze_or_refine(state: GraphState) -> str:
+    """Refine the search once on bad content, then analyze or generate."""
     grade = state.get("grade")
     attempts = state.get("search_attempts", 0)
-    if grade == "good":
-        return "analyze"
-    else:
-        if attempts >= 1:
-            return "analyze"
-        else:
-            return "refine"
+    if grade != "good" and attempts < 1:
+        return "refine"
+    if get_context().generation_mode == "fused":
+        return "generate"
+    return "analyze"
 
-builder = StateGraph(GraphState)
+def sync_or_async(
+    func: Callable[[Any], Any], afunc: Callable[[Any], Awaitable[Any]]
+) -> RunnableLambda[Any, Any]:
+    """Make a node that runs ``func`` under invoke/stream and ``afunc`` under ainvoke/astream.
+
+    The LangGraph server runs graphs asynchronously, so I/O-bound nodes
+    provide both versions.
+    """
+    return RunnableLambda(func, afunc)
+
+builder = StateGraph(GraphState, context_schema=Context)
 
 builder.add_node("start_node", start_node)
-builder.add_node("web_search", web_search_node)
-builder.add_node("scrape_content", scrape_content_node)
+builder.add_node("web_search", sync_or_async(web_search_node, aweb_search_node))
+builder.add_node("search_variant", sync_or_async(search_variant_node, asearch_variant_node))
+builder.add_node("fuse_search_results", fuse_search_results_node)
+builder.add_node("scrape_content", sync_or_async(scrape_content_node, ascrape_content_node))
+builder.add_node("dedupe_content", dedupe_content_node)
 builder.add_node("grade_content", grade_content_node)
 builder.add_node("refine_search", refine_search_node)
-builder.add_node("analyze_content", analyze_content_node)
-builder.add_node("rewrite_content", rewrite_content_node)
+builder.add_node("analyze_content", sync_or_async(analyze_content_node, aanalyze_content_node))
+builder.add_node("rewrite_content", sync_or_async(rewrite_content_node, arewrite_content_node))
+builder.add_node("generate_article", sync_or_async(generate_article_node, agenerate_article_node))
 builder.add_node("write_file", write_file_node)
 builder.add_node("render_html", render_html_node)
 builder.add_node("present_results", present_results_node)
 
 builder.set_entry_point("start_node")
-builder.add_edge("start_node", "web_search")
+builder.add_conditional_edges("start_node", route_search, ["web_search", "search_variant"])
 builder.add_conditional_edges("web_search", decide_to_proceed, {"scrape": "scrape_content", "__end__": "present_results"})
-builder.add_edge("scrape_content", "grade_content")
+builder.add_edge("search_variant", "fuse_search_results")
+builder.add_conditional_edges("fuse_search_results", decide_to_proceed, {"scrape": "scrape_content", "__end__": "present_results"})
+builder.add_edge("scrape_content", "dedupe_content")
+builder.add_edge("dedupe_content", "grade_content")
 builder.add_conditional_edges(
     "grade_content",
     decide_to_analyze_or_refine,
     {
         "analyze": "analyze_content",
+        "generate": "generate_article",
         "refine": "refine_search"
     }
 )
 builder.add_edge("refine_search", "web_search")
 builder.add_edge("analyze_content", "rewrite_content")
 builder.add_edge("rewrite_content", "write_file")
+builder.add_edge("generate_article", "write_file")
 builder.add_edge("write_file", "render_html")
 builder.add_edge("render_html", "present_results")
 builder.add_edge("present_results", END)
 
-app = builder.compile()
-graph = app  # Alias for backward compatibility
+@functools.cache
+def compile_graph(
+    checkpointer: Optional[BaseCheckpointSaver[Any]] = None,
+) -> CompiledStateGraph[GraphState, Context, Any, Any]:
+    """Compile the graph, saving every step to ``checkpointer`` if given.
+
+    See :mod:`react_agent.checkpointing` for resuming from a failed node.
+    Compiled graphs are cached per checkpointer.
+    """
+    return builder.compile(checkpointer=checkpointer)
+
+def __getattr__(name: str) -> Any:
+    # 匯出的 app 不帶 checkpointer, 由 LangGraph server (含 langgraph dev) 自行提供;
+    # 於首次存取時才編譯。graph 為向後相容的別名。
+    if name in ("app", "graph"):
+        return compile_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,343 @@
+"""Latency and resource instrumentation for the graph.
+
+Every node and sub-step (search, fetch, extract, LLM, render, write) records
+its wall time into histograms; fetch sizes, extracted characters, LLM tokens
+and cache hits are counted alongside. Metrics are exposed in the Prometheus
+text format via :func:`render_prometheus`, written as an OpenMetrics file to
+``METRICS_FILE`` at exit (or on :func:`write_metrics_file`), and served over
+HTTP by :func:`serve_metrics`. Importing this module never opens a port: entry
+points such as the batch CLI start the server, on ``METRICS_PORT`` by default.
+
+Collection is a few dictionary updates under a lock per observation. Set
+``METRICS_ENABLED=0`` to turn it off entirely.
+"""
+
+from __future__ import annotations
+
+import atexit
+import bisect
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "")
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        """Declare a counter; see :meth:`MetricsRegistry.counter`."""
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add ``amount`` to the count for ``labels``."""
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Return the current count for ``labels``."""
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:  # noqa: D102
+        with self._lock:
+            return [
+                f"{self.name}_total{_format_labels(self.labels, k)} {_format_value(v)}"
+                for k, v in sorted(self._values.items())
+            ]
+
+
+class Histogram:
+    """Observations bucketed by upper bound, per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        """Declare a histogram; see :meth:`MetricsRegistry.histogram`."""
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation of ``value`` for ``labels``."""
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            # Per-bucket counts, then +Inf count, then sum.
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def snapshot(self, *labels: str) -> Tuple[int, float]:
+        """Return ``(count, sum)`` of observations for ``labels``."""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                return 0, 0.0
+            return int(sum(series[:-1])), series[-1]
+
+    def render(self) -> List[str]:  # noqa: D102
+        lines = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    le = _format_labels(
+                        self.labels, key, f'le="{_format_value(bound)}"'
+                    )
+                    lines.append(f"{self.name}_bucket{le} {_format_value(cumulative)}")
+                cumulative += series[len(self.buckets)]
+                inf = _format_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf} {_format_value(cumulative)}")
+                labels = _format_labels(self.labels, key)
+                lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+                lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """A named collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        """Create an empty registry."""
+        self._metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        """Register and return a counter."""
+        metric = self._metrics[name] = Counter(name, help, labels)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Register and return a histogram."""
+        metric = self._metrics[name] = Histogram(name, help, labels, buckets)
+        return metric
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Render all metrics in the Prometheus (or OpenMetrics) text format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+NODE_SECONDS = REGISTRY.histogram(
+    "react_agent_node_seconds", "Wall time spent in each graph node.", ["node"]
+)
+STEP_SECONDS = REGISTRY.histogram(
+    "react_agent_step_seconds",
+    "Wall time of sub-steps: search, fetch, extract, llm, render, write.",
+    ["step"],
+)
+FETCH_BYTES = REGISTRY.histogram(
+    "react_agent_fetch_bytes",
+    "Response bytes read per fetched page.",
+    buckets=SIZE_BUCKETS,
+)
+EXTRACTED_CHARS = REGISTRY.histogram(
+    "react_agent_extracted_chars",
+    "Characters of text extracted per page.",
+    buckets=SIZE_BUCKETS,
+)
+LLM_TOKENS = REGISTRY.counter(
+    "react_agent_llm_tokens",
+    "LLM tokens by model and direction.",
+    ["model", "direction"],
+)
+LLM_CALLS = REGISTRY.counter(
+    "react_agent_llm_calls",
+    "Routed model calls by model and outcome: ok, error or cancelled (lost a hedge).",
+    ["model", "outcome"],
+)
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "react_agent_llm_first_token_seconds",
+    "Time to the first streamed token per model.",
+    ["model"],
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "react_agent_cache_lookups",
+    "Cache lookups by cache and result.",
+    ["cache", "result"],
+)
+DEDUP_SAVED_BYTES = REGISTRY.histogram(
+    "react_agent_dedup_saved_bytes",
+    "UTF-8 bytes of scraped text removed by de-duplication per run.",
+    buckets=SIZE_BUCKETS,
+)
+DEDUP_SAVED_TOKENS = REGISTRY.histogram(
+    "react_agent_dedup_saved_tokens",
+    "Estimated prompt tokens removed by de-duplication per run.",
+    buckets=SIZE_BUCKETS,
+)
+
+
+@contextmanager
+def timed(step: str) -> Iterator[None]:
+    """Record the wall time of the enclosed block as sub-step ``step``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STEP_SECONDS.observe(time.perf_counter() - started, step)
+
+
+def instrument_node(name: str) -> Callable[[F], F]:
+    """Decorate a graph node to log entry and exit and record its wall time.
+
+    Works on both plain functions and coroutine functions.
+    """
+
+    def decorator(fn: F) -> F:
+        node_logger = logging.getLogger(fn.__module__)
+
+        def finished(started: float) -> None:
+            elapsed = time.perf_counter() - started
+            NODE_SECONDS.observe(elapsed, name)
+            node_logger.debug("%s finished in %.3fs", name, elapsed)
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                node_logger.info("--- %s ---", name)
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    finished(started)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            node_logger.info("--- %s ---", name)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                finished(started)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a lookup in ``cache`` as a hit or a miss."""
+    CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
+
+
+def record_llm_usage(model: str, usage: Optional[Dict[str, Any]]) -> None:
+    """Count input and output tokens from a LangChain ``usage_metadata`` dict."""
+    if usage:
+        LLM_TOKENS.inc(model, "input", amount=usage.get("input_tokens", 0))
+        LLM_TOKENS.inc(model, "output", amount=usage.get("output_tokens", 0))
+
+
+def render_prometheus() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    return REGISTRY.render()
+
+
+def write_metrics_file(path: str = METRICS_FILE) -> None:
+    """Atomically write all metrics to ``path`` in the OpenMetrics text format."""
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render(openmetrics=True))
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format, *args)
+
+
+def serve_metrics(port: int) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` (any path) on ``port`` from a daemon thread."""
+    server = ThreadingHTTPServer(("", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving metrics on port %d", port)
+    return server
+
+
+if METRICS_FILE:
+    atexit.register(write_metrics_file)
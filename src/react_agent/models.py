@@ -0,0 +1,174 @@
+"""Process-wide registry of chat model clients.
+
+Chat models are built once per ``(provider, model, kwargs)`` and shared by
+every graph run. Bedrock models additionally share one boto3
+``bedrock-runtime`` client per region, so credential resolution and the
+HTTPS connection pool are paid for once per process. boto3 clients and the
+LangChain chat models wrapping them are safe to share across threads and
+async tasks.
+
+Other providers can be plugged in with :func:`register_provider`, which the
+offline benchmarks use to serve local fake models.
+
+boto3 has no async API, so ``ChatBedrock.astream`` would hold a thread of the
+event loop's default executor for the whole call. That is the same executor
+LangGraph runs synchronous nodes on. Such models instead run on the dedicated
+pool returned by :func:`get_llm_executor`, with ``LLM_MAX_WORKERS`` threads,
+which matches the Bedrock connection pool by default (see
+:mod:`react_agent.routing`). Models with a native async client are awaited
+directly.
+
+boto3, ``langchain_aws``, ``langchain.chat_models`` and LangChain's chat
+model base classes are imported on first use. Importing this module does not
+load them.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Mapping,
+    Optional,
+    Tuple,
+    cast,
+)
+
+if TYPE_CHECKING:
+    from langchain_aws import ChatBedrock
+    from langchain_core.language_models import BaseChatModel
+
+DEFAULT_BEDROCK_MODEL_ID = "anthropic.claude-3-5-sonnet-20241022-v2:0"
+DEFAULT_AWS_REGION = "us-east-1"
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", str(BEDROCK_MAX_POOL_CONNECTIONS)))
+
+_lock = threading.Lock()
+_models: Dict[Tuple[Hashable, ...], BaseChatModel] = {}
+_bedrock_clients: Dict[str, Any] = {}
+_providers: Dict[str, Callable[..., BaseChatModel]] = {}
+_llm_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list | tuple):
+        return tuple(_freeze(v) for v in value)
+    return cast(Hashable, value)
+
+
+def _bedrock_runtime_client(region_name: str) -> Any:
+    with _lock:
+        client = _bedrock_clients.get(region_name)
+    if client is not None:
+        return client
+    import boto3  # type: ignore[import-untyped]
+    from botocore.config import Config  # type: ignore[import-untyped]
+
+    # The default boto3 session is not thread-safe, so build the client from
+    # a session of its own. If two threads race, the first client stored wins.
+    client = boto3.session.Session().client(
+        "bedrock-runtime",
+        region_name=region_name,
+        config=Config(
+            max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+            retries={"mode": "adaptive"},
+        ),
+    )
+    with _lock:
+        return _bedrock_clients.setdefault(region_name, client)
+
+
+def get_bedrock_model(
+    model_id: Optional[str] = None,
+    region_name: Optional[str] = None,
+    model_kwargs: Optional[Dict[str, Any]] = None,
+) -> ChatBedrock:
+    """Return a shared ``ChatBedrock`` for the given model and settings.
+
+    ``model_id`` and ``region_name`` default to the ``BEDROCK_MODEL_ID`` and
+    ``AWS_REGION`` environment variables.
+    """
+    model = model_id or os.getenv("BEDROCK_MODEL_ID") or DEFAULT_BEDROCK_MODEL_ID
+    region = region_name or os.getenv("AWS_REGION") or DEFAULT_AWS_REGION
+    key = ("bedrock", model, region, _freeze(model_kwargs or {}))
+    with _lock:
+        cached = _models.get(key)
+    if cached is not None:
+        return cast("ChatBedrock", cached)
+    from langchain_aws import ChatBedrock
+
+    # Built outside the lock, so first-time builds of different models do not
+    # wait for each other; if two threads race, the first model stored wins.
+    settings: Dict[str, Any] = {
+        "model_id": model,
+        "region_name": region,
+        "model_kwargs": dict(model_kwargs or {}),
+        "client": _bedrock_runtime_client(region),
+    }
+    chat_model = ChatBedrock(**settings)
+    with _lock:
+        return cast("ChatBedrock", _models.setdefault(key, chat_model))
+
+
+def register_provider(provider: str, factory: Callable[..., BaseChatModel]) -> None:
+    """Build ``provider/...`` models with ``factory(model, **kwargs)``.
+
+    A registered provider takes precedence over the built-in ones. Models
+    already built for ``provider`` are discarded.
+    """
+    with _lock:
+        _providers[provider] = factory
+        for key in [key for key in _models if key[0] == provider]:
+            del _models[key]
+
+
+def get_chat_model(fully_specified_name: str, **kwargs: Any) -> BaseChatModel:
+    """Return a shared chat model for a ``provider/model`` name.
+
+    ``bedrock/...`` names go through :func:`get_bedrock_model` so they share
+    the per-region Bedrock client; other providers use a factory registered
+    with :func:`register_provider`, or else ``init_chat_model``.
+    """
+    provider, model = fully_specified_name.split("/", maxsplit=1)
+    if provider == "bedrock" and provider not in _providers:
+        return get_bedrock_model(model, model_kwargs=kwargs)
+    key = (provider, model, _freeze(kwargs))
+    with _lock:
+        chat_model = _models.get(key)
+        factory = _providers.get(provider)
+    if chat_model is not None:
+        return chat_model
+    if factory is None:
+        from langchain.chat_models import init_chat_model
+
+        factory = functools.partial(init_chat_model, model_provider=provider)
+    chat_model = factory(model, **kwargs)
+    with _lock:
+        return _models.setdefault(key, chat_model)
+
+
+def has_native_async(model: BaseChatModel) -> bool:
+    """Return whether ``model`` streams with a native async client."""
+    from langchain_core.language_models import BaseChatModel
+
+    return type(model)._astream is not BaseChatModel._astream
+
+
+def get_llm_executor() -> ThreadPoolExecutor:
+    """Return the pool that blocking model calls run on."""
+    global _llm_executor
+    with _lock:
+        if _llm_executor is None:
+            _llm_executor = ThreadPoolExecutor(
+                max_workers=LLM_MAX_WORKERS, thread_name_prefix="llm"
+            )
+        return _llm_executor
@@ -0,0 +1,157 @@
+"""Token-budgeted packing of scraped text into LLM prompts.
+
+Scraped pages are split into passages, near-duplicate passages across pages
+are dropped, and the remaining passages are ranked by BM25 relevance to the
+query and packed until the prompt's token budget is full. Pages that fall
+below the relevance threshold used for grading are left out. Selected
+passages keep their original page order so the packed text still reads
+coherently.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Set, Tuple
+
+from react_agent.fingerprints import bottom_k_sketch, normalize_text, sketch_similarity
+from react_agent.grading import is_error
+from react_agent.scoring import (
+    CJK_RANGES,
+    PAGE_RELEVANCE_THRESHOLD,
+    page_relevance,
+    split_passages,
+)
+
+# Token budgets for the scraped text in each prompt, by model-id prefix. The
+# first matching prefix wins; unknown models fall back to DEFAULT_TOKEN_BUDGETS.
+MODEL_TOKEN_BUDGETS: Dict[str, Dict[str, int]] = {
+    "anthropic.claude-3-haiku": {"analysis": 6000, "rewrite": 1200},
+    "anthropic.claude": {"analysis": 8000, "rewrite": 1500},
+    "meta.llama": {"analysis": 4000, "rewrite": 1000},
+}
+DEFAULT_TOKEN_BUDGETS = {"analysis": 4000, "rewrite": 1000}
+
+# Bedrock cross-region inference profiles prefix the model id with a
+# geography, e.g. ``us.anthropic.claude-3-5-sonnet-20240620-v1:0``.
+_INFERENCE_PROFILE_PREFIX = re.compile(r"^(?:us|us-gov|eu|apac|jp|au|ca|global)\.")
+
+NEAR_DUPLICATE_SIMILARITY = 0.8
+
+_CJK = re.compile(f"[{CJK_RANGES}]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of ``text`` without a model tokenizer.
+
+    CJK characters are counted as one token each and other text as one token
+    per four characters, which tracks Claude-family tokenizers closely enough
+    for budgeting.
+    """
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def token_budget(model_id: str, stage: str, override: int = 0) -> int:
+    """Return the token budget for ``stage`` prompts sent to ``model_id``.
+
+    A positive ``override`` (for example from ``Context``) takes precedence.
+    Inference-profile ids get the budget of the model they route to.
+    """
+    if override > 0:
+        return override
+    model_id = _INFERENCE_PROFILE_PREFIX.sub("", model_id)
+    for prefix, budgets in MODEL_TOKEN_BUDGETS.items():
+        if model_id.startswith(prefix):
+            return budgets[stage]
+    return DEFAULT_TOKEN_BUDGETS[stage]
+
+
+@dataclass
+class Passage:
+    """A contiguous piece of one scraped page."""
+
+    page: int
+    position: int
+    text: str
+    tokens: int
+    score: float = 0.0
+
+
+def dedupe_passages(passages: List[Passage]) -> List[Passage]:
+    """Drop passages that are exact or near duplicates of an earlier passage."""
+    seen_exact: Set[str] = set()
+    index: Dict[int, List[int]] = {}
+    sketches: List[Tuple[int, ...]] = []
+    kept: List[Passage] = []
+    for passage in passages:
+        normalized = normalize_text(passage.text)
+        if normalized in seen_exact:
+            continue
+        sketch = bottom_k_sketch(normalized)
+        candidates = {i for h in sketch for i in index.get(h, ())}
+        if any(
+            sketch_similarity(sketch, sketches[i]) >= NEAR_DUPLICATE_SIMILARITY
+            for i in candidates
+        ):
+            continue
+        seen_exact.add(normalized)
+        for h in sketch:
+            index.setdefault(h, []).append(len(sketches))
+        sketches.append(sketch)
+        kept.append(passage)
+    return kept
+
+
+def score_passages(
+    passages: List[Passage], keyword: str, num_pages: int
+) -> List[Passage]:
+    """Set each passage's BM25 ``score`` for ``keyword`` and drop irrelevant pages.
+
+    Passages from pages whose best passage is below
+    ``PAGE_RELEVANCE_THRESHOLD`` are removed, unless no page reaches it.
+    """
+    passage_scores, page_scores = page_relevance(
+        [(p.page, p.text) for p in passages], num_pages, keyword
+    )
+    for passage, score in zip(passages, passage_scores):
+        passage.score = score
+    relevant = {
+        i for i, score in enumerate(page_scores) if score >= PAGE_RELEVANCE_THRESHOLD
+    }
+    if not relevant:
+        return passages
+    return [p for p in passages if p.page in relevant]
+
+
+def pack_pages(
+    pages: Iterable[Dict[str, str]],
+    keyword: str,
+    budget_tokens: int,
+    separator: str = "\n",
+) -> str:
+    """Pack the most relevant, non-duplicate passages of ``pages`` into a budget.
+
+    Failed fetches are ignored. Returns the selected passages in page order,
+    joined by ``separator``, using at most ``budget_tokens`` estimated tokens.
+    """
+    contents = [page["content"] for page in pages if not is_error(page)]
+    passages = [
+        Passage(page=i, position=j, text=text, tokens=estimate_tokens(text))
+        for i, content in enumerate(contents)
+        for j, text in enumerate(split_passages(content))
+    ]
+    passages = score_passages(dedupe_passages(passages), keyword, len(contents))
+
+    selected: List[Passage] = []
+    remaining = budget_tokens
+    # Ties favor passages that appear earlier on their page.
+    for passage in sorted(passages, key=lambda p: (-p.score, p.position)):
+        if passage.tokens <= remaining:
+            selected.append(passage)
+            remaining -= passage.tokens
+        if remaining <= 0:
+            break
+    selected.sort(key=lambda p: (p.page, p.position))
+    return separator.join(p.text for p in selected)
@@ -0,0 +1,171 @@
+"""Side store for scraped page bodies, referenced from graph state by id.
+
+Graph state only carries small :class:`PageRef` records; the extracted text
+lives here, content-addressed by its SHA-256. Checkpoints therefore stay the
+same size however much text a run scrapes, and nodes that do not read page
+text never copy it.
+
+The default store keeps bodies in memory, bounded by ``PAGE_STORE_MAX_BYTES``
+and evicting least recently used bodies first. ``PAGE_STORE=sqlite`` keeps
+them in a SQLite file next to the page cache instead, so a run resumed from a
+durable checkpoint in another process can still read its pages.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Protocol, TypedDict
+
+from react_agent.cache import PAGE_CACHE_DIR
+
+PAGE_STORE = os.getenv("PAGE_STORE", "memory")
+PAGE_STORE_MAX_BYTES = int(os.getenv("PAGE_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+PAGE_STORE_TTL = float(os.getenv("PAGE_STORE_TTL", str(7 * 24 * 60 * 60)))
+
+MISSING_BODY = "Error: page body is no longer in the page store"
+
+
+class PageRef(TypedDict):
+    """A scraped page as held in graph state."""
+
+    url: str
+    page_id: str
+
+
+class PageStore(Protocol):
+    """Content-addressed storage for page bodies."""
+
+    def put(self, content: str) -> str:
+        """Store ``content`` and return its id."""
+        ...
+
+    def get(self, page_id: str) -> Optional[str]:
+        """Return the content stored under ``page_id``, if still present."""
+        ...
+
+
+def content_id(content: str) -> str:
+    """Return the id a body is stored under."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+
+
+class MemoryPageStore:
+    """Keep bodies in a process-local LRU bounded by total UTF-8 size."""
+
+    def __init__(self, max_bytes: int = PAGE_STORE_MAX_BYTES) -> None:
+        """Create an empty store holding at most ``max_bytes`` of text."""
+        self.max_bytes = max_bytes
+        self._bodies: OrderedDict[str, str] = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, content: str) -> str:  # noqa: D102
+        page_id = content_id(content)
+        with self._lock:
+            if page_id in self._bodies:
+                self._bodies.move_to_end(page_id)
+                return page_id
+            size = len(content.encode("utf-8"))
+            self._bodies[page_id] = content
+            self._sizes[page_id] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._bodies) > 1:
+                evicted, _ = self._bodies.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+        return page_id
+
+    def get(self, page_id: str) -> Optional[str]:  # noqa: D102
+        with self._lock:
+            content = self._bodies.get(page_id)
+            if content is not None:
+                self._bodies.move_to_end(page_id)
+            return content
+
+
+class SqlitePageStore:
+    """Keep bodies in a SQLite file, dropping those older than ``ttl`` seconds."""
+
+    def __init__(
+        self, directory: str = PAGE_CACHE_DIR, ttl: float = PAGE_STORE_TTL
+    ) -> None:
+        """Open (or create) the store database in ``directory``."""
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, "bodies.sqlite3"), check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS bodies (id TEXT PRIMARY KEY, content TEXT, stored_at REAL)"
+        )
+        self._db.execute("DELETE FROM bodies WHERE stored_at < ?", (time.time() - ttl,))
+        self._db.commit()
+
+    def put(self, content: str) -> str:  # noqa: D102
+        page_id = content_id(content)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO bodies VALUES (?, ?, ?)",
+                (page_id, content, time.time()),
+            )
+            self._db.commit()
+        return page_id
+
+    def get(self, page_id: str) -> Optional[str]:  # noqa: D102
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content FROM bodies WHERE id = ?", (page_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+
+_store: Optional[PageStore] = None
+_store_lock = threading.Lock()
+
+
+def create_page_store(kind: str = PAGE_STORE) -> PageStore:
+    """Create the store named by ``kind`` (``"memory"`` or ``"sqlite"``)."""
+    if kind == "memory":
+        return MemoryPageStore()
+    if kind == "sqlite":
+        return SqlitePageStore()
+    raise ValueError(f"Unknown page store: {kind!r}")
+
+
+def get_page_store() -> PageStore:
+    """Return the process-wide page store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_page_store()
+        return _store
+
+
+def store_pages(pages: Iterable[Dict[str, str]]) -> List[PageRef]:
+    """Move the ``content`` of scraped ``pages`` into the store and return refs."""
+    store = get_page_store()
+    return [
+        PageRef(url=page["url"], page_id=store.put(page["content"])) for page in pages
+    ]
+
+
+def load_pages(refs: Iterable[PageRef]) -> List[Dict[str, str]]:
+    """Return ``{"url", "content"}`` pages for ``refs``.
+
+    A body that has been evicted comes back as an error page, which grading
+    and packing already skip.
+    """
+    store = get_page_store()
+    pages = []
+    for ref in refs:
+        content = store.get(ref["page_id"])
+        pages.append(
+            {"url": ref["url"], "content": MISSING_BODY if content is None else content}
+        )
+    return pages
@@ -0,0 +1,273 @@
+"""Process-wide politeness controls for outbound page fetches.
+
+Every graph run in the process shares one rate limiter per host, one
+robots.txt cache and one retry policy, so concurrent runs scraping the same
+popular site are throttled together instead of each sending its own burst:
+
+- each host has a token bucket, refilled at ``SCRAPE_HOST_RATE`` requests per
+  second (or per the robots.txt ``Crawl-delay``, when stricter); buckets of
+  the least recently used hosts are dropped beyond ``SCRAPE_MAX_HOST_BUCKETS``;
+- robots.txt is fetched once per host and cached for ``ROBOTS_CACHE_TTL``;
+- 429 and 5xx responses are retried with full-jitter exponential backoff,
+  honoring ``Retry-After``, and a 429 or 503 pauses the whole host.
+"""
+
+from __future__ import annotations
+
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import UTC
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from react_agent.cache import SingleFlight
+
+USER_AGENT = os.getenv(
+    "SCRAPE_USER_AGENT",
+    "Mozilla/5.0 (compatible; react-agent/0.0.1; research assistant)",
+)
+# Requests per second per host; 0 disables rate limiting.
+HOST_RATE = float(os.getenv("SCRAPE_HOST_RATE", "2"))
+HOST_BURST = int(os.getenv("SCRAPE_HOST_BURST", "4"))
+MAX_HOST_BUCKETS = int(os.getenv("SCRAPE_MAX_HOST_BUCKETS", "1024"))
+RESPECT_ROBOTS = os.getenv("SCRAPE_RESPECT_ROBOTS", "1") not in ("0", "false", "")
+ROBOTS_CACHE_TTL = float(os.getenv("ROBOTS_CACHE_TTL", str(6 * 60 * 60)))
+ROBOTS_TIMEOUT = float(os.getenv("ROBOTS_TIMEOUT", "3"))
+MAX_RETRIES = int(os.getenv("SCRAPE_MAX_RETRIES", "2"))
+BACKOFF_BASE = float(os.getenv("SCRAPE_BACKOFF_BASE", "0.5"))
+MAX_RETRY_AFTER = float(os.getenv("SCRAPE_MAX_RETRY_AFTER", "30"))
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+# Statuses that mean the host as a whole wants us to slow down.
+THROTTLE_STATUS = frozenset({429, 503})
+
+logger = logging.getLogger(__name__)
+
+
+class FetchCancelled(Exception):
+    """Raised when a fetch is cancelled while waiting for its host's rate limit."""
+
+
+class TokenBucket:
+    """A thread-safe token bucket that can also be paused until a time."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Allow ``rate`` acquisitions per second with bursts up to ``burst``."""
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float) -> None:
+        """Change the refill rate, for example to honor a ``Crawl-delay``."""
+        with self._lock:
+            self.rate = rate
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` from now."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(
+        self, deadline: float, cancel: Optional[threading.Event] = None
+    ) -> bool:
+        """Take one token, waiting at most until ``deadline`` (``time.monotonic()``).
+
+        Returns ``False`` without a token once ``deadline`` would pass or
+        ``cancel`` is set. A bucket with a non-positive rate never runs out,
+        but still honors :meth:`pause`.
+        """
+        cancel = cancel or threading.Event()
+        while not cancel.is_set():
+            with self._lock:
+                now = time.monotonic()
+                unlimited = self.rate <= 0
+                if not unlimited:
+                    self._tokens = min(
+                        self.burst, self._tokens + (now - self._updated) * self.rate
+                    )
+                self._updated = now
+                if now >= self._paused_until and (unlimited or self._tokens >= 1):
+                    self._tokens -= not unlimited
+                    return True
+                wait = max(
+                    self._paused_until - now,
+                    0.0 if unlimited else (1 - self._tokens) / self.rate,
+                    0.001,
+                )
+            if now + wait > deadline:
+                return False
+            cancel.wait(wait)
+        return False
+
+
+class RobotsCache:
+    """Fetch, parse and cache robots.txt per scheme and host."""
+
+    def __init__(
+        self, user_agent: str = USER_AGENT, ttl: float = ROBOTS_CACHE_TTL
+    ) -> None:
+        """Check rules for ``user_agent``, re-fetching each file after ``ttl`` seconds."""
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self._parsers: Dict[str, Tuple[float, RobotFileParser, float]] = {}
+        self._lock = threading.Lock()
+        self._in_flight = SingleFlight()
+
+    def _fetch(
+        self, origin: str, session: requests.Session, timeout: float
+    ) -> RobotFileParser:
+        robots_url = f"{origin}/robots.txt"
+        parser = RobotFileParser(robots_url)
+        try:
+            response = session.get(robots_url, timeout=timeout)
+            # A missing or failing robots.txt means no rules. Unlike RFC 9309
+            # a 5xx does not block the host; the retry policy and host rate
+            # limit still protect a struggling server.
+            parser.parse(
+                response.text.splitlines() if response.status_code < 400 else []
+            )
+        except requests.RequestException as e:
+            logger.debug("robots.txt fetch failed for %s: %s", origin, e)
+            parser.parse([])
+        delay = parser.crawl_delay(self.user_agent)
+        rate = 0.0
+        if delay:
+            rate = 1 / float(delay)
+            rate = min(HOST_RATE, rate) if HOST_RATE > 0 else rate
+            host_bucket(origin).set_rate(rate)
+        with self._lock:
+            self._parsers[origin] = (time.monotonic() + self.ttl, parser, rate)
+        return parser
+
+    def parser(
+        self, url: str, session: requests.Session, deadline: float
+    ) -> RobotFileParser:
+        """Return the parsed robots.txt governing ``url``, fetching it if needed."""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc.lower()}"
+        with self._lock:
+            cached = self._parsers.get(origin)
+        if cached and cached[0] > time.monotonic():
+            if cached[2]:
+                # The host's bucket may have been evicted since the fetch.
+                host_bucket(origin).set_rate(cached[2])
+            return cached[1]
+        timeout = min(ROBOTS_TIMEOUT, max(0.1, deadline - time.monotonic()))
+        return self._in_flight.do(origin, lambda: self._fetch(origin, session, timeout))
+
+    def allowed(self, url: str, session: requests.Session, deadline: float) -> bool:
+        """Return whether robots.txt lets ``user_agent`` fetch ``url``."""
+        return self.parser(url, session, deadline).can_fetch(self.user_agent, url)
+
+
+def retry_delay(response: requests.Response, attempt: int) -> float:
+    """Return how long to wait before retrying after ``response``.
+
+    A ``Retry-After`` header (seconds or an HTTP date, read as UTC when it
+    has no zone) wins, capped at ``MAX_RETRY_AFTER``; otherwise, or when the
+    header is malformed, the delay is drawn uniformly from
+    ``[0, BACKOFF_BASE * 2**attempt]`` ("full jitter").
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(MAX_RETRY_AFTER, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+        try:
+            parsed = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            logger.debug("Ignoring malformed Retry-After: %r", retry_after)
+        else:
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=UTC)
+            return min(MAX_RETRY_AFTER, max(0.0, parsed.timestamp() - time.time()))
+    return random.uniform(0, BACKOFF_BASE * 2**attempt)
+
+
+_lock = threading.Lock()
+_buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+_robots: Optional[RobotsCache] = None
+
+
+def host_bucket(url: str) -> TokenBucket:
+    """Return the process-wide token bucket for ``url``'s host.
+
+    At most ``MAX_HOST_BUCKETS`` buckets are kept; the least recently used
+    host's bucket is dropped to make room.
+    """
+    host = urlsplit(url).netloc.lower()
+    with _lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(HOST_RATE, HOST_BURST)
+            while len(_buckets) > MAX_HOST_BUCKETS:
+                _buckets.popitem(last=False)
+        else:
+            _buckets.move_to_end(host)
+        return bucket
+
+
+def get_robots_cache() -> Optional[RobotsCache]:
+    """Return the process-wide robots.txt cache, or ``None`` if robots are ignored."""
+    global _robots
+    if not RESPECT_ROBOTS:
+        return None
+    with _lock:
+        if _robots is None:
+            _robots = RobotsCache()
+        return _robots
+
+
+def send_with_retries(
+    send: Callable[[float], requests.Response],
+    url: str,
+    deadline: float,
+    cancel: threading.Event,
+) -> requests.Response:
+    """Send a request politely, retrying retryable statuses until ``deadline``.
+
+    ``send`` is called with the timeout to use and must return a response; it
+    is only called once a token for ``url``'s host is available. Retryable
+    responses are closed before the next attempt. The last response is
+    returned as-is once retries or time run out, so the caller decides how to
+    report it.
+
+    Raises:
+        TimeoutError: No token freed up before the deadline.
+        FetchCancelled: ``cancel`` was set while waiting for a token.
+    """
+    bucket = host_bucket(url)
+    attempt = 0
+    while True:
+        if not bucket.acquire(deadline, cancel):
+            if cancel.is_set():
+                raise FetchCancelled("fetch cancelled")
+            raise TimeoutError("host rate limit wait exceeded deadline")
+        timeout = max(0.1, deadline - time.monotonic())
+        response = send(timeout)
+        if response.status_code not in RETRYABLE_STATUS or attempt >= MAX_RETRIES:
+            return response
+        delay = retry_delay(response, attempt)
+        if response.status_code in THROTTLE_STATUS:
+            bucket.pause(delay)
+        if time.monotonic() + delay >= deadline:
+            return response
+        logger.info(
+            "Got %d from %s, retrying in %.2fs", response.status_code, url, delay
+        )
+        response.close()
+        if cancel.wait(delay):
+            return response
+        attempt += 1
@@ -3,3 +3,62 @@
 SYSTEM_PROMPT = """You are a helpful AI assistant.
 
 System time: {system_time}"""
+
+# Bump the *_VERSION constant whenever a template changes, so cached
+# responses produced with the old wording are no longer reused.
+
+ANALYSIS_PROMPT_VERSION = "1"
+ANALYSIS_PROMPT = (
+    "請扮演數據分析師。僅根據以下文本,提供簡潔的摘要(約200字)。"
+    "識別關鍵主題和整體情緒。"
+    "使用者原始查詢為: '{keyword}'。\n\n"
+    "--- 分析文本 ---\n"
+    "{text}"
+)
+
+REWRITE_PROMPT_VERSION = "1"
+REWRITE_PROMPT = """你是一個內容改寫專家。將提供給你的分析內容改寫為科技資訊風格的文章。
+
+科技資訊風格特點：
+1. 標題簡潔醒目
+2. 開頭直接點明主題
+3. 內容客觀準確但生動有趣
+4. 使用專業術語但解釋清晰
+5. 段落簡短，重點突出
+6. 使用繁體中文
+
+原始查詢: {keyword}
+
+分析內容:
+{analysis}
+
+參考資料摘要:
+{sources}
+
+請將上述分析改寫為一篇完整的科技資訊文章，包含:
+- 吸引人的標題
+- 引言段落
+- 主要內容（2-3個段落）
+- 總結
+"""
+
+GENERATE_ARTICLE_PROMPT_VERSION = "1"
+GENERATE_ARTICLE_PROMPT = """你是一位數據分析師兼科技資訊編輯。請僅根據以下文本完成兩項工作:
+
+1. analysis: 提供簡潔的摘要(約200字),識別關鍵主題和整體情緒。
+2. article: 將分析改寫為一篇完整的科技資訊風格文章 (Markdown),包含吸引人的標題、
+   引言段落、主要內容(2-3個段落)與總結。
+
+科技資訊風格特點：
+1. 標題簡潔醒目
+2. 開頭直接點明主題
+3. 內容客觀準確但生動有趣
+4. 使用專業術語但解釋清晰
+5. 段落簡短，重點突出
+6. 使用繁體中文
+
+使用者原始查詢為: '{keyword}'
+
+--- 分析文本 ---
+{text}
+"""
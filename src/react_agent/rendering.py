@@ -0,0 +1,296 @@
+"""HTML rendering of generated articles.
+
+The page shell, including its stylesheet, is split into static segments once
+at import time, so rendering a page is a single join of precomputed strings.
+
+Markdown is converted with pooled ``markdown.Markdown`` instances: building one
+loads every extension, so instances are built once and ``reset()`` between
+documents. ``markdown`` itself is imported when the first one is built.
+:class:`IncrementalMarkdownRenderer` renders a document block by block as its
+text streams in, for live previews; saved pages render the whole document.
+"""
+
+from __future__ import annotations
+
+import html
+import queue
+import re
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    import markdown  # type: ignore[import-untyped, unused-ignore]
+
+MARKDOWN_EXTENSIONS = ["extra", "nl2br", "sane_lists"]
+
+_FENCE = re.compile(r"^\s*(```|~~~)")
+# Lines that may continue the previous block after a blank line: indented
+# text, list items or quoted lines (splitting there would break a loose list
+# or a multi-paragraph blockquote in two).
+_CONTINUATION = re.compile(r"^(\s+\S|\s*([-*+]|\d+[.)])\s|\s*>)")
+
+_renderers: queue.SimpleQueue[markdown.Markdown] = queue.SimpleQueue()
+
+
+def render_markdown(text: str) -> str:
+    """Convert Markdown ``text`` to HTML using a pooled renderer."""
+    try:
+        md = _renderers.get_nowait()
+    except queue.Empty:
+        import markdown  # type: ignore[import-untyped, unused-ignore]
+
+        md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    try:
+        converted: str = md.reset().convert(text)
+        return converted
+    finally:
+        _renderers.put(md)
+
+
+def _complete_prefix(text: str) -> int:
+    """Return the length of the leading run of complete blocks in ``text``.
+
+    A block is complete once a blank line outside a code fence is followed by
+    a full line that cannot continue it.
+    """
+    in_fence = False
+    after_blank = False
+    split = 0
+    pos = 0
+    for line in text.splitlines(keepends=True):
+        if not in_fence and not line.strip():
+            after_blank = True
+        else:
+            if after_blank and not in_fence:
+                if line.endswith("\n") and not _CONTINUATION.match(line):
+                    split = pos
+                after_blank = False
+            if _FENCE.match(line):
+                in_fence = not in_fence
+        pos += len(line)
+    return split
+
+
+class IncrementalMarkdownRenderer:
+    """Render Markdown to HTML one block at a time as text arrives.
+
+    Each call to :meth:`feed` returns the HTML for blocks that became complete;
+    :meth:`close` renders whatever remains. Constructs that need the whole
+    document, such as reference-style links defined further down or
+    footnotes, are only resolved within a block, so the output is meant for
+    live display; render the finished document with :func:`render_markdown`.
+    """
+
+    def __init__(self) -> None:
+        """Start with an empty buffer."""
+        self._buffer = ""
+
+    def feed(self, text: str) -> str:
+        """Add streamed ``text`` and return HTML for any newly completed blocks."""
+        self._buffer += text
+        split = _complete_prefix(self._buffer)
+        if not split:
+            return ""
+        ready, self._buffer = self._buffer[:split], self._buffer[split:]
+        return render_markdown(ready) + "\n"
+
+    def close(self) -> str:
+        """Render and return the remaining buffered text."""
+        rest, self._buffer = self._buffer, ""
+        return render_markdown(rest) if rest.strip() else ""
+
+
+_HTML_SHELL = """<!DOCTYPE html>
+<html lang="zh-TW">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta name="generator" content="LangGraph ReAct Agent">
+    <meta name="keywords" content="$keyword">
+    <title>$keyword - 科技資訊文章</title>
+    <style>
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        body {
+            font-family: 'Segoe UI', 'Microsoft JhengHei', Arial, sans-serif;
+            line-height: 1.8;
+            color: #333;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 20px;
+        }
+        .container {
+            max-width: 900px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 12px;
+            box-shadow: 0 10px 40px rgba(0,0,0,0.1);
+            overflow: hidden;
+        }
+        .header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 40px;
+            text-align: center;
+        }
+        .header h1 {
+            font-size: 2.2em;
+            margin-bottom: 10px;
+            font-weight: 700;
+        }
+        .metadata {
+            background: #f8f9fa;
+            padding: 15px 40px;
+            border-bottom: 2px solid #e9ecef;
+            font-size: 0.9em;
+            color: #6c757d;
+        }
+        .metadata span {
+            margin-right: 20px;
+        }
+        .content {
+            padding: 40px;
+        }
+        .content h1 {
+            color: #667eea;
+            font-size: 2em;
+            margin: 30px 0 20px 0;
+            padding-bottom: 10px;
+            border-bottom: 3px solid #667eea;
+        }
+        .content h2 {
+            color: #764ba2;
+            font-size: 1.5em;
+            margin: 25px 0 15px 0;
+            padding-left: 15px;
+            border-left: 4px solid #764ba2;
+        }
+        .content h3 {
+            color: #495057;
+            font-size: 1.2em;
+            margin: 20px 0 10px 0;
+        }
+        .content p {
+            margin-bottom: 16px;
+            text-align: justify;
+        }
+        .content ul, .content ol {
+            margin: 15px 0 15px 30px;
+        }
+        .content li {
+            margin-bottom: 8px;
+        }
+        .content strong {
+            color: #667eea;
+            font-weight: 600;
+        }
+        .content code {
+            background: #f8f9fa;
+            padding: 2px 6px;
+            border-radius: 3px;
+            font-family: 'Courier New', monospace;
+            color: #e83e8c;
+        }
+        .content pre {
+            background: #f8f9fa;
+            padding: 15px;
+            border-radius: 5px;
+            overflow-x: auto;
+            margin: 15px 0;
+        }
+        .content blockquote {
+            border-left: 4px solid #667eea;
+            padding-left: 20px;
+            margin: 20px 0;
+            color: #6c757d;
+            font-style: italic;
+        }
+        .footer {
+            background: #f8f9fa;
+            padding: 20px 40px;
+            text-align: center;
+            color: #6c757d;
+            font-size: 0.9em;
+            border-top: 1px solid #e9ecef;
+        }
+        .badge {
+            display: inline-block;
+            padding: 5px 12px;
+            background: #667eea;
+            color: white;
+            border-radius: 20px;
+            font-size: 0.85em;
+            margin: 5px;
+        }
+        @media (max-width: 768px) {
+            body {
+                padding: 10px;
+            }
+            .container {
+                border-radius: 8px;
+            }
+            .header, .content {
+                padding: 20px;
+            }
+            .header h1 {
+                font-size: 1.6em;
+            }
+            .content h1 {
+                font-size: 1.5em;
+            }
+            .content h2 {
+                font-size: 1.2em;
+            }
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>$keyword</h1>
+            <div style="margin-top: 15px;">
+                <span class="badge">🔍 AI 搜尋</span>
+                <span class="badge">🤖 AI 分析</span>
+                <span class="badge">✍️ AI 改寫</span>
+            </div>
+        </div>
+        <div class="metadata">
+            <span>📅 生成時間: $generated_at</span>
+            <span>📦 文件格式: HTML</span>
+            <span>🌐 語言: 繁體中文</span>
+        </div>
+        <div class="content">
+$content
+        </div>
+        <div class="footer">
+            <p>🤖 由 <strong>LangGraph ReAct Agent</strong> 自動生成</p>
+            <p style="margin-top: 10px; font-size: 0.85em;">
+                技術支持: AWS Bedrock Claude 3.5 Sonnet | LangChain | LangGraph
+            </p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+# Alternating static text and placeholder names: [text, name, text, name, ..., text].
+_SHELL_PARTS: List[str] = re.split(r"\$(\w+)", _HTML_SHELL)
+
+
+def render_page(keyword: str, generated_at: str, content_html: str) -> str:
+    """Wrap rendered article HTML in the page shell.
+
+    Args:
+        keyword: The user's original query, used as the page title.
+        generated_at: Human-readable generation time shown in the metadata bar.
+        content_html: The article body, already rendered from Markdown.
+    """
+    values = {
+        "keyword": html.escape(keyword),
+        "generated_at": html.escape(generated_at),
+        "content": content_html,
+    }
+    parts = list(_SHELL_PARTS)
+    parts[1::2] = [values[name] for name in _SHELL_PARTS[1::2]]
+    return "".join(parts)
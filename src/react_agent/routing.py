@@ -0,0 +1,471 @@
+"""Per-node model routing with latency- and error-aware fallback.
+
+Each LLM node belongs to a tier (:data:`NODE_TIERS`), and each tier lists
+``provider/model`` names from :class:`~react_agent.context.Context` in order
+of preference:
+
+- ``strong``: ``model``, then ``fallback_model``;
+- ``fast``: ``fast_model``, then the ``strong`` list.
+
+The router keeps a rolling window of outcomes and time-to-first-token per
+model. When routing a call, models that were unhealthy over the window are
+moved to the end of the list. Unhealthy means more than ``MAX_ERROR_RATE`` of
+recent calls failed, or the recent p95 time to first token exceeded
+``Context.llm_first_token_slo_ms``. Samples older than ``STATS_TTL`` seconds
+are dropped, so a demoted model gets traffic again once it has been left
+alone for that long.
+
+A routed call starts the first model in the list. If that model fails before
+its first token, the next one starts. With ``llm_first_token_slo_ms`` set, a
+model that has produced no token within the SLO gets the next model started
+alongside it (a hedge). The first model to stream a token wins, and the
+others are stopped. A failure after the first token is not retried, because
+the tokens streamed so far have already been emitted. Non-streaming calls
+(the fused generation) fall back on errors only.
+
+Models without a native async client stream on the LLM pool (see
+:func:`react_agent.models.get_llm_executor`). A stopped model keeps its pool
+thread until its next chunk arrives, and that chunk can still reach
+LangGraph's ``messages`` stream mode. The ``custom`` stream mode only ever
+carries the winner's tokens.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from react_agent.instrumentation import LLM_CALLS, LLM_FIRST_TOKEN_SECONDS
+from react_agent.models import get_llm_executor, has_native_async
+from react_agent.packing import token_budget
+from react_agent.utils import load_chat_model
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.runnables import Runnable
+
+    from react_agent.context import Context
+
+NODE_TIERS = {
+    "analyze_content": "fast",
+    "rewrite_content": "strong",
+    "generate_article": "strong",
+}
+STATS_WINDOW = int(os.getenv("MODEL_STATS_WINDOW", "50"))
+STATS_TTL = float(os.getenv("MODEL_STATS_TTL", "300"))
+MIN_STATS_SAMPLES = int(os.getenv("MODEL_STATS_MIN_SAMPLES", "5"))
+MAX_ERROR_RATE = float(os.getenv("MODEL_MAX_ERROR_RATE", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_T = TypeVar("_T")
+
+
+def model_id(name: str) -> str:
+    """Return the model part of a ``provider/model`` name."""
+    return name.split("/", maxsplit=1)[-1]
+
+
+def tier_models(tier: str, context: Context) -> List[str]:
+    """Return the models of ``tier`` configured in ``context``, in order of preference."""
+    strong = [context.model, context.fallback_model]
+    names = [context.fast_model, *strong] if tier == "fast" else strong
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class ModelStats:
+    """Rolling outcomes and first-token latencies of one model."""
+
+    def __init__(self, window: int = STATS_WINDOW, ttl: float = STATS_TTL) -> None:
+        """Keep at most ``window`` samples of each kind, for at most ``ttl`` seconds."""
+        self.ttl = ttl
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._first_token: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(
+        self, ok: Optional[bool] = None, first_token: Optional[float] = None
+    ) -> None:
+        """Record a call outcome and/or a time to first token, in seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if ok is not None:
+                self._outcomes.append((now, ok))
+            if first_token is not None:
+                self._first_token.append((now, first_token))
+
+    def _recent(self, samples: Deque[Tuple[float, _T]]) -> List[_T]:
+        cutoff = time.monotonic() - self.ttl
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return [value for _, value in samples]
+
+    def error_rate(self) -> Optional[float]:
+        """Return the recent share of failed calls, or None with too few samples."""
+        with self._lock:
+            outcomes = self._recent(self._outcomes)
+        if len(outcomes) < MIN_STATS_SAMPLES:
+            return None
+        return outcomes.count(False) / len(outcomes)
+
+    def p95_first_token(self) -> Optional[float]:
+        """Return the recent p95 time to first token, or None with too few samples."""
+        with self._lock:
+            latencies = sorted(self._recent(self._first_token))
+        if len(latencies) < MIN_STATS_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def healthy(self, slo: Optional[float]) -> bool:
+        """Return whether the model is within the error budget and the first-token ``slo``."""
+        error_rate = self.error_rate()
+        if error_rate is not None and error_rate > MAX_ERROR_RATE:
+            return False
+        if not slo:
+            return True
+        p95 = self.p95_first_token()
+        return p95 is None or p95 <= slo
+
+
+class ModelRouter:
+    """Pick the models for each LLM call and keep their statistics."""
+
+    def __init__(self) -> None:
+        """Create a router with no statistics yet."""
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def stats(self, name: str) -> ModelStats:
+        """Return the statistics of model ``name``."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = ModelStats()
+            return stats
+
+    def record(
+        self,
+        name: str,
+        outcome: str,
+        first_token: Optional[float] = None,
+    ) -> None:
+        """Record a call to ``name`` ending in ``outcome`` (``ok``, ``error`` or ``cancelled``)."""
+        LLM_CALLS.inc(model_id(name), outcome)
+        ok = None if outcome == "cancelled" else outcome == "ok"
+        self.stats(name).record(ok=ok, first_token=first_token)
+
+    def route(self, node: str, context: Context, **model_kwargs: Any) -> Route:
+        """Return the route for ``node``'s call under ``context``.
+
+        ``model_kwargs`` (such as ``temperature``) are passed to every model.
+        """
+        configured = tier_models(NODE_TIERS.get(node, "strong"), context)
+        slo = context.llm_first_token_slo_ms / 1000 or None
+        healthy = {name: self.stats(name).healthy(slo) for name in configured}
+        models = sorted(configured, key=lambda name: not healthy[name])
+        if models[0] != configured[0]:
+            logger.info(
+                "Routing %s to %s: %s is over its error or latency budget",
+                node,
+                models[0],
+                configured[0],
+            )
+        return Route(
+            router=self,
+            models=models,
+            hedge_after=slo if len(models) > 1 else None,
+            model_kwargs=model_kwargs,
+        )
+
+
+@dataclass
+class Route:
+    """The models one LLM call may use, in order of preference."""
+
+    router: ModelRouter
+    models: List[str]
+    hedge_after: Optional[float] = None
+    model_kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def preferred(self) -> str:
+        """The model tried first."""
+        return self.models[0]
+
+    def model(self, index: int) -> BaseChatModel:
+        """Return the chat model for ``models[index]``."""
+        return load_chat_model(self.models[index], **self.model_kwargs)
+
+    def token_budget(self, stage: str, override: int = 0) -> int:
+        """Return a ``stage`` prompt budget that fits every model of the route."""
+        return min(
+            token_budget(model_id(name), stage, override) for name in self.models
+        )
+
+    def stream(self, prompt: Any) -> Iterator[Tuple[str, Any]]:
+        """Stream the answer to ``prompt`` as ``(model, chunk)`` pairs."""
+        return self._run(lambda model: model.stream(prompt), streaming=True)
+
+    def astream(self, prompt: Any) -> AsyncIterator[Tuple[str, Any]]:
+        """Async variant of :meth:`stream`."""
+        return self._arun(
+            lambda model: model.stream(prompt),
+            lambda model: model.astream(prompt),
+            streaming=True,
+        )
+
+    def invoke(
+        self, build: Callable[[BaseChatModel], Runnable[Any, Any]], prompt: Any
+    ) -> Tuple[str, Any]:
+        """Return ``(model, build(model).invoke(prompt))`` from the first model that succeeds."""
+
+        def iterate(model: BaseChatModel) -> Iterator[Any]:
+            yield build(model).invoke(prompt)
+
+        return list(self._run(iterate, streaming=False))[0]
+
+    async def ainvoke(
+        self, build: Callable[[BaseChatModel], Runnable[Any, Any]], prompt: Any
+    ) -> Tuple[str, Any]:
+        """Async variant of :meth:`invoke`."""
+
+        def iterate(model: BaseChatModel) -> Iterator[Any]:
+            yield build(model).invoke(prompt)
+
+        async def aiterate(model: BaseChatModel) -> AsyncIterator[Any]:
+            yield await build(model).ainvoke(prompt)
+
+        return [
+            answer async for answer in self._arun(iterate, aiterate, streaming=False)
+        ][0]
+
+    def _run(
+        self, iterate: Callable[[BaseChatModel], Iterator[Any]], streaming: bool
+    ) -> Iterator[Tuple[str, Any]]:
+        events: queue.SimpleQueue[Tuple[int, Any]] = queue.SimpleQueue()
+
+        def spawn(index: int) -> Callable[[], None]:
+            stop = threading.Event()
+            pump = _pump(iterate(self.model(index)), index, events.put, stop)
+            get_llm_executor().submit(contextvars.copy_context().run, pump)
+            return stop.set
+
+        race = _Race(self, spawn, streaming)
+        try:
+            while not race.done:
+                try:
+                    index, item = events.get(timeout=race.timeout())
+                except queue.Empty:
+                    race.hedge()
+                    continue
+                if race.accept(index, item):
+                    yield self.models[index], item
+        finally:
+            race.stop_all()
+
+    async def _arun(
+        self,
+        iterate: Callable[[BaseChatModel], Iterator[Any]],
+        aiterate: Callable[[BaseChatModel], AsyncIterator[Any]],
+        streaming: bool,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue[Tuple[int, Any]] = asyncio.Queue()
+
+        async def apump(chunks: AsyncIterator[Any], index: int) -> None:
+            try:
+                async for chunk in chunks:
+                    events.put_nowait((index, chunk))
+                events.put_nowait((index, _DONE))
+            except Exception as e:
+                events.put_nowait((index, e))
+
+        def spawn(index: int) -> Callable[[], None]:
+            model = self.model(index)
+            if has_native_async(model):
+                task = asyncio.create_task(apump(aiterate(model), index))
+
+                def cancel() -> None:
+                    task.cancel()
+
+                return cancel
+            stop = threading.Event()
+
+            def put(event: Tuple[int, Any]) -> None:
+                loop.call_soon_threadsafe(events.put_nowait, event)
+
+            pump = _pump(iterate(model), index, put, stop)
+            get_llm_executor().submit(contextvars.copy_context().run, pump)
+            return stop.set
+
+        race = _Race(self, spawn, streaming)
+        try:
+            while not race.done:
+                try:
+                    index, item = await asyncio.wait_for(events.get(), race.timeout())
+                except TimeoutError:
+                    race.hedge()
+                    continue
+                if race.accept(index, item):
+                    yield self.models[index], item
+        finally:
+            race.stop_all()
+
+
+def _pump(
+    chunks: Iterator[Any],
+    index: int,
+    put: Callable[[Tuple[int, Any]], None],
+    stop: threading.Event,
+) -> Callable[[], None]:
+    # Runs on the LLM pool; reports (index, chunk | exception | _DONE) events.
+    def pump() -> None:
+        try:
+            for chunk in chunks:
+                put((index, chunk))
+                if stop.is_set():
+                    return
+            put((index, _DONE))
+        except Exception as e:
+            put((index, e))
+
+    return pump
+
+
+class _Race:
+    """The candidates of one routed call, started in route order until one answers.
+
+    ``spawn(index)`` starts candidate ``index`` and returns a function that
+    stops it. The driver feeds every event to :meth:`accept` and calls
+    :meth:`hedge` when :meth:`timeout` expires.
+    """
+
+    def __init__(
+        self, route: Route, spawn: Callable[[int], Callable[[], None]], streaming: bool
+    ) -> None:
+        self.route = route
+        self.spawn = spawn
+        self.streaming = streaming
+        self.started: List[float] = []
+        self.stops: List[Callable[[], None]] = []
+        self.running: Set[int] = set()
+        self.winner: Optional[int] = None
+        self.done = False
+        self.start_next()
+
+    def start_next(self) -> bool:
+        index = len(self.started)
+        if index >= len(self.route.models):
+            return False
+        self.started.append(time.perf_counter())
+        self.running.add(index)
+        self.stops.append(self.spawn(index))
+        return True
+
+    def timeout(self) -> Optional[float]:
+        """Return the seconds until the next hedge, or None to wait for the next event."""
+        hedge_after = self.route.hedge_after if self.streaming else None
+        if hedge_after is None or self.winner is not None or not self.running:
+            return None
+        if len(self.started) >= len(self.route.models):
+            return None
+        return max(0.0, self.started[-1] + hedge_after - time.perf_counter())
+
+    def hedge(self) -> None:
+        slow = self.route.models[len(self.started) - 1]
+        if self.start_next():
+            logger.warning(
+                "%s has not answered within %.1fs; hedging with %s",
+                slow,
+                self.route.hedge_after,
+                self.route.models[len(self.started) - 1],
+            )
+
+    def accept(self, index: int, item: Any) -> bool:
+        """Handle one event; return whether ``item`` is a chunk of the answer."""
+        if index not in self.running:
+            # A stopped candidate delivering its last chunk.
+            return False
+        name = self.route.models[index]
+        if isinstance(item, Exception):
+            self.running.discard(index)
+            self.route.router.record(name, "error")
+            if self.winner is not None or self.running:
+                if self.winner is not None:
+                    raise item
+                logger.warning("%s failed, waiting for the hedge: %s", name, item)
+                return False
+            if not self.start_next():
+                raise item
+            logger.warning(
+                "%s failed, falling back to %s: %s",
+                name,
+                self.route.models[len(self.started) - 1],
+                item,
+            )
+            return False
+        if self.winner is None:
+            self.winner = index
+            elapsed = time.perf_counter() - self.started[index]
+            if self.streaming:
+                LLM_FIRST_TOKEN_SECONDS.observe(elapsed, model_id(name))
+                self.route.router.stats(name).record(first_token=elapsed)
+            self._stop_losers()
+        if item is _DONE:
+            self.running.discard(index)
+            self.route.router.record(name, "ok")
+            self.done = True
+            return False
+        return True
+
+    def _stop_losers(self) -> None:
+        for index in sorted(self.running - {self.winner}):
+            self.stops[index]()
+            self.running.discard(index)
+            # A candidate started before the winner was slower than it; its
+            # elapsed time is a lower bound on its time to first token.
+            slower = self.winner is not None and index < self.winner
+            elapsed = time.perf_counter() - self.started[index] if slower else None
+            self.route.router.record(
+                self.route.models[index], "cancelled", first_token=elapsed
+            )
+
+    def stop_all(self) -> None:
+        for index in self.running:
+            self.stops[index]()
+        self.running.clear()
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """Return the process-wide model router."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
@@ -0,0 +1,152 @@
+"""BM25 relevance scoring of scraped text against the search keyword.
+
+Pages are split into passages, passages are tokenized (Latin words as-is, CJK
+runs as overlapping character bigrams, since Chinese has no spaces to split
+on) and indexed in a small in-memory inverted index. CJK characters are also
+indexed on their own, so a one-character keyword still finds its passages.
+Scores are normalized
+to ``[0, 1)`` by the best score a passage could reach for the query, so one
+threshold works across keywords and page sets. The same scores decide the
+grade of a scrape and which passages are packed into LLM prompts.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+
+MAX_PASSAGE_CHARS = 600
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A page is relevant when its best passage reaches this normalized score,
+# which takes most query terms appearing together in one passage.
+PAGE_RELEVANCE_THRESHOLD = 0.3
+
+_TOKEN = re.compile(f"([{CJK_RANGES}]+)|[^\\W_{CJK_RANGES}]+")
+_SENTENCE_END = re.compile(r"(?<=[。！？!?.;；])\s+|(?<=[。！？；])")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split ``text`` into case-folded words and CJK character bigrams."""
+    tokens: List[str] = []
+    for match in _TOKEN.finditer(text.casefold()):
+        run = match.group()
+        if match.group(1) and len(run) > 1:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _cjk_characters(text: str) -> Iterator[str]:
+    # Characters of the CJK runs that tokenize() turns into bigrams; a
+    # one-character run is already a token of its own.
+    for match in _TOKEN.finditer(text.casefold()):
+        if match.group(1) and len(match.group()) > 1:
+            yield from match.group()
+
+
+def split_passages(text: str, max_chars: int = MAX_PASSAGE_CHARS) -> List[str]:
+    """Split ``text`` into passages of whole sentences up to ``max_chars`` long."""
+    passages: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            passages.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        passages.append(current)
+    return passages
+
+
+class BM25Index:
+    """An inverted index over a fixed set of documents, scored with Okapi BM25."""
+
+    def __init__(
+        self, documents: Iterable[str], k1: float = BM25_K1, b: float = BM25_B
+    ) -> None:
+        """Tokenize and index ``documents``; document ids are their positions.
+
+        Document lengths count words and bigrams only; single CJK characters
+        are indexed alongside for one-character query terms.
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+        for doc_id, text in enumerate(documents):
+            counts = Counter(tokenize(text))
+            self._lengths.append(sum(counts.values()))
+            counts.update(_cjk_characters(text))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((doc_id, tf))
+        self._avg_length = (
+            sum(self._lengths) / len(self._lengths) if self._lengths else 1.0
+        )
+
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self._lengths)
+
+    def idf(self, term: str) -> float:
+        """Return the (always positive) inverse document frequency of ``term``."""
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str, normalize: bool = True) -> List[float]:
+        """Return the BM25 score of every document for ``query``.
+
+        Only documents in the postings of a query term are visited. With
+        ``normalize``, scores are divided by the sum of ``idf * (k1 + 1)`` over
+        the query terms, the limit a document containing every term many times
+        approaches, so they fall in ``[0, 1)``.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        scores = [0.0] * len(self)
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings:
+                length_norm = (
+                    1 - self.b + self.b * self._lengths[doc_id] / self._avg_length
+                )
+                scores[doc_id] += (
+                    idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+                )
+        if normalize:
+            ideal = sum(self.idf(term) * (self.k1 + 1) for term in terms)
+            if ideal:
+                scores = [score / ideal for score in scores]
+        return scores
+
+
+def page_relevance(
+    passages: Sequence[Tuple[int, str]], num_pages: int, query: str
+) -> Tuple[List[float], List[float]]:
+    """Score ``(page, text)`` passages and their pages against ``query``.
+
+    Returns the normalized score of each passage and, for each of the
+    ``num_pages`` pages, the score of its best passage.
+    """
+    passage_scores = BM25Index(text for _, text in passages).scores(query)
+    page_scores = [0.0] * num_pages
+    for (page, _), score in zip(passages, passage_scores):
+        page_scores[page] = max(page_scores[page], score)
+    return passage_scores, page_scores
@@ -0,0 +1,286 @@
+"""Concurrent page fetching for the scrape stage of the graph.
+
+All graph runs in the process share one pooled HTTP session and one worker
+pool, so keep-alive connections to each host are reused across runs and the
+per-host concurrency cap holds globally rather than per run. Requests go
+through the politeness controls in :mod:`react_agent.politeness`: robots.txt,
+per-host rate limits and retries with backoff.
+
+:func:`ascrape_urls` submits to the same pool and awaits the results. The
+caller's event loop stays free while pages download, and no thread is held
+per run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from react_agent.cache import get_page_cache
+from react_agent.extract import extract_document
+from react_agent.instrumentation import (
+    EXTRACTED_CHARS,
+    FETCH_BYTES,
+    record_cache,
+    timed,
+)
+from react_agent.politeness import USER_AGENT, get_robots_cache, send_with_retries
+
+MAX_WORKERS = int(os.getenv("SCRAPE_MAX_WORKERS", "16"))
+PER_HOST_LIMIT = int(os.getenv("SCRAPE_PER_HOST_LIMIT", "2"))
+# Hosts whose keep-alive connection pools are retained at once.
+MAX_HOST_POOLS = int(os.getenv("SCRAPE_MAX_HOST_POOLS", "64"))
+REQUEST_TIMEOUT = float(os.getenv("SCRAPE_REQUEST_TIMEOUT", "15"))
+STAGE_DEADLINE = float(os.getenv("SCRAPE_STAGE_DEADLINE", "20"))
+MAX_PAGE_BYTES = int(os.getenv("SCRAPE_MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+MAX_PAGE_CHARS = int(os.getenv("SCRAPE_MAX_PAGE_CHARS", "20000"))
+# PDFs must be buffered whole to be parsed, so they get their own ceiling.
+MAX_PDF_BYTES = int(os.getenv("SCRAPE_MAX_PDF_BYTES", str(8 * 1024 * 1024)))
+CHUNK_SIZE = 16 * 1024
+HEADERS = {"User-Agent": USER_AGENT}
+# How often a fetch waiting for a host slot checks whether it was cancelled.
+SLOT_POLL_SECONDS = 0.05
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_executor: Optional[ThreadPoolExecutor] = None
+# Every fetch holding or waiting for a host's slot keeps its semaphore alive,
+# so the cap holds while a host is busy and idle hosts are not retained.
+_host_slots: weakref.WeakValueDictionary[str, threading.BoundedSemaphore] = (
+    weakref.WeakValueDictionary()
+)
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled HTTP session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=MAX_HOST_POOLS, pool_maxsize=PER_HOST_LIMIT
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="scrape"
+            )
+        return _executor
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc.lower()
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return slot
+
+
+def _acquire_slot(
+    slot: threading.BoundedSemaphore, deadline: float, cancel: threading.Event
+) -> bool:
+    # A semaphore cannot wait on the cancel event as well, so wait in short
+    # steps; a cancelled fetch then frees its pool thread promptly.
+    while not cancel.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if slot.acquire(timeout=min(remaining, SLOT_POLL_SECONDS)):
+            return True
+    return False
+
+
+def _chunks_until(
+    response: requests.Response, deadline: float, cancel: threading.Event
+) -> Iterator[bytes]:
+    received = 0
+    try:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            received += len(chunk)
+            yield chunk
+            if cancel.is_set() or time.monotonic() >= deadline:
+                return
+    finally:
+        FETCH_BYTES.observe(received)
+
+
+def fetch_page(
+    url: str, deadline: float, cancel: Optional[threading.Event] = None
+) -> Dict[str, str]:
+    """Fetch a single URL and stream its visible text through the extractor.
+
+    Waits for a free slot on the URL's host, but never past ``deadline``
+    (a ``time.monotonic()`` timestamp). Failures are reported in the
+    ``content`` field as ``"Error: ..."``, matching what downstream nodes expect;
+    that includes binary downloads and oversized PDFs, which are rejected from
+    their headers and first kilobyte (see :func:`extract_document`).
+    Fresh entries in the page cache are returned without touching the network;
+    stale entries are revalidated with a conditional request. URLs disallowed
+    by robots.txt are reported as errors without being requested. Setting
+    ``cancel`` stops a fetch that is waiting for a host slot or its rate
+    limit, still streaming or waiting to retry.
+    """
+    cancel = cancel or threading.Event()
+    page_cache = get_page_cache()
+    cached = page_cache.get(url) if page_cache else None
+    if page_cache:
+        record_cache("page", bool(cached and cached.is_fresh))
+    if cached and cached.is_fresh:
+        return {"url": url, "content": cached.content}
+
+    robots = get_robots_cache()
+    if robots and not robots.allowed(url, get_session(), deadline):
+        return {"url": url, "content": "Error: disallowed by robots.txt"}
+
+    slot = _host_slot(url)
+    if not _acquire_slot(slot, deadline, cancel):
+        if cancel.is_set():
+            return {"url": url, "content": "Error: fetch cancelled"}
+        return {"url": url, "content": "Error: no free connection slot before deadline"}
+    try:
+        if cancel.is_set():
+            return {"url": url, "content": "Error: fetch cancelled"}
+        headers = cached.validators() if cached else {}
+        session = get_session()
+
+        def send(timeout: float) -> requests.Response:
+            return session.get(
+                url, headers=headers, timeout=min(REQUEST_TIMEOUT, timeout), stream=True
+            )
+
+        with timed("fetch"), send_with_retries(send, url, deadline, cancel) as response:
+            if response.status_code == 304 and cached and page_cache:
+                page_cache.refresh(url)
+                return {"url": url, "content": cached.content}
+            response.raise_for_status()
+            content_length = response.headers.get("Content-Length", "")
+            text_content = extract_document(
+                _chunks_until(response, deadline, cancel),
+                content_type=response.headers.get("Content-Type", ""),
+                content_length=int(content_length)
+                if content_length.isdigit()
+                else None,
+                max_bytes=MAX_PAGE_BYTES,
+                max_pdf_bytes=MAX_PDF_BYTES,
+                max_chars=MAX_PAGE_CHARS,
+            )
+        EXTRACTED_CHARS.observe(len(text_content))
+        interrupted = cancel.is_set() or time.monotonic() >= deadline
+        if page_cache and not interrupted:
+            page_cache.put(
+                url,
+                text_content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return {"url": url, "content": text_content}
+    except Exception as e:
+        return {"url": url, "content": f"Error: {e}"}
+    finally:
+        slot.release()
+
+
+def scrape_urls(
+    urls: List[str],
+    deadline_seconds: float = STAGE_DEADLINE,
+    stop_when: Optional[Callable[[List[Dict[str, str]]], bool]] = None,
+) -> List[Dict[str, str]]:
+    """Fetch all ``urls`` concurrently and return their results in input order.
+
+    Pages that have not finished when the stage deadline expires are returned
+    as error entries so the partial result can still be graded.
+
+    If ``stop_when`` is given it is called with the pages received so far, in
+    arrival order, each time a page completes. Once it returns ``True`` the
+    outstanding fetches are cancelled and only the completed pages are returned.
+    """
+    deadline = time.monotonic() + deadline_seconds
+    executor = _get_executor()
+    cancel = threading.Event()
+    futures: Dict[str, Future[Dict[str, str]]] = {}
+    for url in dict.fromkeys(urls):
+        futures[url] = executor.submit(fetch_page, url, deadline, cancel)
+
+    arrived: List[Dict[str, str]] = []
+    stopped_early = False
+    try:
+        for future in as_completed(futures.values(), timeout=deadline_seconds):
+            arrived.append(future.result())
+            if stop_when is not None and stop_when(arrived):
+                stopped_early = True
+                break
+    except FuturesTimeoutError:
+        pass
+    finally:
+        cancel.set()
+        for future in futures.values():
+            future.cancel()
+    return _in_input_order(urls, arrived, stopped_early)
+
+
+async def ascrape_urls(
+    urls: List[str],
+    deadline_seconds: float = STAGE_DEADLINE,
+    stop_when: Optional[Callable[[List[Dict[str, str]]], bool]] = None,
+) -> List[Dict[str, str]]:
+    """Async variant of :func:`scrape_urls`."""
+    deadline = time.monotonic() + deadline_seconds
+    executor = _get_executor()
+    cancel = threading.Event()
+    futures = [
+        executor.submit(fetch_page, url, deadline, cancel)
+        for url in dict.fromkeys(urls)
+    ]
+
+    arrived: List[Dict[str, str]] = []
+    stopped_early = False
+    try:
+        pending = [asyncio.wrap_future(future) for future in futures]
+        for next_page in asyncio.as_completed(pending, timeout=deadline_seconds):
+            arrived.append(await next_page)
+            if stop_when is not None and stop_when(arrived):
+                stopped_early = True
+                break
+    except TimeoutError:
+        pass
+    finally:
+        cancel.set()
+        # Cancel the pool futures directly: cancelling the asyncio wrappers
+        # only reaches them on a later loop iteration, by which time a freed
+        # worker may already have started a queued fetch.
+        for future in futures:
+            future.cancel()
+    return _in_input_order(urls, arrived, stopped_early)
+
+
+def _in_input_order(
+    urls: List[str], arrived: List[Dict[str, str]], stopped_early: bool
+) -> List[Dict[str, str]]:
+    by_url = {page["url"]: page for page in arrived}
+    results = []
+    for url in urls:
+        if url in by_url:
+            results.append(by_url[url])
+        elif not stopped_early:
+            results.append({"url": url, "content": "Error: scrape deadline exceeded"})
+    return results
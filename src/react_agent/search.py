@@ -0,0 +1,124 @@
+"""Memoized web search used by the search stage of the graph.
+
+Results are cached per normalized query and ``max_results``, and concurrent
+runs asking the same query share a single in-flight DuckDuckGo request.
+DDGS has no async API, and is only imported on the first search.
+:func:`asearch_urls` answers cache hits on the event loop and sends only
+misses to a worker thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from react_agent.cache import SingleFlight, TTLCache
+from react_agent.instrumentation import record_cache, timed
+
+if TYPE_CHECKING:
+    from ddgs.ddgs import DDGS
+
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(30 * 60)))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+
+# Query rewrites used when the original keyword alone finds too little. The
+# first one is the sequential refine step; fan-out mode issues all of them.
+REFINED_QUERY_TEMPLATES = (
+    "{keyword} 應用與比較",
+    "{keyword} 最新發展",
+    "{keyword} 介紹",
+)
+RRF_K = 60
+
+search_cache: TTLCache[Tuple[str, ...]] = TTLCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+_in_flight = SingleFlight()
+_local = threading.local()
+
+
+def normalize_query(query: str) -> str:
+    """Return the cache form of ``query``: case-folded with collapsed whitespace."""
+    return " ".join(query.casefold().split())
+
+
+def _client() -> DDGS:
+    # DDGS holds an HTTP client; keep one per thread instead of one per call.
+    client = getattr(_local, "client", None)
+    if client is None:
+        from ddgs.ddgs import DDGS
+
+        client = _local.client = DDGS()
+    return client
+
+
+def _fetch(query: str, max_results: int) -> Tuple[str, ...]:
+    with timed("search"):
+        results = _client().text(query=query, max_results=max_results)
+    urls = tuple(result["href"] for result in results)
+    if urls:
+        search_cache.set((normalize_query(query), max_results), urls)
+    return urls
+
+
+def search_urls(query: str, max_results: int = 5) -> List[str]:
+    """Return result URLs for ``query``, served from cache when possible.
+
+    Empty result sets are not cached, since they usually indicate rate
+    limiting rather than a query with no matches. Errors propagate to every
+    caller sharing the in-flight request.
+    """
+    key = (normalize_query(query), max_results)
+    urls = search_cache.get(key)
+    record_cache("search", urls is not None)
+    if urls is None:
+        urls = _in_flight.do(key, lambda: _fetch(query, max_results))
+    return list(urls)
+
+
+async def asearch_urls(query: str, max_results: int = 5) -> List[str]:
+    """Async variant of :func:`search_urls`."""
+    key = (normalize_query(query), max_results)
+    urls = search_cache.get(key)
+    record_cache("search", urls is not None)
+    if urls is None:
+        urls = await asyncio.to_thread(
+            _in_flight.do, key, lambda: _fetch(query, max_results)
+        )
+    return list(urls)
+
+
+def query_variants(keyword: str) -> List[str]:
+    """Return ``keyword`` followed by its refined rewrites."""
+    return [keyword] + [t.format(keyword=keyword) for t in REFINED_QUERY_TEMPLATES]
+
+
+def _domain(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def fuse_rankings(
+    rankings: Sequence[Sequence[str]], limit: int, k: int = RRF_K
+) -> List[str]:
+    """Merge ranked URL lists with reciprocal rank fusion.
+
+    Each URL scores ``sum(1 / (k + rank))`` over the lists it appears in. Only
+    the best-scoring URL per domain is kept, and at most ``limit`` are returned.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, url in enumerate(ranking, start=1):
+            scores[url] = scores.get(url, 0.0) + 1.0 / (k + rank)
+    fused: List[str] = []
+    seen_domains = set()
+    for url in sorted(scores, key=scores.__getitem__, reverse=True):
+        domain = _domain(url)
+        if domain in seen_domains:
+            continue
+        seen_domains.add(domain)
+        fused.append(url)
+        if len(fused) == limit:
+            break
+    return fused
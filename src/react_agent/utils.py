@@ -1,9 +1,12 @@
 """Utility & helper functions."""
 
-from langchain.chat_models import init_chat_model
+from typing import Any
+
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage
 
+from react_agent.models import get_chat_model
+
 
 def get_message_text(msg: BaseMessage) -> str:
     """Get the text content of a message."""
@@ -17,11 +20,13 @@ def get_message_text(msg: BaseMessage) -> str:
         return "".join(txts).strip()
 
 
-def load_chat_model(fully_specified_name: str) -> BaseChatModel:
+def load_chat_model(fully_specified_name: str, **kwargs: Any) -> BaseChatModel:
     """Load a chat model from a fully specified name.
 
+    Models are cached process-wide, so repeated calls share one client.
+
     Args:
         fully_specified_name (str): String in the format 'provider/model'.
+        **kwargs: Model settings such as ``temperature`` and ``max_tokens``.
     """
-    provider, model = fully_specified_name.split("/", maxsplit=1)
-    return init_chat_model(model, model_provider=provider)
+    return get_chat_model(fully_specified_name, **kwargs)
@@ -0,0 +1,85 @@
+import importlib
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from react_agent.artifacts import (
+    BackgroundWriter,
+    LocalDirectorySink,
+    MemoryObjectStoreSink,
+)
+
+graph = importlib.import_module("react_agent.graph")
+
+
+class FailingSink(MemoryObjectStoreSink):
+    def write(self, name: str, data: bytes) -> str:
+        raise OSError("disk full")
+
+
+class BlockedSink(MemoryObjectStoreSink):
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, name: str, data: bytes) -> str:
+        self.release.wait(timeout=5)
+        return super().write(name, data)
+
+
+def test_local_sink_writes_atomically(tmp_path: Path) -> None:
+    sink = LocalDirectorySink(str(tmp_path))
+    path = sink.write("a.md", b"first")
+    sink.write("a.md", b"second")
+
+    assert Path(path).read_bytes() == b"second"
+    assert os.listdir(tmp_path) == ["a.md"]
+
+
+def test_background_writer_reports_failed_writes_on_flush() -> None:
+    writer = BackgroundWriter(MemoryObjectStoreSink())
+    assert writer.submit("a.md", b"data").result(timeout=5) == "memory://artifacts/a.md"
+    assert writer.flush() == {}
+
+    failing = BackgroundWriter(FailingSink())
+    future = failing.submit("a.md", b"data")
+    failures = failing.flush()
+    assert isinstance(failures["memory://artifacts/a.md"], OSError)
+    assert isinstance(future.exception(), OSError)
+    assert failing.flush() == {}
+
+
+STATE = {"original_keyword": "AI 晶片", "rewritten_content": "# 標題\n\n內文"}
+
+
+def test_write_nodes_return_without_waiting_for_the_write(monkeypatch: Any) -> None:
+    blocked = BlockedSink()
+    writer = BackgroundWriter(blocked)
+    monkeypatch.setattr(graph, "get_artifact_writer", lambda: writer)
+
+    update = graph.write_file_node(STATE)
+    html_update = graph.render_html_node({**STATE, **update})
+
+    assert update["file_saved"] is None
+    assert update["output_file"].endswith(".md")
+    assert html_update["html_file"].endswith(".html")
+    assert blocked.objects == {}
+    blocked.release.set()
+    assert writer.flush() == {}
+    assert sorted(name.rsplit(".", 1)[1] for name in blocked.objects) == ["html", "md"]
+
+
+def test_write_node_reports_artifacts_that_cannot_be_queued(monkeypatch: Any) -> None:
+    class Unqueueable:
+        sink = MemoryObjectStoreSink()
+
+        def submit(self, name: str, data: bytes) -> Any:
+            raise RuntimeError("writer stopped")
+
+    monkeypatch.setattr(graph, "get_artifact_writer", Unqueueable)
+
+    update = graph.write_file_node(STATE)
+    assert update["file_saved"] is False
+    assert "output_file" not in update
+    assert "html_file" not in graph.render_html_node({**STATE, **update})
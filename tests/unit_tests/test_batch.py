@@ -0,0 +1,120 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph
+from typing_extensions import TypedDict
+
+from react_agent import batch
+from react_agent.batch import BatchRunner, completed_keywords, read_keywords
+from react_agent.context import Context
+
+
+class FakeGraph:
+    """Return canned final states and record the context of every run."""
+
+    def __init__(self, states: List[Dict[str, Any]]) -> None:
+        self.states = states
+        self.contexts: List[Optional[Context]] = []
+
+    def invoke(
+        self, inputs: Dict[str, Any], context: Optional[Context] = None
+    ) -> Dict[str, Any]:
+        self.contexts.append(context)
+        return self.states.pop(0)
+
+
+def test_read_keywords_dedupes_and_accepts_strings_and_objects(tmp_path: Path) -> None:
+    path = tmp_path / "keywords.jsonl"
+    path.write_text('"a"\n{"keyword": " b "}\n\n"a"\n', encoding="utf-8")
+
+    assert read_keywords(str(path)) == ["a", "b"]
+
+
+def test_completed_keywords_skips_failures_and_torn_lines(tmp_path: Path) -> None:
+    path = tmp_path / "results.jsonl"
+    path.write_text(
+        json.dumps({"keyword": "a", "status": "ok"})
+        + "\n"
+        + json.dumps({"keyword": "b", "status": "error"})
+        + '\n{"keyword": "c", "sta',
+        encoding="utf-8",
+    )
+
+    assert completed_keywords(str(path)) == {"a"}
+
+
+def test_run_one_counts_runs_without_an_article_as_failed(tmp_path: Path) -> None:
+    graph = FakeGraph(
+        [
+            {"error": "Web search failed: boom", "urls": []},
+            {"grade": "good"},
+            {"grade": "good", "output_file": "out/a.md"},
+        ]
+    )
+    runner = BatchRunner(graph, str(tmp_path), context=Context(fail_fast=False))
+
+    searched = runner.run_one("a")
+    unsaved = runner.run_one("b")
+    saved = runner.run_one("c")
+
+    assert searched["status"] == "error"
+    assert searched["error"] == "Web search failed: boom"
+    assert unsaved["status"] == "error"
+    assert unsaved["error"] == "no article was written"
+    assert saved["status"] == "ok"
+    assert all(context is not None and context.fail_fast for context in graph.contexts)
+    assert completed_keywords(runner.results_path) == {"c"}
+
+
+class State(TypedDict, total=False):
+    messages: List[Any]
+    error: str
+    output_file: str
+
+
+def test_failed_checkpointed_run_starts_over_on_the_next_batch(tmp_path: Path) -> None:
+    calls: List[str] = []
+
+    def search(state: State) -> State:
+        calls.append("search")
+        if len(calls) == 1:
+            return {"error": "Web search failed: boom"}
+        return {"output_file": "out/a.md"}
+
+    builder = StateGraph(State)
+    builder.add_node("search", search)
+    builder.set_entry_point("search")
+    graph = builder.compile(checkpointer=InMemorySaver())
+    runner = BatchRunner(graph, str(tmp_path))
+
+    assert runner.run_one("a")["status"] == "error"
+    assert runner.run_one("a")["status"] == "ok"
+    assert runner.run_one("a")["status"] == "ok"
+    assert calls == ["search", "search"]
+
+
+class FailedWrites:
+    def flush(self) -> Dict[str, Exception]:
+        return {"out/b.html": OSError("disk full")}
+
+
+def test_failed_artifact_writes_fail_their_keyword(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(batch, "get_artifact_writer", FailedWrites)
+    graph = FakeGraph(
+        [
+            {"grade": "good", "output_file": "out/a.md", "html_file": "out/a.html"},
+            {"grade": "good", "output_file": "out/b.md", "html_file": "out/b.html"},
+        ]
+    )
+    runner = BatchRunner(graph, str(tmp_path))
+
+    summary = runner.run(["a", "b"])
+
+    assert summary["succeeded"] == 1
+    assert summary["failed"] == ["b"]
+    assert completed_keywords(runner.results_path) == {"a"}
@@ -0,0 +1,99 @@
+import os
+import time
+from pathlib import Path
+
+from react_agent.cache import PageCache, ResponseCache, normalize_url
+
+
+def test_normalize_url_drops_noise() -> None:
+    assert (
+        normalize_url("HTTPS://Example.COM:443/a?b=2&utm_source=x&a=1#section")
+        == "https://example.com/a?a=1&b=2"
+    )
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+
+
+def test_page_cache_round_trip(tmp_path: Path) -> None:
+    cache = PageCache(str(tmp_path), max_bytes=1024)
+    assert cache.get("https://example.com/a") is None
+
+    cache.put("https://example.com/a", "body", etag='"v1"', last_modified="yesterday")
+    page = cache.get("https://EXAMPLE.com/a?utm_medium=mail")
+
+    assert page is not None
+    assert page.content == "body"
+    assert page.is_fresh
+    assert page.validators() == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "yesterday",
+    }
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_page_cache_refresh_makes_stale_entry_fresh(tmp_path: Path) -> None:
+    cache = PageCache(str(tmp_path), max_bytes=1024)
+    cache.put("https://example.com/a", "body", etag='"v1"')
+    cache._db.execute("UPDATE pages SET fetched_at = 0")
+
+    stale = cache.get("https://example.com/a")
+    assert stale is not None and not stale.is_fresh
+
+    cache.refresh("https://example.com/a")
+    fresh = cache.get("https://example.com/a")
+    assert fresh is not None and fresh.is_fresh
+    assert cache.stats()["revalidations"] == 1
+
+
+def test_page_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = PageCache(str(tmp_path), max_bytes=10)
+    cache.put("https://example.com/a", "aaaa")
+    time.sleep(0.01)
+    cache.put("https://example.com/b", "bbbb")
+    time.sleep(0.01)
+    cache.get("https://example.com/a")
+    time.sleep(0.01)
+    cache.put("https://example.com/c", "cccc")
+
+    assert cache.get("https://example.com/b") is None
+    assert cache.get("https://example.com/a") is not None
+    assert cache.get("https://example.com/c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert os.path.exists(tmp_path / "pages.sqlite3")
+
+
+def test_response_cache_is_scoped_by_model_prompt_version_and_scope() -> None:
+    cache = ResponseCache(maxsize=8, ttl=60)
+    cache.put("model-a", "v1", "Some  source text", "answer", scope="kw")
+
+    assert cache.get("model-a", "v1", "some source text", scope="kw") == "answer"
+    assert cache.get("model-b", "v1", "some source text", scope="kw") is None
+    assert cache.get("model-a", "v2", "some source text", scope="kw") is None
+    assert cache.get("model-a", "v1", "some source text", scope="other") is None
+
+
+def test_response_cache_expires_and_evicts() -> None:
+    expired = ResponseCache(maxsize=8, ttl=0.01)
+    expired.put("m", "v1", "text", "answer")
+    time.sleep(0.02)
+    assert expired.get("m", "v1", "text") is None
+
+    cache = ResponseCache(maxsize=2, ttl=60)
+    for text in ("a", "b", "c"):
+        cache.put("m", "v1", text, text.upper())
+    assert cache.get("m", "v1", "a") is None
+    assert cache.get("m", "v1", "c") == "C"
+
+
+def test_response_cache_near_duplicate_lookup() -> None:
+    base = " ".join(f"word{i}" for i in range(300))
+    cache = ResponseCache(maxsize=8, ttl=60, near_duplicate=True, threshold=0.8)
+    cache.put("m", "v1", base, "answer", scope="kw")
+
+    assert cache.get("m", "v1", base + " word300", scope="kw") == "answer"
+    assert cache.get("m", "v1", base + " word300", scope="other") is None
+    assert (
+        cache.get("m", "v1", " ".join(f"other{i}" for i in range(300)), scope="kw")
+        is None
+    )
+    assert cache.stats()["near_hits"] == 1
@@ -0,0 +1,86 @@
+import importlib
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph
+from typing_extensions import TypedDict
+
+from react_agent import checkpointing
+from react_agent.checkpointing import (
+    create_checkpointer,
+    pending_nodes,
+    resume,
+    run_or_resume,
+)
+
+
+class State(TypedDict, total=False):
+    keyword: str
+    analysis: str
+    article: str
+
+
+def build_graph(calls: List[str], failures: Dict[str, int]) -> Any:
+    def node(name: str, key: str) -> Any:
+        def run(state: State) -> Dict[str, str]:
+            calls.append(name)
+            if failures.get(name, 0) > 0:
+                failures[name] -= 1
+                raise RuntimeError(f"{name} failed")
+            return {key: f"{name}({state['keyword']})"}
+
+        return run
+
+    builder = StateGraph(State)
+    builder.add_node("analyze", node("analyze", "analysis"))
+    builder.add_node("rewrite", node("rewrite", "article"))
+    builder.set_entry_point("analyze")
+    builder.add_edge("analyze", "rewrite")
+    return builder.compile(checkpointer=InMemorySaver())
+
+
+def test_resume_reruns_only_the_failed_node() -> None:
+    calls: List[str] = []
+    graph = build_graph(calls, {"rewrite": 1})
+
+    assert pending_nodes(graph, "t") is None
+    with pytest.raises(RuntimeError, match="rewrite failed"):
+        run_or_resume(graph, {"keyword": "AI"}, "t")
+    assert pending_nodes(graph, "t") == ("rewrite",)
+
+    state = run_or_resume(graph, {"keyword": "ignored"}, "t")
+
+    assert state["article"] == "rewrite(AI)"
+    assert calls == ["analyze", "rewrite", "rewrite"]
+    assert pending_nodes(graph, "t") == ()
+
+
+def test_finished_threads_return_their_final_state_without_running() -> None:
+    calls: List[str] = []
+    graph = build_graph(calls, {})
+    first = run_or_resume(graph, {"keyword": "AI"}, "t")
+
+    assert resume(graph, "t") == first
+    assert calls == ["analyze", "rewrite"]
+
+
+def test_resume_without_a_checkpoint_raises() -> None:
+    with pytest.raises(ValueError, match="No checkpoint"):
+        resume(build_graph([], {}), "missing")
+
+
+def test_create_checkpointer(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    assert isinstance(create_checkpointer("memory"), InMemorySaver)
+    with pytest.raises(ValueError, match="Unknown checkpointer"):
+        create_checkpointer("redis")
+
+    monkeypatch.setitem(sys.modules, "langgraph.checkpoint.sqlite", None)
+    # The default works without the checkpoint extra; asking for sqlite does not.
+    monkeypatch.delenv("CHECKPOINTER", raising=False)
+    default = importlib.reload(checkpointing).create_checkpointer()
+    assert isinstance(default, InMemorySaver)
+    with pytest.raises(ImportError, match="langgraph-checkpoint-sqlite"):
+        create_checkpointer("sqlite", str(tmp_path / "checkpoints.sqlite3"))
@@ -0,0 +1,81 @@
+import importlib
+
+import pytest
+
+from react_agent.context import Context
+from react_agent.dedup import MIN_REPEATED_SENTENCE_CHARS, dedupe_pages
+from react_agent.instrumentation import DEDUP_SAVED_BYTES
+
+graph = importlib.import_module("react_agent.graph")
+
+ARTICLE = "".join(
+    f"第{i}段:台灣的茶文化歷史悠久,烏龍茶與高山茶聞名世界。" for i in range(80)
+)
+OTHER = "".join(f"第{i}項:今天的天氣晴朗,適合出門散步與運動。" for i in range(40))
+
+
+def test_near_duplicate_pages_keep_the_first_copy() -> None:
+    pages = [
+        {"url": "a", "content": ARTICLE},
+        {"url": "b", "content": ARTICLE + "轉載自某新聞網。"},
+        {"url": "c", "content": OTHER},
+    ]
+
+    kept, stats = dedupe_pages(pages)
+
+    assert [page["url"] for page in kept] == ["a", "c"]
+    assert stats.pages_in == 3
+    assert stats.duplicate_pages == 1
+    assert stats.bytes_saved > 0
+    assert stats.tokens_saved > 0
+
+
+def test_repeated_sentences_are_removed_from_later_pages() -> None:
+    boilerplate = "訂閱我們的電子報以取得最新的科技新聞。"
+    assert len(boilerplate) >= MIN_REPEATED_SENTENCE_CHARS
+    pages = [
+        {"url": "a", "content": ARTICLE + boilerplate},
+        {"url": "b", "content": boilerplate + OTHER + "是的。是的。"},
+    ]
+
+    kept, stats = dedupe_pages(pages)
+
+    assert kept[0]["content"].endswith(boilerplate)
+    assert boilerplate not in kept[1]["content"]
+    assert kept[1]["content"].endswith("是的。是的。")
+    assert stats.repeated_sentences == 1
+
+
+def test_failed_fetches_pass_through() -> None:
+    pages = [
+        {"url": "a", "content": "Error: timed out"},
+        {"url": "b", "content": "Error: timed out"},
+    ]
+
+    kept, stats = dedupe_pages(pages)
+
+    assert kept == pages
+    assert stats.duplicate_pages == 0
+
+
+def test_trial_passes_do_not_record_metrics() -> None:
+    before = DEDUP_SAVED_BYTES.snapshot()
+    dedupe_pages([{"url": "a", "content": ARTICLE}] * 2, record_metrics=False)
+    assert DEDUP_SAVED_BYTES.snapshot() == before
+
+    dedupe_pages([{"url": "a", "content": ARTICLE}] * 2)
+    assert DEDUP_SAVED_BYTES.snapshot()[0] == before[0] + 1
+
+
+def test_scrape_stop_condition_grades_deduplicated_pages(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(graph, "get_context", lambda: Context(scrape_early_exit=True))
+    enough = graph.scrape_stop_condition({"original_keyword": "茶"})
+    half = ARTICLE[: len(ARTICLE) // 2]
+    copies = [{"url": "a", "content": half}, {"url": "b", "content": half}]
+
+    # Two copies of one page are enough before de-duplication, but not after.
+    assert graph.grade_pages(copies, "茶") == "good"
+    assert not enough(copies)
+    assert enough([{"url": "a", "content": ARTICLE}])
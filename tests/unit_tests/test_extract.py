@@ -0,0 +1,134 @@
+import codecs
+import sys
+from typing import Iterator, List, Optional
+
+import pytest
+
+from react_agent.extract import (
+    UnsupportedContent,
+    extract_document,
+    extract_text,
+    sniff_encoding,
+    sniff_kind,
+)
+
+
+def chunked(data: bytes, size: int) -> Iterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+PAGE = (
+    "<html><head><title>t</title><style>p { color: red }</style></head><body>"
+    "<nav>Home | About</nav><header>Site</header>"
+    "<p>生成式 AI 晶片</p><script>var x = '<p>hidden</p>';</script>"
+    "<p>Second   paragraph<br/>continues</p><footer>Copyright</footer>"
+    "</body></html>"
+).encode("utf-8")
+
+
+def test_extract_text_keeps_visible_body_text() -> None:
+    text = extract_text([PAGE], "utf-8", max_bytes=1 << 20, max_chars=1000)
+    assert text == "t 生成式 AI 晶片 Second paragraph continues"
+
+
+def test_pages_wrapped_in_a_form_keep_their_text() -> None:
+    # ASP.NET WebForms pages put the whole body inside one <form>.
+    page = b'<body><form id="aspnetForm"><input type="hidden"/><p>Article text</p></form></body>'
+    assert (
+        extract_text([page], "utf-8", max_bytes=1 << 20, max_chars=1000)
+        == "Article text"
+    )
+
+
+def test_headers_are_kept_inside_the_content_only() -> None:
+    page = (
+        b"<body><header>Site name</header><main><article>"
+        b"<header><h1>Headline</h1></header><p>Body</p></article></main>"
+        b"<header>Trailing banner</header></body>"
+    )
+    assert (
+        extract_text([page], "utf-8", max_bytes=1 << 20, max_chars=1000)
+        == "Headline Body"
+    )
+
+
+def test_extract_text_is_independent_of_chunk_boundaries() -> None:
+    whole = extract_text([PAGE], "utf-8", max_bytes=1 << 20, max_chars=1000)
+    for size in (1, 3, 7, 64):
+        assert extract_text(chunked(PAGE, size), "utf-8", 1 << 20, 1000) == whole
+
+
+def test_extract_text_stops_reading_at_the_limits() -> None:
+    read: List[bytes] = []
+
+    def tracked() -> Iterator[bytes]:
+        for chunk in chunked(b"<p>word</p>" * 1000, 100):
+            read.append(chunk)
+            yield chunk
+
+    text = extract_text(tracked(), "utf-8", max_bytes=1 << 20, max_chars=20)
+    assert len(text) <= 20
+    assert len(read) < 5
+
+    truncated = extract_text(
+        [b"<p>" + b"a" * 100 + b"</p>"], "utf-8", max_bytes=10, max_chars=1000
+    )
+    assert truncated == "a" * 7
+
+
+def test_sniff_encoding_order() -> None:
+    meta = b'<html><head><meta charset="big5"></head>'
+    assert sniff_encoding("text/html; charset=gbk", meta) == "gbk"
+    assert sniff_encoding("text/html", meta) == "big5"
+    assert sniff_encoding("text/html", b"\xef\xbb\xbf<html>") == "utf-8-sig"
+    assert sniff_encoding("text/html; charset=bogus", b"") == "utf-8"
+    assert sniff_encoding("text/html", b"<html>") == "utf-8"
+
+
+def test_sniff_kind_uses_the_body_for_generic_types() -> None:
+    assert sniff_kind("text/html; charset=utf-8", b"") == "html"
+    assert sniff_kind("application/pdf", b"") == "pdf"
+    assert sniff_kind("image/png", b"<html>") is None
+    assert (
+        sniff_kind("application/octet-stream", codecs.BOM_UTF8 + b"  %PDF-1.7") == "pdf"
+    )
+    assert sniff_kind("", b"<!DOCTYPE html><html>") == "html"
+    assert sniff_kind("", b"\x89PNG\r\n\x1a\n\x00\x00") is None
+    assert sniff_kind("", b"plain words") == "text"
+
+
+def extract(
+    chunks: List[bytes], content_type: str, content_length: Optional[int] = None
+) -> str:
+    return extract_document(
+        chunks,
+        content_type,
+        content_length,
+        max_bytes=1 << 20,
+        max_pdf_bytes=1 << 10,
+        max_chars=50,
+    )
+
+
+def test_extract_document_routes_by_kind() -> None:
+    assert (
+        extract(list(chunked(PAGE, 5)), "text/html")
+        == "t 生成式 AI 晶片 Second paragraph continues"
+    )
+    assert extract([b"plain   text\n\nhere"], "") == "plain text here"
+    assert extract([b"x " * 100], "text/plain") == "x " * 25
+
+
+def test_extract_document_rejects_binary_and_oversized_pdfs() -> None:
+    with pytest.raises(UnsupportedContent, match="image/png"):
+        extract([b"\x89PNG"], "image/png")
+    with pytest.raises(UnsupportedContent, match="exceeds"):
+        extract([b"%PDF-1.7"], "application/pdf", content_length=1 << 20)
+
+
+def test_pdf_without_pypdf_is_unsupported(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(sys.modules, "pypdf", None)
+
+    with pytest.raises(UnsupportedContent, match="pypdf"):
+        extract([b"%PDF-1.7"], "", content_length=None)
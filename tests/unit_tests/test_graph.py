@@ -0,0 +1,355 @@
+import importlib
+import json
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from langgraph.checkpoint.memory import InMemorySaver
+
+from react_agent import routing
+from react_agent.context import Context
+from react_agent.pagestore import store_pages
+from react_agent.rendering import IncrementalMarkdownRenderer, render_markdown
+from react_agent.routing import ModelRouter, Route
+from react_agent.search import query_variants
+
+graph = importlib.import_module("react_agent.graph")
+
+
+class ContentBlockChatModel(BaseChatModel):
+    """Streams ``text`` as lists of content blocks, like Bedrock Converse."""
+
+    text: str
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-content-blocks"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        raise NotImplementedError
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for line in self.text.splitlines(keepends=True):
+            block = {"type": "text", "text": line, "index": 0}
+            yield ChatGenerationChunk(message=AIMessageChunk(content=[block]))
+
+
+@pytest.fixture
+def stream_events(monkeypatch: pytest.MonkeyPatch) -> List[Dict[str, str]]:
+    events: List[Dict[str, str]] = []
+    monkeypatch.setattr(graph, "get_stream_writer", lambda: events.append)
+    monkeypatch.setattr(
+        graph, "get_config", lambda: {"metadata": {"langgraph_node": "rewrite"}}
+    )
+    monkeypatch.setattr(graph, "get_response_cache", lambda: None)
+    return events
+
+
+@pytest.fixture
+def llm_request(
+    monkeypatch: pytest.MonkeyPatch, stream_events: List[Dict[str, str]]
+) -> Any:
+    model = ContentBlockChatModel(text="# 標題\n\n第一段。\n")
+    monkeypatch.setattr(routing, "load_chat_model", lambda name, **kwargs: model)
+    route = Route(router=ModelRouter(), models=["fake/blocks"])
+    return graph.LLMRequest(route, "prompt", "v1", "input", "scope")
+
+
+def test_importing_the_package_does_not_build_the_graph() -> None:
+    code = (
+        "import sys, react_agent, react_agent.context; "
+        "assert 'react_agent.graph' not in sys.modules, 'graph imported'"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_package_exports_the_compiled_graph_lazily() -> None:
+    code = (
+        "import sys, react_agent; "
+        "assert 'react_agent.graph' not in sys.modules; "
+        "from react_agent import graph; "
+        "from langgraph.graph.state import CompiledStateGraph; "
+        "assert isinstance(graph, CompiledStateGraph), type(graph); "
+        "assert react_agent.graph is graph is sys.modules['react_agent.graph'].app; "
+        "assert react_agent.__all__ == ['graph']"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_app_is_compiled_once_on_first_access() -> None:
+    assert graph.app is graph.graph is graph.compile_graph()
+    with pytest.raises(AttributeError):
+        graph.missing
+
+
+@pytest.mark.anyio
+async def test_async_nodes_build_requests_off_the_event_loop(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    loop_thread = threading.current_thread()
+    threads: List[threading.Thread] = []
+
+    def no_content(state: Any) -> None:
+        threads.append(threading.current_thread())
+        return None
+
+    def failing(state: Any) -> None:
+        threads.append(threading.current_thread())
+        raise RuntimeError("no model")
+
+    monkeypatch.setattr(graph, "analysis_request", no_content)
+    monkeypatch.setattr(graph, "generation_request", no_content)
+    monkeypatch.setattr(graph, "rewrite_request", failing)
+
+    analyzed = await graph.aanalyze_content_node({"page_refs": []})
+    generated = await graph.agenerate_article_node({"page_refs": []})
+    rewritten = await graph.arewrite_content_node({"analysis": "分析"})
+
+    assert analyzed == {"analysis": graph.NO_CONTENT_MESSAGE}
+    assert generated["rewritten_content"] == graph.NO_CONTENT_MESSAGE
+    assert rewritten["rewritten_content"] == "分析"
+    assert len(threads) == 3
+    assert loop_thread not in threads
+
+
+def test_stream_llm_emits_the_text_of_content_blocks(
+    llm_request: Any, stream_events: List[Dict[str, str]]
+) -> None:
+    renderer = IncrementalMarkdownRenderer()
+    html_parts: List[str] = []
+
+    message = graph.stream_llm(
+        llm_request, on_token=lambda t: html_parts.append(renderer.feed(t))
+    )
+    html_parts.append(renderer.close())
+
+    assert message.text == "# 標題\n\n第一段。\n"
+    assert "".join(event["token"] for event in stream_events) == message.text
+    assert "".join(html_parts) == render_markdown(message.text)
+
+
+@pytest.mark.anyio
+async def test_astream_llm_emits_the_text_of_content_blocks(llm_request: Any) -> None:
+    tokens: List[str] = []
+
+    message = await graph.astream_llm(llm_request, on_token=tokens.append)
+
+    assert message.text == "".join(tokens) == "# 標題\n\n第一段。\n"
+
+
+class RecordingCache:
+    """A response cache recording which thread each lookup and write runs on."""
+
+    def __init__(self, cached: Optional[str] = None) -> None:
+        self.cached = cached
+        self.threads: List[threading.Thread] = []
+        self.puts: List[Any] = []
+
+    def get(self, *args: Any, **kwargs: Any) -> Optional[str]:
+        self.threads.append(threading.current_thread())
+        return self.cached
+
+    def put(self, *args: Any, **kwargs: Any) -> None:
+        self.threads.append(threading.current_thread())
+        self.puts.append(args)
+
+
+@pytest.mark.anyio
+async def test_async_nodes_use_the_response_cache_off_the_event_loop(
+    llm_request: Any,
+    stream_events: List[Dict[str, str]],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    loop_thread = threading.current_thread()
+    miss = RecordingCache()
+    monkeypatch.setattr(graph, "get_response_cache", lambda: miss)
+
+    message = await graph.astream_llm(llm_request)
+
+    assert len(miss.threads) == 2 and loop_thread not in miss.threads
+    assert miss.puts[0][3] == message.text
+
+    hit = RecordingCache('{"analysis": "摘要", "article": "# 文章"}')
+    monkeypatch.setattr(graph, "get_response_cache", lambda: hit)
+    monkeypatch.setattr(graph, "generation_request", lambda state: llm_request)
+
+    update = await graph.agenerate_article_node({"page_refs": []})
+
+    assert update["rewritten_content"] == "# 文章"
+    assert len(hit.threads) == 1 and loop_thread not in hit.threads
+
+
+class StructuredChatModel(BaseChatModel):
+    """Answers structured-output calls by parsing ``text`` as JSON."""
+
+    text: str
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-structured"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        raise NotImplementedError
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable[Any, Any]:
+        def parse(prompt: Any) -> Any:
+            self.calls += 1
+            return json.loads(self.text)
+
+        return RunnableLambda(parse)
+
+
+GENERATED = {"analysis": "量子晶片的分析摘要", "article": "# 量子晶片\n\n正文。"}
+
+
+@pytest.fixture
+def structured_models(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Dict[str, StructuredChatModel]:
+    registry: Dict[str, StructuredChatModel] = {}
+    monkeypatch.setattr(
+        routing, "load_chat_model", lambda name, **kwargs: registry[name]
+    )
+    context = Context(model="fake/a", fallback_model="fake/b", fail_fast=False)
+    monkeypatch.setattr(graph, "get_context", lambda: context)
+    monkeypatch.setattr(graph, "get_router", ModelRouter)
+    monkeypatch.setattr(graph, "get_response_cache", lambda: None)
+    return registry
+
+
+def generation_state() -> Any:
+    content = "Quantum chips need quantum error correction to scale. " * 10
+    pages = [{"url": "https://example.com/quantum", "content": content}]
+    return {"original_keyword": "quantum chips", "page_refs": store_pages(pages)}
+
+
+def test_generate_article_parses_the_structured_output(
+    structured_models: Dict[str, StructuredChatModel],
+) -> None:
+    structured_models["fake/a"] = StructuredChatModel(text=json.dumps(GENERATED))
+
+    update = graph.generate_article_node(generation_state())
+
+    assert update["analysis"] == GENERATED["analysis"]
+    assert update["rewritten_content"] == GENERATED["article"]
+    assert update["messages"][0].content == GENERATED["article"]
+
+
+@pytest.mark.anyio
+async def test_malformed_json_falls_back_and_then_reports_an_error(
+    structured_models: Dict[str, StructuredChatModel],
+) -> None:
+    structured_models["fake/a"] = StructuredChatModel(text='{"analysis": "cut off')
+    structured_models["fake/b"] = StructuredChatModel(text=json.dumps(GENERATED))
+
+    update = await graph.agenerate_article_node(generation_state())
+
+    assert update["rewritten_content"] == GENERATED["article"]
+    assert structured_models["fake/a"].calls == 1
+
+    structured_models["fake/b"] = StructuredChatModel(text="not json")
+    update = graph.generate_article_node(generation_state())
+
+    assert update["analysis"] == update["rewritten_content"]
+    assert update["rewritten_content"].startswith("抱歉,AI 生成過程中發生錯誤")
+
+
+def test_generation_results_are_cached(
+    structured_models: Dict[str, StructuredChatModel], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    model = structured_models["fake/a"] = StructuredChatModel(
+        text=json.dumps(GENERATED)
+    )
+    miss = RecordingCache()
+    monkeypatch.setattr(graph, "get_response_cache", lambda: miss)
+
+    graph.generate_article_node(generation_state())
+
+    assert len(miss.puts) == 1
+    assert miss.puts[0][0] == "a"
+    assert json.loads(miss.puts[0][3]) == GENERATED
+
+    hit = RecordingCache(miss.puts[0][3])
+    monkeypatch.setattr(graph, "get_response_cache", lambda: hit)
+
+    update = graph.generate_article_node(generation_state())
+
+    assert update["rewritten_content"] == GENERATED["article"]
+    assert model.calls == 1
+    assert hit.puts == []
+
+
+def variant_results(query: str, max_results: int = 5) -> List[str]:
+    slug = "-".join(query.split())
+    return ["https://shared.test/", f"https://{slug}.test/"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("run_async", [False, True])
+async def test_fanout_search_fuses_every_variant_before_scraping(
+    monkeypatch: pytest.MonkeyPatch, run_async: bool
+) -> None:
+    queries: List[str] = []
+
+    def search(query: str, max_results: int = 5) -> List[str]:
+        queries.append(query)
+        return variant_results(query, max_results)
+
+    async def asearch(query: str, max_results: int = 5) -> List[str]:
+        return search(query, max_results)
+
+    monkeypatch.setattr(graph, "search_urls", search)
+    monkeypatch.setattr(graph, "asearch_urls", asearch)
+    app = graph.builder.compile(
+        checkpointer=InMemorySaver(), interrupt_before=["scrape_content"]
+    )
+    config: Any = {"configurable": {"thread_id": f"fanout-{run_async}"}}
+    inputs = {
+        "messages": [
+            {"role": "user", "content": [{"type": "text", "text": "量子 晶片"}]}
+        ]
+    }
+    context = Context(search_mode="fanout")
+
+    if run_async:
+        await app.ainvoke(inputs, config, context=context)
+    else:
+        app.invoke(inputs, config, context=context)
+    state = app.get_state(config)
+
+    variants = query_variants("量子 晶片")
+    assert sorted(queries) == sorted(variants)
+    assert state.next == ("scrape_content",)
+    urls = state.values["urls"]
+    # The URL every variant found ranks first; each variant's own result follows.
+    assert urls[0] == "https://shared.test/"
+    assert set(urls[1:]) <= {variant_results(q)[1] for q in variants}
+    assert len(urls) == min(graph.SEARCH_MAX_RESULTS, len(variants) + 1)
+    assert state.values["search_attempts"] == 1
+    assert not state.values["search_batches"]
@@ -0,0 +1,105 @@
+import os
+import socket
+import subprocess
+import sys
+import urllib.request
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from react_agent import batch
+from react_agent.instrumentation import (
+    MetricsRegistry,
+    instrument_node,
+    serve_metrics,
+    write_metrics_file,
+)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("", 0))
+        return int(s.getsockname()[1])
+
+
+def test_registry_renders_counters_and_cumulative_buckets() -> None:
+    registry = MetricsRegistry()
+    calls = registry.counter("calls", "Calls.", ["model"])
+    seconds = registry.histogram("seconds", "Seconds.", buckets=(0.1, 1))
+    calls.inc("a")
+    calls.inc("a", amount=2)
+    seconds.observe(0.05)
+    seconds.observe(0.5)
+    seconds.observe(5)
+
+    text = registry.render(openmetrics=True)
+
+    assert 'calls_total{model="a"} 3' in text
+    assert 'seconds_bucket{le="0.1"} 1' in text
+    assert 'seconds_bucket{le="1"} 2' in text
+    assert 'seconds_bucket{le="+Inf"} 3' in text
+    assert "seconds_sum 5.55" in text
+    assert text.endswith("# EOF\n")
+    assert seconds.snapshot() == (3, 5.55)
+
+
+def test_write_metrics_file_is_a_no_op_without_a_path(tmp_path: Path) -> None:
+    write_metrics_file("")
+    path = tmp_path / "metrics.txt"
+    write_metrics_file(str(path))
+
+    assert path.read_text(encoding="utf-8").endswith("# EOF\n")
+    assert not (tmp_path / "metrics.txt.tmp").exists()
+
+
+@pytest.mark.anyio
+async def test_instrument_node_wraps_coroutine_functions() -> None:
+    @instrument_node("test_async_node")
+    async def node(x: int) -> int:
+        return x + 1
+
+    assert await node(1) == 2
+
+
+def test_importing_does_not_serve_metrics() -> None:
+    port = free_port()
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import socket, react_agent.instrumentation; "
+            f"socket.create_server(('', {port})).close()",
+        ],
+        env={**os.environ, "METRICS_PORT": str(port)},
+        check=True,
+    )
+
+
+def test_serve_metrics_serves_the_registry() -> None:
+    server = serve_metrics(free_port())
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "# TYPE react_agent_node_seconds histogram" in body
+
+
+def test_batch_cli_starts_the_metrics_server(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    ports: List[int] = []
+    monkeypatch.setattr(batch, "serve_metrics", ports.append)
+    monkeypatch.setattr(batch.BatchRunner, "run", lambda self, keywords: {"total": 0})
+    keywords = tmp_path / "keywords.jsonl"
+    keywords.write_text("", encoding="utf-8")
+    args = [str(keywords), "--output-dir", str(tmp_path / "out")]
+
+    batch.main(args)
+    batch.main(args + ["--metrics-port", "9464"])
+
+    assert ports == [9464]
@@ -0,0 +1,82 @@
+import threading
+from typing import Any, List
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from react_agent import models
+
+
+def fake_factory(built: List[str]) -> Any:
+    def factory(name: str, **kwargs: Any) -> FakeListChatModel:
+        built.append(name)
+        return FakeListChatModel(responses=[name], **kwargs)
+
+    return factory
+
+
+def test_chat_models_are_shared_per_name_and_settings() -> None:
+    built: List[str] = []
+    models.register_provider("test-shared", fake_factory(built))
+
+    first = models.get_chat_model("test-shared/a", sleep=0.0, cache=False)
+    assert models.get_chat_model("test-shared/a", cache=False, sleep=0.0) is first
+    assert models.get_chat_model("test-shared/a", sleep=None) is not first
+    assert models.get_chat_model("test-shared/b", sleep=0.0, cache=False) is not first
+    assert built == ["a", "a", "b"]
+
+
+def test_register_provider_discards_built_models() -> None:
+    built: List[str] = []
+    models.register_provider("test-replace", fake_factory(built))
+    first = models.get_chat_model("test-replace/a")
+
+    models.register_provider("test-replace", fake_factory(built))
+
+    assert models.get_chat_model("test-replace/a") is not first
+    assert built == ["a", "a"]
+
+
+def test_first_builds_of_different_models_run_concurrently() -> None:
+    b_built = threading.Event()
+
+    def factory(name: str, **kwargs: Any) -> FakeListChatModel:
+        # Building "a" waits for "b": this deadlocks (and times out) if the
+        # registry holds its lock while building.
+        if name == "a":
+            assert b_built.wait(timeout=5)
+        else:
+            b_built.set()
+        return FakeListChatModel(responses=[name])
+
+    models.register_provider("test-concurrent", factory)
+    results: List[Any] = []
+    thread = threading.Thread(
+        target=lambda: results.append(models.get_chat_model("test-concurrent/a"))
+    )
+    thread.start()
+    models.get_chat_model("test-concurrent/b")
+    thread.join(timeout=10)
+
+    assert len(results) == 1
+
+
+def test_bedrock_models_share_one_client_per_region() -> None:
+    sonnet = models.get_bedrock_model(
+        "anthropic.claude-test-a", region_name="eu-west-3"
+    )
+    haiku = models.get_bedrock_model(
+        "anthropic.claude-test-b",
+        region_name="eu-west-3",
+        model_kwargs={"temperature": 0.1},
+    )
+    other_region = models.get_bedrock_model(
+        "anthropic.claude-test-a", region_name="ap-south-2"
+    )
+
+    assert (
+        models.get_bedrock_model("anthropic.claude-test-a", region_name="eu-west-3")
+        is sonnet
+    )
+    assert sonnet.client is haiku.client
+    assert other_region.client is not sonnet.client
+    assert haiku.temperature == 0.1
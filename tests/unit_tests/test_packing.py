@@ -0,0 +1,101 @@
+from typing import Dict, List
+
+import pytest
+
+from react_agent.packing import (
+    DEFAULT_TOKEN_BUDGETS,
+    MODEL_TOKEN_BUDGETS,
+    estimate_tokens,
+    pack_pages,
+    token_budget,
+)
+
+
+def test_estimate_tokens_counts_cjk_characters_and_latin_quarters() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("晶片設計") == 4
+    assert estimate_tokens("AI 晶片") == 3
+
+
+@pytest.mark.parametrize(
+    "model_id, expected",
+    [
+        (
+            "anthropic.claude-3-haiku-20240307-v1:0",
+            MODEL_TOKEN_BUDGETS["anthropic.claude-3-haiku"],
+        ),
+        (
+            "anthropic.claude-3-5-sonnet-20240620-v1:0",
+            MODEL_TOKEN_BUDGETS["anthropic.claude"],
+        ),
+        (
+            "us.anthropic.claude-3-haiku-20240307-v1:0",
+            MODEL_TOKEN_BUDGETS["anthropic.claude-3-haiku"],
+        ),
+        (
+            "eu.anthropic.claude-3-5-sonnet-20240620-v1:0",
+            MODEL_TOKEN_BUDGETS["anthropic.claude"],
+        ),
+        (
+            "apac.anthropic.claude-sonnet-4-20250514-v1:0",
+            MODEL_TOKEN_BUDGETS["anthropic.claude"],
+        ),
+        ("us-gov.meta.llama3-8b-instruct-v1:0", MODEL_TOKEN_BUDGETS["meta.llama"]),
+        ("meta.llama3-70b-instruct-v1:0", MODEL_TOKEN_BUDGETS["meta.llama"]),
+        ("mistral.mistral-large-2402-v1:0", DEFAULT_TOKEN_BUDGETS),
+        ("gpt-4o", DEFAULT_TOKEN_BUDGETS),
+    ],
+)
+def test_token_budget_matches_model_prefixes(
+    model_id: str, expected: Dict[str, int]
+) -> None:
+    assert token_budget(model_id, "analysis") == expected["analysis"]
+    assert token_budget(model_id, "rewrite") == expected["rewrite"]
+
+
+def test_token_budget_override_wins() -> None:
+    assert (
+        token_budget("us.anthropic.claude-3-haiku-20240307-v1:0", "analysis", 123)
+        == 123
+    )
+    assert token_budget("gpt-4o", "rewrite", 0) == DEFAULT_TOKEN_BUDGETS["rewrite"]
+
+
+def page(content: str) -> Dict[str, str]:
+    return {"url": "https://example.com", "content": content}
+
+
+def test_pack_pages_stops_at_the_budget_and_keeps_page_order() -> None:
+    pages: List[Dict[str, str]] = [
+        page("Quantum computing is new."),
+        page("Quantum chips need quantum error correction."),
+        page("Cooking pasta takes ten minutes and needs salted water."),
+        page("Error: fetch failed"),
+    ]
+    best = "Quantum chips need quantum error correction."
+    both = estimate_tokens(best) + estimate_tokens("Quantum computing is new.")
+
+    # The most relevant passage is packed first; the next one no longer fits.
+    assert pack_pages(pages, "quantum", both - 1) == best
+    # Smaller passages still fill the room a skipped one leaves.
+    assert (
+        pack_pages(pages, "quantum", estimate_tokens(best) - 1)
+        == "Quantum computing is new."
+    )
+    # Selected passages keep page order; irrelevant pages and errors are left out.
+    assert pack_pages(pages, "quantum", both, separator=" | ") == (
+        "Quantum computing is new. | " + best
+    )
+    assert pack_pages(pages, "quantum", 10_000, separator=" | ") == (
+        "Quantum computing is new. | " + best
+    )
+
+
+def test_pack_pages_drops_duplicate_passages() -> None:
+    text = "Quantum chips need extreme cooling to work reliably."
+    pages = [page(text), page(text), page(text.upper())]
+
+    assert pack_pages(pages, "quantum", 10_000) == text
+    assert pack_pages(pages, "quantum", 0) == ""
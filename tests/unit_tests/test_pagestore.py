@@ -0,0 +1,41 @@
+from pathlib import Path
+from typing import List
+
+from react_agent.pagestore import (
+    MISSING_BODY,
+    MemoryPageStore,
+    PageRef,
+    SqlitePageStore,
+    content_id,
+    load_pages,
+    store_pages,
+)
+
+
+def test_memory_store_evicts_least_recently_used_bodies() -> None:
+    store = MemoryPageStore(max_bytes=8)
+    a = store.put("aaaa")
+    b = store.put("bbbb")
+    assert store.get(a) == "aaaa"
+    store.put("cccc")
+
+    assert store.get(b) is None
+    assert store.get(a) == "aaaa"
+    assert a == content_id("aaaa")
+
+
+def test_sqlite_store_is_shared_across_instances(tmp_path: Path) -> None:
+    page_id = SqlitePageStore(str(tmp_path)).put("body")
+
+    assert SqlitePageStore(str(tmp_path)).get(page_id) == "body"
+    assert SqlitePageStore(str(tmp_path), ttl=-1).get(page_id) is None
+
+
+def test_refs_round_trip_and_evicted_bodies_become_error_pages() -> None:
+    refs = store_pages([{"url": "https://example.com/a", "content": "body"}])
+
+    assert load_pages(refs) == [{"url": "https://example.com/a", "content": "body"}]
+    missing: List[PageRef] = [{"url": "https://example.com/b", "page_id": "missing"}]
+    assert load_pages(missing) == [
+        {"url": "https://example.com/b", "content": MISSING_BODY}
+    ]
@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+import requests
+
+from react_agent import politeness
+from react_agent.politeness import (
+    MAX_RETRY_AFTER,
+    FetchCancelled,
+    RobotsCache,
+    TokenBucket,
+    host_bucket,
+    retry_delay,
+    send_with_retries,
+)
+
+
+def make_response(
+    status: int, headers: Optional[Dict[str, str]] = None, text: str = ""
+) -> Any:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = text.encode("utf-8")
+    response._content_consumed = True
+    return response
+
+
+def test_retry_after_seconds_are_capped() -> None:
+    assert retry_delay(make_response(429, {"Retry-After": "2"}), 0) == 2.0
+    assert retry_delay(make_response(429, {"Retry-After": "-5"}), 0) == 0.0
+    assert (
+        retry_delay(make_response(429, {"Retry-After": "99999"}), 0) == MAX_RETRY_AFTER
+    )
+
+
+@pytest.fixture
+def local_zone_ahead_of_utc(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv("TZ", "Asia/Taipei")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.usefixtures("local_zone_ahead_of_utc")
+def test_retry_after_http_dates_with_and_without_a_zone() -> None:
+    soon = datetime.now(UTC) + timedelta(seconds=10)
+    aware = format_datetime(soon)
+    # "-0000" means "no zone information" and parses to a naive datetime.
+    naive = format_datetime(soon.replace(tzinfo=None))
+
+    assert 8 <= retry_delay(make_response(503, {"Retry-After": aware}), 0) <= 10
+    assert 8 <= retry_delay(make_response(503, {"Retry-After": naive}), 0) <= 10
+
+
+@pytest.mark.parametrize("header", ["soon", "Mon, 99 Foo 2024 25:61:00 GMT", ""])
+def test_malformed_retry_after_falls_back_to_jittered_backoff(header: str) -> None:
+    delays = [
+        retry_delay(make_response(503, {"Retry-After": header}), 2) for _ in range(50)
+    ]
+
+    assert all(0 <= delay <= politeness.BACKOFF_BASE * 4 for delay in delays)
+
+
+def test_token_bucket_gives_up_at_the_deadline() -> None:
+    bucket = TokenBucket(rate=1, burst=1)
+
+    assert bucket.acquire(deadline=time.monotonic())
+    assert not bucket.acquire(deadline=time.monotonic() + 0.05)
+
+
+def test_paused_unlimited_bucket_waits() -> None:
+    bucket = TokenBucket(rate=0, burst=1)
+    bucket.pause(0.05)
+
+    assert not bucket.acquire(deadline=time.monotonic() + 0.01)
+    assert bucket.acquire(deadline=time.monotonic() + 1)
+
+
+def test_token_bucket_wait_stops_on_cancel() -> None:
+    bucket = TokenBucket(rate=0.1, burst=1)
+    assert bucket.acquire(deadline=time.monotonic())
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    started = time.monotonic()
+
+    assert not bucket.acquire(deadline=time.monotonic() + 30, cancel=cancel)
+    assert time.monotonic() - started < 1
+
+
+def test_host_buckets_are_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(politeness, "_buckets", OrderedDict())
+    monkeypatch.setattr(politeness, "MAX_HOST_BUCKETS", 2)
+    a = host_bucket("https://a.test/x")
+    host_bucket("https://b.test/x")
+    assert host_bucket("https://a.test/y") is a
+
+    host_bucket("https://c.test/x")
+
+    assert list(politeness._buckets) == ["a.test", "c.test"]
+
+
+def test_cancel_stops_a_send_waiting_for_the_host(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(politeness, "_buckets", OrderedDict())
+    host_bucket("https://paused.test/").pause(30)
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    sent: List[float] = []
+
+    def send(timeout: float) -> Any:
+        sent.append(timeout)
+        return make_response(200)
+
+    with pytest.raises(FetchCancelled):
+        send_with_retries(send, "https://paused.test/a", time.monotonic() + 60, cancel)
+    with pytest.raises(TimeoutError):
+        send_with_retries(
+            send, "https://paused.test/b", time.monotonic() + 0.05, threading.Event()
+        )
+    assert sent == []
+
+
+def test_send_with_retries_retries_throttled_responses(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(politeness, "BACKOFF_BASE", 0.001)
+    responses = [
+        make_response(503),
+        make_response(429, {"Retry-After": "0"}),
+        make_response(200),
+    ]
+    timeouts: List[float] = []
+
+    def send(timeout: float) -> Any:
+        timeouts.append(timeout)
+        return responses.pop(0)
+
+    response = send_with_retries(
+        send, "https://retry.test/a", time.monotonic() + 5, threading.Event()
+    )
+
+    assert response.status_code == 200
+    assert len(timeouts) == 3
+
+
+def test_send_with_retries_returns_the_last_response_when_retries_run_out(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(politeness, "BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(politeness, "MAX_RETRIES", 1)
+    calls: List[float] = []
+
+    def send(timeout: float) -> Any:
+        calls.append(timeout)
+        return make_response(500)
+
+    response = send_with_retries(
+        send, "https://exhausted.test/a", time.monotonic() + 5, threading.Event()
+    )
+
+    assert response.status_code == 500
+    assert len(calls) == 2
+
+
+class FakeSession:
+    def __init__(self, response: Any) -> None:
+        self.response = response
+        self.urls: List[str] = []
+
+    def get(self, url: str, timeout: float) -> Any:
+        self.urls.append(url)
+        return self.response
+
+
+def test_robots_cache_applies_rules_and_crawl_delay() -> None:
+    robots = "User-agent: *\nDisallow: /private\nCrawl-delay: 4\n"
+    session: Any = FakeSession(make_response(200, text=robots))
+    cache = RobotsCache(user_agent="test-agent", ttl=60)
+    deadline = time.monotonic() + 5
+
+    assert cache.allowed("https://Robots.test/public", session, deadline)
+    assert not cache.allowed("https://robots.test/private/page", session, deadline)
+    assert session.urls == ["https://robots.test/robots.txt"]
+    assert host_bucket("https://robots.test").rate == 0.25
+
+
+def test_crawl_delay_survives_bucket_eviction(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(politeness, "_buckets", OrderedDict())
+    robots = "User-agent: *\nCrawl-delay: 4\n"
+    session: Any = FakeSession(make_response(200, text=robots))
+    cache = RobotsCache(user_agent="test-agent", ttl=60)
+    deadline = time.monotonic() + 5
+    assert cache.allowed("https://slow.test/a", session, deadline)
+
+    politeness._buckets.clear()
+
+    assert cache.allowed("https://slow.test/b", session, deadline)
+    assert host_bucket("https://slow.test").rate == 0.25
+    assert len(session.urls) == 1
+
+
+def test_failing_robots_txt_allows_everything() -> None:
+    session: Any = FakeSession(make_response(503, text="User-agent: *\nDisallow: /"))
+    cache = RobotsCache(user_agent="test-agent", ttl=60)
+
+    assert cache.allowed("https://down.test/page", session, time.monotonic() + 5)
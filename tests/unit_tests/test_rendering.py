@@ -0,0 +1,143 @@
+import importlib
+from typing import Any, Dict, List
+
+import pytest
+
+from react_agent.artifacts import BackgroundWriter, MemoryObjectStoreSink
+from react_agent.rendering import (
+    IncrementalMarkdownRenderer,
+    _complete_prefix,
+    render_markdown,
+    render_page,
+)
+
+graph = importlib.import_module("react_agent.graph")
+
+ARTICLE = """# 科技趨勢觀察
+
+引言段落,直接點明主題。
+第二行緊接在後。
+
+## 市場概況
+
+- 資料中心 GPU 供不應求
+
+- 邊緣運算晶片開始普及
+
+> 「算力就是新的石油。」
+
+> 第二段引言。
+
+```python
+def f():
+
+    return 1
+```
+
+## 總結
+
+1. 第一點
+
+   延續的段落。
+2. 第二點
+"""
+
+
+def render_streamed(text: str, chunk_size: int) -> str:
+    renderer = IncrementalMarkdownRenderer()
+    parts = [
+        renderer.feed(text[i : i + chunk_size]) for i in range(0, len(text), chunk_size)
+    ]
+    parts.append(renderer.close())
+    return "".join(parts)
+
+
+def normalized(html: str) -> str:
+    return "".join(html.split())
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("", 0),
+        ("# 標題\n", 0),
+        # The block after a blank line must have a full line before it counts.
+        ("# 標題\n\n段落", 0),
+        ("# 標題\n\n段落\n", len("# 標題\n\n")),
+        ("a\n\nb\n\nc\n", len("a\n\nb\n\n")),
+        # Indented lines, list items and quotes may continue the block.
+        ("- a\n\n- b\n", 0),
+        ("1. a\n\n   more\n", 0),
+        ("> a\n\n> b\n", 0),
+        # Blank lines inside a code fence do not end a block.
+        ("```\na\n\nb\n```\n\nc\n", len("```\na\n\nb\n```\n\n")),
+        ("```\na\n\nb\n", 0),
+    ],
+)
+def test_complete_prefix(text: str, expected: int) -> None:
+    assert _complete_prefix(text) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 24, len(ARTICLE)])
+def test_incremental_rendering_matches_a_whole_document_render(chunk_size: int) -> None:
+    assert normalized(render_streamed(ARTICLE, chunk_size)) == normalized(
+        render_markdown(ARTICLE)
+    )
+
+
+def test_consecutive_quote_paragraphs_stay_in_one_blockquote() -> None:
+    html = render_streamed("> 第一段。\n\n> 第二段。\n\n結尾。\n", chunk_size=3)
+
+    assert html.count("<blockquote>") == 1
+
+
+def test_saved_page_resolves_references_across_blocks(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    article = "# 標題\n\n參見[報告][1]與註腳[^n]。\n\n## 附錄\n\n[1]: https://example.com/report\n[^n]: 註腳內容。\n"
+    assert "[1]" in render_streamed(article, chunk_size=5)
+
+    sink = MemoryObjectStoreSink()
+    writer = BackgroundWriter(sink)
+    monkeypatch.setattr(graph, "get_artifact_writer", lambda: writer)
+    graph.render_html_node(
+        {
+            "original_keyword": "晶片",
+            "output_file": "晶片.md",
+            "rewritten_content": article,
+        }
+    )
+    writer.flush()
+    page = sink.objects["晶片.html"].decode("utf-8")
+
+    assert '<a href="https://example.com/report">報告</a>' in page
+    assert "註腳內容" in page and 'class="footnote"' in page
+
+
+def test_rewrite_streams_html_previews(monkeypatch: pytest.MonkeyPatch) -> None:
+    events: List[Dict[str, str]] = []
+    monkeypatch.setattr(graph, "get_stream_writer", lambda: events.append)
+    monkeypatch.setattr(
+        graph, "get_config", lambda: {"metadata": {"langgraph_node": "rewrite"}}
+    )
+
+    def stream_llm(request: Any, on_token: Any) -> Any:
+        for token in ["# 標題\n", "\n段落", "一。\n"]:
+            on_token(token)
+        return graph.AIMessage(content="# 標題\n\n段落一。\n")
+
+    monkeypatch.setattr(graph, "rewrite_request", lambda state: None)
+    monkeypatch.setattr(graph, "stream_llm", stream_llm)
+
+    update = graph.rewrite_content_node({"analysis": "分析"})
+
+    assert update["rewritten_content"] == "# 標題\n\n段落一。\n"
+    assert set(update) == {"rewritten_content", "messages"}
+    assert [event["html"] for event in events] == ["<h1>標題</h1>\n", "<p>段落一。</p>"]
+
+
+def test_render_page_escapes_the_keyword() -> None:
+    page = render_page("<AI>", "今天", "<p>內文</p>")
+
+    assert "<title>&lt;AI&gt; - 科技資訊文章</title>" in page
+    assert "<p>內文</p>" in page
@@ -0,0 +1,239 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import pytest
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from react_agent import routing
+from react_agent.context import Context
+from react_agent.routing import ModelRouter, ModelStats, Route
+
+
+class FakeChatModel(BaseChatModel):
+    """Streams ``text`` one character at a time after ``latency`` seconds."""
+
+    text: str = "ok"
+    latency: float = 0.0
+    error: Optional[str] = None
+    fail_after_first_token: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-routing"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        if self.error:
+            raise RuntimeError(self.error)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=self.text))]
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        if self.error and not self.fail_after_first_token:
+            raise RuntimeError(self.error)
+        for char in self.text:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=char))
+            if self.error:
+                raise RuntimeError(self.error)
+
+
+class AsyncFakeChatModel(FakeChatModel):
+    """A :class:`FakeChatModel` with a native async client."""
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        if self.error:
+            raise RuntimeError(self.error)
+        for char in self.text:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=char))
+
+
+@pytest.fixture
+def models(monkeypatch: pytest.MonkeyPatch) -> Dict[str, BaseChatModel]:
+    registry: Dict[str, BaseChatModel] = {}
+    monkeypatch.setattr(
+        routing, "load_chat_model", lambda name, **kwargs: registry[name]
+    )
+    return registry
+
+
+def text(chunks: List[Any]) -> str:
+    return "".join(str(chunk.content) for _, chunk in chunks)
+
+
+def test_stream_falls_back_when_the_first_model_fails(
+    models: Dict[str, BaseChatModel],
+) -> None:
+    models["fake/a"] = FakeChatModel(error="ThrottlingException")
+    models["fake/b"] = FakeChatModel(text="fallback")
+    router = ModelRouter()
+    route = router.route(
+        "rewrite_content", Context(model="fake/a", fallback_model="fake/b")
+    )
+
+    chunks = list(route.stream("prompt"))
+
+    assert {name for name, _ in chunks} == {"fake/b"}
+    assert text(chunks) == "fallback"
+    assert router.stats("fake/a")._outcomes[-1][1] is False
+    assert router.stats("fake/b")._outcomes[-1][1] is True
+
+
+def test_invoke_falls_back_and_raises_when_every_model_fails(
+    models: Dict[str, BaseChatModel],
+) -> None:
+    models["fake/a"] = FakeChatModel(error="ThrottlingException")
+    models["fake/b"] = FakeChatModel(text="fallback")
+    route = Route(router=ModelRouter(), models=["fake/a", "fake/b"])
+
+    name, answer = route.invoke(lambda model: model, "prompt")
+
+    assert (name, answer.content) == ("fake/b", "fallback")
+    models["fake/b"] = FakeChatModel(error="AccessDenied")
+    with pytest.raises(RuntimeError, match="AccessDenied"):
+        route.invoke(lambda model: model, "prompt")
+
+
+def test_failures_after_the_first_token_are_not_retried(
+    models: Dict[str, BaseChatModel],
+) -> None:
+    models["fake/a"] = FakeChatModel(
+        text="abc", error="reset", fail_after_first_token=True
+    )
+    models["fake/b"] = FakeChatModel(text="fallback")
+    route = Route(router=ModelRouter(), models=["fake/a", "fake/b"])
+    chunks: List[Any] = []
+
+    with pytest.raises(RuntimeError, match="reset"):
+        for chunk in route.stream("prompt"):
+            chunks.append(chunk)
+
+    assert text(chunks) == "a"
+
+
+def test_slow_first_token_is_hedged_with_the_next_model(
+    models: Dict[str, BaseChatModel],
+) -> None:
+    models["fake/slow"] = FakeChatModel(text="slow", latency=0.5)
+    models["fake/fast"] = FakeChatModel(text="fast")
+    router = ModelRouter()
+    context = Context(
+        model="fake/slow", fallback_model="fake/fast", llm_first_token_slo_ms=50
+    )
+
+    started = time.perf_counter()
+    chunks = list(router.route("rewrite_content", context).stream("prompt"))
+
+    assert text(chunks) == "fast"
+    assert time.perf_counter() - started < 0.4
+    # The hedged model is stopped and its wait counts as a first-token sample.
+    assert not router.stats("fake/slow")._outcomes
+    assert router.stats("fake/slow")._first_token[-1][1] >= 0.05
+
+
+def test_without_an_slo_the_slow_model_is_awaited(
+    models: Dict[str, BaseChatModel],
+) -> None:
+    models["fake/slow"] = FakeChatModel(text="slow", latency=0.1)
+    models["fake/fast"] = FakeChatModel(text="fast")
+    context = Context(model="fake/slow", fallback_model="fake/fast")
+    route = ModelRouter().route("rewrite_content", context)
+
+    assert route.hedge_after is None
+    assert text(list(route.stream("prompt"))) == "slow"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("model_class", [FakeChatModel, AsyncFakeChatModel])
+async def test_astream_hedges_and_falls_back(
+    models: Dict[str, BaseChatModel], model_class: Any
+) -> None:
+    models["fake/slow"] = model_class(text="slow", latency=0.5)
+    models["fake/boom"] = model_class(error="ThrottlingException")
+    models["fake/fast"] = model_class(text="fast")
+    route = Route(
+        router=ModelRouter(),
+        models=["fake/slow", "fake/boom", "fake/fast"],
+        hedge_after=0.05,
+    )
+
+    chunks = [chunk async for chunk in route.astream("prompt")]
+
+    assert {name for name, _ in chunks} == {"fake/fast"}
+    assert text(chunks) == "fast"
+
+
+def test_models_over_the_error_budget_are_demoted() -> None:
+    router = ModelRouter()
+    context = Context(model="fake/a", fallback_model="fake/b")
+    for _ in range(routing.MIN_STATS_SAMPLES):
+        router.record("fake/a", "error")
+
+    assert router.route("rewrite_content", context).models == ["fake/b", "fake/a"]
+    # Cancelled calls are neither successes nor failures.
+    router.record("fake/b", "cancelled")
+    assert router.stats("fake/b").error_rate() is None
+
+
+def test_models_over_the_first_token_slo_are_demoted() -> None:
+    router = ModelRouter()
+    for _ in range(routing.MIN_STATS_SAMPLES):
+        router.stats("fake/a").record(ok=True, first_token=1.0)
+    context = Context(model="fake/a", fallback_model="fake/b")
+
+    assert router.route("rewrite_content", context).models == ["fake/a", "fake/b"]
+    slo_context = Context(
+        model="fake/a", fallback_model="fake/b", llm_first_token_slo_ms=200
+    )
+    assert router.route("rewrite_content", slo_context).models == ["fake/b", "fake/a"]
+
+
+def test_old_samples_expire() -> None:
+    stats = ModelStats(ttl=0.05)
+    for _ in range(routing.MIN_STATS_SAMPLES):
+        stats.record(ok=False, first_token=1.0)
+
+    assert not stats.healthy(0.2)
+    time.sleep(0.06)
+    assert stats.error_rate() is None
+    assert stats.healthy(0.2)
+
+
+def test_fast_tier_prefers_the_fast_model() -> None:
+    context = Context(
+        model="fake/strong", fast_model="fake/fast", fallback_model="fake/backup"
+    )
+
+    assert routing.tier_models("fast", context) == [
+        "fake/fast",
+        "fake/strong",
+        "fake/backup",
+    ]
+    assert routing.tier_models("strong", context) == ["fake/strong", "fake/backup"]
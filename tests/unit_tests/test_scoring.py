@@ -0,0 +1,57 @@
+from react_agent.grading import MIN_CONTENT_CHARS, grade_pages, is_error
+from react_agent.scoring import BM25Index, page_relevance, split_passages, tokenize
+
+
+def test_tokenize_splits_words_and_cjk_bigrams() -> None:
+    assert tokenize("Hello, AI 晶片設計!") == ["hello", "ai", "晶片", "片設", "設計"]
+    assert tokenize("茶") == ["茶"]
+
+
+def test_split_passages_keeps_sentences_under_the_limit() -> None:
+    text = "第一句。第二句。" + "x" * 25
+    passages = split_passages(text, max_chars=10)
+
+    assert passages == ["第一句。 第二句。", "x" * 10, "x" * 10, "x" * 5]
+
+
+def test_bm25_ranks_matching_documents_and_normalizes() -> None:
+    index = BM25Index(["quantum computing chips", "cooking pasta", "quantum quantum"])
+    scores = index.scores("quantum computing")
+
+    assert scores[0] > scores[2] > scores[1] == 0.0
+    assert all(0.0 <= score < 1.0 for score in scores)
+
+
+def test_single_character_cjk_keyword_matches_inside_longer_runs() -> None:
+    index = BM25Index(["我喜歡喝茶和咖啡", "今天天氣很好"])
+    scores = index.scores("茶")
+
+    assert scores[0] > 0.0
+    assert scores[1] == 0.0
+    # Unigrams do not change how multi-character queries score.
+    assert index.scores("咖啡") == BM25Index(
+        ["我喜歡喝茶和咖啡", "今天天氣很好"]
+    ).scores("咖啡")
+
+
+def test_page_relevance_takes_the_best_passage_per_page() -> None:
+    passage_scores, page_scores = page_relevance(
+        [(0, "cooking pasta"), (0, "quantum chips"), (1, "cooking rice")], 2, "quantum"
+    )
+
+    assert page_scores == [max(passage_scores[:2]), 0.0]
+
+
+def test_is_error_only_matches_the_error_prefix() -> None:
+    assert is_error({"url": "u", "content": "Error: timed out"})
+    assert not is_error({"url": "u", "content": "Python raises ValueError: bad input"})
+
+
+def test_grade_pages_needs_enough_relevant_text() -> None:
+    relevant = "台灣的茶文化歷史悠久,烏龍茶與高山茶聞名世界。" * 80
+    unrelated = "今天的天氣晴朗,適合出門散步與運動。" * 80
+
+    assert len(relevant) >= MIN_CONTENT_CHARS
+    assert grade_pages([{"url": "a", "content": relevant}], "茶") == "good"
+    assert grade_pages([{"url": "a", "content": unrelated}], "茶") == "bad"
+    assert grade_pages([{"url": "a", "content": "Error: " + relevant}], "茶") == "bad"
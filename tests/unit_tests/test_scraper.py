@@ -0,0 +1,214 @@
+import gc
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+import requests
+
+from react_agent import politeness, scraper
+from react_agent.scraper import ascrape_urls, fetch_page, scrape_urls
+
+
+class Concurrency:
+    """Track how many calls are in flight at once."""
+
+    def __init__(self) -> None:
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> None:
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc: Any) -> None:
+        with self._lock:
+            self.current -= 1
+
+
+@pytest.fixture
+def pool(monkeypatch: pytest.MonkeyPatch) -> Iterator[ThreadPoolExecutor]:
+    executor = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(scraper, "_executor", executor)
+    yield executor
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def test_scrape_urls_is_bounded_by_the_pool_and_keeps_input_order(
+    pool: ThreadPoolExecutor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    running = Concurrency()
+
+    def fetch(url: str, deadline: float, cancel: threading.Event) -> Dict[str, str]:
+        with running:
+            time.sleep(0.02 if url.endswith("0") else 0.01)
+        return {"url": url, "content": f"page {url}"}
+
+    monkeypatch.setattr(scraper, "fetch_page", fetch)
+    urls = [f"https://a.test/{i}" for i in range(10)] + ["https://a.test/1"]
+
+    pages = scrape_urls(urls)
+
+    assert [page["url"] for page in pages] == urls
+    assert running.peak == 3
+
+
+def test_scrape_urls_reports_pages_missing_the_deadline(
+    pool: ThreadPoolExecutor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cancelled: List[str] = []
+
+    def fetch(url: str, deadline: float, cancel: threading.Event) -> Dict[str, str]:
+        if "slow" in url:
+            if cancel.wait(5):
+                cancelled.append(url)
+            return {"url": url, "content": "Error: fetch cancelled"}
+        return {"url": url, "content": "fast page"}
+
+    monkeypatch.setattr(scraper, "fetch_page", fetch)
+    started = time.monotonic()
+
+    pages = scrape_urls(
+        ["https://a.test/slow", "https://a.test/fast"], deadline_seconds=0.1
+    )
+
+    assert time.monotonic() - started < 1
+    assert pages == [
+        {"url": "https://a.test/slow", "content": "Error: scrape deadline exceeded"},
+        {"url": "https://a.test/fast", "content": "fast page"},
+    ]
+    pool.shutdown(wait=True)
+    assert cancelled == ["https://a.test/slow"]
+
+
+class EarlyExit:
+    """A fetcher where one page is enough and the others wait to be cancelled."""
+
+    def __init__(self) -> None:
+        self.started: List[str] = []
+        self.cancelled: List[str] = []
+        self._lock = threading.Lock()
+
+    def __call__(
+        self, url: str, deadline: float, cancel: threading.Event
+    ) -> Dict[str, str]:
+        with self._lock:
+            self.started.append(url)
+        if url.endswith("/good"):
+            return {"url": url, "content": "good"}
+        if cancel.wait(5):
+            with self._lock:
+                self.cancelled.append(url)
+        return {"url": url, "content": "Error: fetch cancelled"}
+
+
+URLS = ["https://a.test/good"] + [f"https://b.test/{i}" for i in range(6)]
+
+
+def enough(pages: List[Dict[str, str]]) -> bool:
+    return any(page["content"] == "good" for page in pages)
+
+
+def test_stop_when_cancels_the_remaining_fetches(
+    pool: ThreadPoolExecutor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fetch = EarlyExit()
+    monkeypatch.setattr(scraper, "fetch_page", fetch)
+    started = time.monotonic()
+
+    pages = scrape_urls(URLS, stop_when=enough)
+
+    assert time.monotonic() - started < 1
+    assert pages == [{"url": "https://a.test/good", "content": "good"}]
+    pool.shutdown(wait=True)
+    # Queued fetches never start, and running ones see the cancel event.
+    assert len(fetch.started) < len(URLS)
+    assert sorted(fetch.cancelled) == sorted(fetch.started[1:])
+
+
+@pytest.mark.anyio
+async def test_async_stop_when_cancels_the_remaining_fetches(
+    pool: ThreadPoolExecutor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fetch = EarlyExit()
+    monkeypatch.setattr(scraper, "fetch_page", fetch)
+
+    pages = await ascrape_urls(URLS, stop_when=enough)
+
+    assert pages == [{"url": "https://a.test/good", "content": "good"}]
+    pool.shutdown(wait=True)
+    assert len(fetch.started) < len(URLS)
+    assert sorted(fetch.cancelled) == sorted(fetch.started[1:])
+
+
+def make_response(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update({"Content-Type": "text/html; charset=utf-8"})
+    response.raw = io.BytesIO(body)
+    return response
+
+
+class FakeSession:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.running = Concurrency()
+
+    def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any
+    ) -> Any:
+        with self.running:
+            time.sleep(self.delay)
+        return make_response(f"<p>{url}</p>".encode())
+
+
+@pytest.fixture
+def session(monkeypatch: pytest.MonkeyPatch) -> FakeSession:
+    fake = FakeSession(delay=0.05)
+    monkeypatch.setattr(scraper, "get_session", lambda: fake)
+    monkeypatch.setattr(scraper, "get_page_cache", lambda: None)
+    monkeypatch.setattr(scraper, "get_robots_cache", lambda: None)
+    monkeypatch.setattr(politeness, "HOST_RATE", 0)
+    monkeypatch.setattr(scraper, "PER_HOST_LIMIT", 2)
+    return fake
+
+
+def test_fetches_to_one_host_share_its_slots(session: FakeSession) -> None:
+    deadline = time.monotonic() + 5
+    urls = [f"https://slots.test/{i}" for i in range(6)]
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        pages = list(executor.map(lambda url: fetch_page(url, deadline), urls))
+
+    assert [page["content"] for page in pages] == urls
+    assert session.running.peak == 2
+
+
+def test_waiting_for_a_slot_stops_on_cancel_and_at_the_deadline(
+    session: FakeSession,
+) -> None:
+    slot = scraper._host_slot("https://busy.test/")
+    for _ in range(scraper.PER_HOST_LIMIT):
+        slot.acquire()
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    started = time.monotonic()
+
+    cancelled = fetch_page("https://busy.test/a", time.monotonic() + 5, cancel)
+    expired = fetch_page("https://busy.test/b", time.monotonic() + 0.05)
+
+    assert time.monotonic() - started < 1
+    assert cancelled["content"] == "Error: fetch cancelled"
+    assert expired["content"] == "Error: no free connection slot before deadline"
+    assert session.running.peak == 0
+
+
+def test_idle_hosts_do_not_keep_their_slots(session: FakeSession) -> None:
+    fetch_page("https://idle.test/a", time.monotonic() + 5)
+    gc.collect()
+
+    assert "idle.test" not in scraper._host_slots
@@ -0,0 +1,117 @@
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from react_agent import search
+from react_agent.cache import SingleFlight, TTLCache
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used() -> None:
+    cache: TTLCache[int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    short: TTLCache[int] = TTLCache(maxsize=2, ttl=0.01)
+    short.set("a", 1)
+    time.sleep(0.02)
+    assert short.get("a") is None
+
+
+def test_single_flight_shares_one_call() -> None:
+    flight = SingleFlight()
+    release = threading.Event()
+    calls: List[int] = []
+
+    def slow() -> str:
+        calls.append(1)
+        release.wait(timeout=5)
+        return "result"
+
+    results: List[str] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    while flight.shared < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+
+
+def test_single_flight_propagates_errors() -> None:
+    flight = SingleFlight()
+
+    def fail() -> None:
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "retried") == "retried"
+
+
+class FakeDDGS:
+    def __init__(self, results: List[Dict[str, str]]) -> None:
+        self.results = results
+        self.queries: List[str] = []
+
+    def text(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        self.queries.append(query)
+        return self.results[:max_results]
+
+
+def test_search_urls_is_memoized_per_normalized_query(monkeypatch: Any) -> None:
+    client = FakeDDGS([{"href": "https://a.example/"}, {"href": "https://b.example/"}])
+    monkeypatch.setattr(search, "_client", lambda: client)
+    monkeypatch.setattr(search, "search_cache", TTLCache(16, 60))
+
+    assert search.search_urls("AI  Chips") == [
+        "https://a.example/",
+        "https://b.example/",
+    ]
+    assert search.search_urls("ai chips") == [
+        "https://a.example/",
+        "https://b.example/",
+    ]
+    assert search.search_urls("ai chips", max_results=1) == ["https://a.example/"]
+    assert client.queries == ["AI  Chips", "ai chips"]
+
+
+def test_search_urls_does_not_cache_empty_results(monkeypatch: Any) -> None:
+    client = FakeDDGS([])
+    monkeypatch.setattr(search, "_client", lambda: client)
+    monkeypatch.setattr(search, "search_cache", TTLCache(16, 60))
+
+    assert search.search_urls("nothing") == []
+    assert search.search_urls("nothing") == []
+    assert len(client.queries) == 2
+
+
+def test_fuse_rankings_keeps_best_url_per_domain() -> None:
+    fused = search.fuse_rankings(
+        [
+            ["https://a.example/1", "https://www.b.example/1", "https://c.example/"],
+            ["https://b.example/2", "https://a.example/1", "https://a.example/2"],
+        ],
+        limit=3,
+    )
+    # a/1 is ranked by both lists; b/2 outranks www.b/1, which shares its domain.
+    assert fused == ["https://a.example/1", "https://b.example/2", "https://c.example/"]
+
+
+def test_query_variants_start_with_the_keyword() -> None:
+    variants = search.query_variants("AI")
+    assert variants[0] == "AI"
+    assert len(variants) == 1 + len(search.REFINED_QUERY_TEMPLATES)